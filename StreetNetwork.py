@@ -5,14 +5,14 @@ import matplotlib.pyplot as plt
 #help(ox)
 #help(nx)
 
-def load_zurich_walk_network(place) -> nx.MultiDiGraph:
+def load_zurich_walk_network(place, network_type='walk') -> nx.MultiDiGraph:
    # Configure OSMnx settings
    ox.settings.use_cache = True
    ox.settings.log_console = True
   
    # Download the street network data for the specified place
    #could also change to 'bike', 'drive', 'drive_service', 'all', 'all_provate' type fpr better map selecton ,ethod
-   G = ox.graph_from_place(place, network_type='walk') 
+   G = ox.graph_from_place(place, network_type=network_type) 
    G_projected = ox.project_graph(G) # Project to calculate length 
    print("n---nodes:", len(G.nodes))
    print("n---edges:", len(G.edges))
@@ -0,0 +1,190 @@
+import threading
+import numpy as np
+import shapely
+from shapely.geometry import Point
+from pyproj import Transformer
+from scipy.ndimage import distance_transform_edt
+
+from heatmap_tiles import ZURICH_BBOX
+from urban_planning import ZURICH_GREEN_SPACES, ZURICH_POPULATION_DENSITY_GEOJSON, load_green_spaces
+
+# --- Configuration ---
+ACCESS_CELL_M = 50
+ACCESS_CRS = "EPSG:32632" # UTM zone 32N, metres
+ACCESS_THRESHOLDS_M = (300, 500, 1000) # Walking-distance targets for coverage statistics
+SIMULATED_PEAK_DENSITY_PER_KM2 = 12000 # Simulated population density at the city centre
+SIMULATED_DENSITY_DECAY_KM = 3.0
+SCENARIO_PARK_RADIUS_M = (10, 2000) # Accepted radius of a proposed park in what-if scenarios
+
+# --- Population-Weighted Accessibility Raster ---
+# The city is a fixed grid of 50 m cells. Park cells are burned into a mask and
+# one Euclidean distance transform gives every cell's distance to the nearest
+# park (and which park that is); weighting by a population grid turns that into
+# city-wide coverage statistics. A planning scenario copies the arrays, burns in
+# the proposed park and reruns the transform, a few ms on the 50 m grid.
+
+class AccessibilityRaster:
+    def __init__(self, parks, population=None, bbox=ZURICH_BBOX, cell_m=ACCESS_CELL_M):
+        """
+        `parks`: name -> shapely (lon, lat) geometry; `population`: people per cell as a
+        (rows, cols) array for this grid, or None for a simulated monocentric city.
+        """
+        self.cell_m = cell_m
+        self._to_projected = Transformer.from_crs("EPSG:4326", ACCESS_CRS, always_xy=True)
+        min_lat, min_lon, max_lat, max_lon = bbox
+        xs, ys = self._to_projected.transform([min_lon, max_lon, min_lon, max_lon], [min_lat, min_lat, max_lat, max_lat])
+        self.x0, self.y0 = min(xs), min(ys)
+        self.cols = int(np.ceil((max(xs) - self.x0) / cell_m))
+        self.rows = int(np.ceil((max(ys) - self.y0) / cell_m))
+        self.cell_x = self.x0 + (np.arange(self.cols) + 0.5) * cell_m
+        self.cell_y = self.y0 + (np.arange(self.rows) + 0.5) * cell_m
+
+        self.population = population if population is not None else self.simulated_population()
+        self.park_names = []
+        self.park_cells = np.full((self.rows, self.cols), -1, dtype=np.int32) # Park id covering each cell
+        for name, geometry in parks.items():
+            rows, cols = self.rasterize(geometry)
+            self.park_cells[rows, cols] = len(self.park_names)
+            self.park_names.append(name)
+        self._full_transform()
+
+    def copy(self):
+        """Independent copy for a planning scenario; nothing is recomputed."""
+        scenario = object.__new__(AccessibilityRaster)
+        scenario.__dict__.update(self.__dict__)
+        scenario.park_cells = self.park_cells.copy() # The only array modified in place
+        scenario.park_names = list(self.park_names)
+        return scenario
+
+    def project(self, geometry):
+        return shapely.transform(geometry, lambda c: np.column_stack(self._to_projected.transform(c[:, 0], c[:, 1])))
+
+    def contains(self, lat, lon):
+        """True if (lat, lon) falls on the grid."""
+        x, y = self._to_projected.transform(lon, lat)
+        return 0 <= x - self.x0 < self.cols * self.cell_m and 0 <= y - self.y0 < self.rows * self.cell_m
+
+    def rasterize(self, geometry):
+        """(rows, cols) of cells whose centre lies in `geometry` (lon/lat); the nearest cell for small or point geometries."""
+        projected = self.project(geometry)
+        minx, miny, maxx, maxy = projected.bounds
+        c0, c1 = np.clip(np.floor((np.array([minx, maxx]) - self.x0) / self.cell_m).astype(int), 0, self.cols - 1)
+        r0, r1 = np.clip(np.floor((np.array([miny, maxy]) - self.y0) / self.cell_m).astype(int), 0, self.rows - 1)
+        rr, cc = np.mgrid[r0:r1 + 1, c0:c1 + 1]
+        inside = shapely.contains_xy(projected, self.cell_x[cc], self.cell_y[rr])
+        if not inside.any():
+            centre = projected.centroid
+            col = int(np.clip((centre.x - self.x0) // self.cell_m, 0, self.cols - 1))
+            row = int(np.clip((centre.y - self.y0) // self.cell_m, 0, self.rows - 1))
+            return np.array([row]), np.array([col])
+        return rr[inside], cc[inside]
+
+    def simulated_population(self, centre=(47.3779, 8.5403)):
+        """People per cell for a monocentric city around Zurich HB with seeded noise."""
+        cx, cy = self._to_projected.transform(centre[1], centre[0])
+        r_km = np.hypot(self.cell_x[None, :] - cx, self.cell_y[:, None] - cy) / 1000
+        density = SIMULATED_PEAK_DENSITY_PER_KM2 * np.exp(-r_km / SIMULATED_DENSITY_DECAY_KM)
+        noise = np.random.default_rng(0).lognormal(0, 0.5, density.shape)
+        return density * noise * (self.cell_m / 1000) ** 2
+
+    def population_from_zones(self, zones, column='risk_level'):
+        """Per-cell weights from a zone GeoDataFrame: each cell takes the `column` value of the zone containing it."""
+        zones = zones.to_crs(ACCESS_CRS)
+        xx, yy = np.meshgrid(self.cell_x, self.cell_y)
+        centres = shapely.points(xx.ravel(), yy.ravel())
+        cell_idx, zone_idx = shapely.STRtree(zones.geometry.values).query(centres, predicate='within')
+        weights = np.zeros(centres.shape)
+        weights[cell_idx] = zones[column].to_numpy(dtype=float)[zone_idx]
+        return weights.reshape(self.rows, self.cols)
+
+    def _full_transform(self):
+        not_park = self.park_cells < 0
+        if not_park.all(): # No parks: everything is unreachable
+            self.distance = np.full(not_park.shape, np.inf)
+            self.nearest_park = np.full(not_park.shape, -1, dtype=np.int32)
+            return
+        self.distance, (rows, cols) = distance_transform_edt(not_park, sampling=self.cell_m, return_indices=True)
+        self.nearest_park = self.park_cells[rows, cols]
+
+    def add_park(self, name, geometry):
+        """
+        Adds a park and recomputes the distances. Returns what changed, including the
+        population newly within each ACCESS_THRESHOLDS_M distance.
+        """
+        rows, cols = self.rasterize(geometry)
+        park_id = len(self.park_names)
+        self.park_names.append(name)
+        self.park_cells[rows, cols] = park_id
+
+        old_distance = self.distance
+        self._full_transform()
+        improved = self.distance < old_distance
+        old_distance, new_distance = old_distance[improved], self.distance[improved]
+        people = self.population[improved]
+        return {
+            'park': name,
+            'cells_improved': int(improved.sum()),
+            'population_gaining_access': {
+                f"{t}m": round(float(people[(old_distance > t) & (new_distance <= t)].sum()))
+                for t in ACCESS_THRESHOLDS_M
+            },
+        }
+
+    def stats(self):
+        """City-wide population-weighted coverage statistics."""
+        total = float(self.population.sum())
+        reachable = np.isfinite(self.distance)
+        weighted = float((self.population[reachable] * self.distance[reachable]).sum())
+        served = np.bincount(self.nearest_park[reachable], weights=self.population[reachable],
+                             minlength=len(self.park_names))
+        return {
+            'cell_size_m': self.cell_m,
+            'grid': [self.rows, self.cols],
+            'parks': len(self.park_names),
+            'population': round(total),
+            'mean_distance_m': round(weighted / total, 1) if total else None,
+            'population_share_within': {
+                f"{t}m": round(float(self.population[self.distance <= t].sum()) / total, 4) if total else None
+                for t in ACCESS_THRESHOLDS_M
+            },
+            'nearest_park_population': {name: round(float(people)) for name, people in zip(self.park_names, served)},
+        }
+
+
+def default_parks():
+    """The planner's named green spaces plus the equity analysis's park layer."""
+    parks = {space['name']: Point(space['lon'], space['lat']) for space in ZURICH_GREEN_SPACES}
+    gdf_parks = load_green_spaces()
+    parks.update(zip(gdf_parks['name'], gdf_parks.geometry))
+    return parks
+
+_city_raster = None
+_city_raster_lock = threading.Lock()
+
+def city_accessibility():
+    """The city-wide raster (built once): population from the zone layer if it loads, else simulated."""
+    global _city_raster
+    with _city_raster_lock:
+        if _city_raster is None:
+            raster = AccessibilityRaster(default_parks())
+            try:
+                import geopandas as gpd
+                raster.population = raster.population_from_zones(gpd.read_file(ZURICH_POPULATION_DENSITY_GEOJSON))
+            except Exception as e:
+                print(f"Accessibility raster: using simulated population ({e})")
+            _city_raster = raster
+        return _city_raster
+
+
+if __name__ == '__main__':
+    import time
+
+    start = time.perf_counter()
+    raster = AccessibilityRaster(default_parks())
+    print(f"{raster.rows}x{raster.cols} grid, {len(raster.park_names)} parks: built in {time.perf_counter() - start:.3f} s")
+    print(raster.stats()['population_share_within'], raster.stats()['mean_distance_m'], "m mean")
+
+    scenario = raster.copy()
+    start = time.perf_counter()
+    change = scenario.add_park("New park (Altstetten)", Point(8.4870, 47.3911).buffer(0.002))
+    print(f"Scenario add_park in {(time.perf_counter() - start) * 1000:.1f} ms: {change}")
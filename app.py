@@ -1,38 +1,65 @@
 import requests
 import json
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response
 import random
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 import time
+import threading
 import os
 import googlemaps
 import polyline
 # New Imports for NASA LST Rerouting
 from geopy.distance import great_circle
 from shapely.geometry import Point, LineString, Polygon
+from shapely import affinity
 # We will create mock versions of these to ensure the code runs
-from congestion_analysis import generate_congestion_heatmap_data, load_traffic_data
+from congestion_analysis import generate_congestion_heatmap_data, load_traffic_data, HEATMAP_CELL_SIZE_DEG, HEATMAP_CELL_SIZE_RANGE_DEG
+from heatmap_tiles import congestion_tiles
 from simulation import run_simulation
-from urban_planning import get_green_spaces, calculate_service_areas, analyze_green_space_equity
+from urban_planning import get_green_spaces, calculate_service_areas
+from equity_store import equity_results, EQUITY_RETRY_SECONDS
+from accessibility_raster import city_accessibility, SCENARIO_PARK_RADIUS_M
 from weather import get_current_weather
 from air_quality import get_air_quality
-from environmental_hazards import get_hazard_data
+from environmental_hazards import get_hazard_data, hazard_index, HAZARD_ROUTE_BUFFER_M, HAZARD_QUERY_DISTANCE_RANGE_M
 from crowd_detection import analyze_crowd_density
+from pedestrian_risk import PedestrianRiskEngine
+from priority_ranking import PriorityRanking
 from ai_mentor import get_predefined_questions, get_answer
+from transport_client import stationboard_cache
+from feed_scheduler import FeedScheduler
+from response_cache import response_cache
+from directions_cache import DirectionsCache, OfflineDirectionsClient
+from local_routing import local_router
+from winter_routing import is_freezing
+from heat_routing import HeatPenaltyMask
+from heat_zones import HeatZoneIndex, HEAT_ZONES_PATH
+from journey_planner import load_stations, load_counts, make_features, train_xgb_hist, plan_journey, STATION_FILE_PATH, COUNT_FILE_PATHS
+from forecast_cube import ForecastCube
 
 app = Flask(__name__)
 
 # ====================================================================
 # !!! IMPORTANT: REPLACE WITH YOUR GOOGLE MAPS PLATFORM API KEY !!!
 # ====================================================================
-GOOGLE_API_KEY = "your  api key" 
-gmaps = googlemaps.Client(key=GOOGLE_API_KEY)
+GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY", "your  api key")
+# Overridable so the load test can point Directions calls at a local stub
+GOOGLE_MAPS_BASE_URL = os.environ.get("GOOGLE_MAPS_BASE_URL", "https://maps.googleapis.com")
+if os.environ.get("DIRECTIONS_OFFLINE"):
+    gmaps = OfflineDirectionsClient() # No key or network needed (demos, tests)
+else:
+    gmaps = googlemaps.Client(key=GOOGLE_API_KEY, base_url=GOOGLE_MAPS_BASE_URL)
+# Decoded smart-route results, shared across requests and persisted across restarts
+directions_cache = DirectionsCache(gmaps)
+# 'auto': Google Directions with the local street-graph router as fallback;
+# 'local': local router only (works offline); 'google': Google only.
+ROUTING_BACKEND = os.environ.get("ROUTING_BACKEND", "auto")
 # Ensure this key has access to the Street View Static API.
 # ====================================================================
 
 # --- CONFIGURATION: Transport and Location Data (Original) ---
-# NOTE: The TRANSPORT_API_URL is kept, but the functions use guaranteed simulation inside.
-TRANSPORT_API_URL = "https://transport.opendata.ch/v1/stationboard"
+# NOTE: Stationboards are fetched by transport_client; the functions still use guaranteed simulation inside.
 
 STOPS_TO_ANALYZE = {
     "Zürich HB": "8503000", "Bellevue": "8591100", "Paradeplatz": "8591147", "Central": "8591102", "Bhf Stadelhofen": "8503008",      
@@ -66,6 +93,14 @@ INTERSECTIONS_TO_ANALYZE = {
     "Bhf Stadelhofen / Falkenstrasse": (47.3664, 8.5485), "Milchbuck Tunnel Entrance": (47.3917, 8.5463)
 }
 
+# (road class, pedestrian exposure class) per intersection; see pedestrian_risk. Unlisted: ('urban', 'low')
+INTERSECTION_PROFILES = {
+    "Röntgenstrasse / Hardbrücke": ('arterial', 'low'), "Oerlikon Station Square": ('arterial', 'low'),
+    "Milchbuck Tunnel Entrance": ('arterial', 'low'), "Central / Bahnhofstrasse": ('urban', 'high'),
+    "Bellevue / Limmatquai": ('urban', 'high'), "Bhf Stadelhofen / Falkenstrasse": ('urban', 'high'),
+    "Kreuzplatz / Forchstrasse": ('urban', 'medium'), "Langstrasse / Limmatstrasse": ('urban', 'medium'),
+}
+
 TRAFFIC_SITE_COORDINATES = {
     "Hardbrücke": {"lat": 47.3828, "lon": 8.5135},
     "Rosengartenstrasse": {"lat": 47.3900, "lon": 8.5250},
@@ -76,6 +111,91 @@ TRAFFIC_SITE_COORDINATES = {
     "Stauffacher": {"lat": 47.3755, "lon": 8.5215},
 }
 
+EVENT_MARKETS = {
+    "bellevue": {"lat": 47.3662, "lon": 8.5448},
+    "hb": {"lat": 47.3779, "lon": 8.5401},
+    "niederdorf": {"lat": 47.3730, "lon": 8.5455},
+    "wienachtsdorf": {"lat": 47.3664, "lon": 8.5485}
+}
+
+# Named places the local router can resolve without a geocoder
+local_router.add_places(STOP_COORDINATES)
+local_router.add_places(INTERSECTIONS_TO_ANALYZE)
+local_router.add_places({name: (site['lat'], site['lon']) for name, site in TRAFFIC_SITE_COORDINATES.items()})
+
+# --- Background Data Feeds ---
+# Live feeds are polled in the background and endpoints answer from the last good
+# snapshot; staleness is reported in the X-Data-* response headers.
+feeds = FeedScheduler()
+feeds.register('traffic', load_traffic_data, interval=300)
+feeds.register('weather', get_current_weather, interval=600)
+feeds.register('air_quality', get_air_quality, interval=900)
+feeds.register('heat_zones', lambda: load_heat_zone_index(), interval=3600)
+feeds.register('stationboards', lambda: stationboard_cache.refresh(STOPS_TO_ANALYZE.values()), interval=30)
+feeds.register('crowd', analyze_crowd_density, interval=60)
+
+# Pedestrian risk for all intersections, evaluated once per traffic/crowd snapshot
+pedestrian_risk_engine = PedestrianRiskEngine(INTERSECTIONS_TO_ANALYZE, INTERSECTION_PROFILES)
+
+# --- Journey Planning ---
+# The counting-station model is trained once on a background thread; from then
+# on the forecast cube (stations x next 48 hours) is refreshed hourly from freshly
+# loaded counts, so journey requests read station counts from the cube instead
+# of running the recursive forecast themselves, and time the trip over the
+# street graph with BPR delays (journey_planner.plan_journey).
+forecast_cube = ForecastCube()
+journey_model = None # (model, features, stations_df, station_encoder) once trained
+_journey_setup = None
+_journey_setup_lock = threading.Lock()
+# journey_planner mode -> local_router mode whose street graph is used for the route
+JOURNEY_ROUTER_MODES = {'driving': 'driving', 'cycling': 'bicycling', 'walking': 'walking'}
+# The counting data is in naive Zurich local time; event times with an offset are converted to it
+JOURNEY_TIMEZONE = ZoneInfo("Europe/Zurich")
+JOURNEY_ARRIVE_BY_RANGE_MIN = (0, 24 * 60)
+
+def load_counting_data():
+    return load_counts(COUNT_FILE_PATHS)
+
+def start_journey_planner():
+    """Loads the counting data, trains the model and starts the hourly cube refresh on a daemon thread (once)."""
+    global _journey_setup
+
+    def run():
+        global journey_model
+        try:
+            stations = load_stations(STATION_FILE_PATH)
+            model, features, station_encoder = train_xgb_hist(make_features(load_counting_data()))
+        except Exception as e:
+            print(f"Journey planner unavailable: {e}")
+            return
+        if model is None:
+            print("Journey planner unavailable: not enough counting data to train on.")
+            return
+        journey_model = (model, features, stations, station_encoder)
+        forecast_cube.start_background_refresh(model, features, load_counting_data, station_encoder)
+
+    with _journey_setup_lock:
+        if _journey_setup is None:
+            _journey_setup = threading.Thread(target=run, name="journey-planner-setup", daemon=True)
+            _journey_setup.start()
+
+def snapshot_headers(snapshot):
+    """Age/staleness headers describing the snapshot a response was built from."""
+    if snapshot is None:
+        return {'X-Data-Stale': 'true'}
+    meta = snapshot.metadata()
+    return {
+        'X-Data-Fetched-At': meta['fetched_at'],
+        'X-Data-Age-Seconds': str(meta['age_seconds']),
+        'X-Data-Stale': 'true' if meta['stale'] else 'false',
+    }
+
+def snapshot_response(payload, snapshot):
+    """jsonify(payload) plus the age/staleness headers of the snapshot it was built from."""
+    response = jsonify(payload)
+    response.headers.update(snapshot_headers(snapshot))
+    return response
+
 # --- Core Analysis Functions (Fixed for Guaranteed Simulation) ---
 
 def get_live_city_events():
@@ -90,23 +210,17 @@ def get_live_city_events():
         { "id": "street-parade", "name": "Street Parade", "type": "Public Event", "lat": 47.365, "lon": 8.548, "date": "2024-08-10", "description": "One of the largest techno parades in the world around the lake basin." }
     ]
 
-def get_delay_severity(stop_id, stop_name):
+def get_delay_severity(stop_id, stop_name, departures=None):
     """
     Simulates fetching delay data. The internal simulation logic is now guaranteed
     to run even if the external API fails.
+    Departures come from the shared stationboard snapshot cache unless they are
+    passed in (e.g. from `stationboard_cache.get_many`).
     """
-    params = {'id': stop_id, 'limit': 20, 'transportations[]': ['tram', 'bus', 'train']}
-    
-    departures = []
-    
-    # Try to fetch real data, but don't rely on it
-    try:
-        response = requests.get(TRANSPORT_API_URL, params=params, timeout=1)
-        response.raise_for_status()
-        data = response.json()
-        departures = data.get('departures', [])
-    except requests.exceptions.RequestException:
-        print(f"Failed to fetch real data for {stop_name}. Simulating 10 departures.")
+    if departures is None:
+        # Try to fetch real data, but don't rely on it
+        departures = stationboard_cache.get(stop_id)
+    departures = list(departures)
 
     # Always ensure a data set exists for simulation logic to run
     if not departures:
@@ -159,6 +273,14 @@ def get_delay_severity(stop_id, stop_name):
         
     return avg_delay, delayed_trips, total_trips, delay_severity_index
 
+def load_heat_zone_index():
+    """Heat-risk zones from HEAT_ZONES_PATH (GeoJSON), indexed once per load; the mock polygon if the file is unusable."""
+    try:
+        return HeatZoneIndex.from_file(HEAT_ZONES_PATH)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading heat zones from {HEAT_ZONES_PATH}: {e}")
+        return HeatZoneIndex.from_latlon({'nasa_lst': load_nasa_heat_zone()})
+
 def load_nasa_heat_zone():
     """
     Loads the coordinates for the high-heat polygon.
@@ -179,14 +301,16 @@ def load_nasa_heat_zone():
 # is_route_crossing_polygon, calculate_rerouted_path, calculate_dynamic_user_route) 
 # remain unchanged as they are either pure simulation or rely on the now-fixed functions.
 
-def analyze_route_adherence():
-    # ... (Original code) ...
+def analyze_route_adherence(boards=None):
+    """Tram 11 segment adherence; departures come from `boards` (stop_id -> list) when given."""
     route_data = []
     
     for i in range(len(TRAM_LINE_11_STOPS) - 1):
         start_name = TRAM_LINE_11_STOPS[i]
+        stop_id = STOPS_TO_ANALYZE[start_name]
+        departures = boards.get(stop_id) if boards is not None else None
         
-        avg_delay, delayed_trips, total_trips, severity_index = get_delay_severity(STOPS_TO_ANALYZE[start_name], start_name)
+        avg_delay, delayed_trips, total_trips, severity_index = get_delay_severity(stop_id, start_name, departures)
         
         if total_trips == 0: sas = 1.0 
         else:
@@ -206,83 +330,78 @@ def analyze_route_adherence():
 
     return route_data
     
-def get_pedestrian_risk(intersection_name):
-    # ... (Original code) ...
-    if "Hardbrücke" in intersection_name or "Tunnel" in intersection_name or "Oerlikon" in intersection_name:
-        risk_factor = random.uniform(3.5, 5.0) 
-    else:
-        risk_factor = random.uniform(2.0, 3.5)
-    if "Central" in intersection_name or "Bellevue" in intersection_name or "Stadelhofen" in intersection_name:
-        exposure_factor = random.uniform(3.0, 5.0)
-    elif "Kreuzplatz" in intersection_name or "Langstrasse" in intersection_name:
-        exposure_factor = random.uniform(2.0, 4.0)
-    else:
-        exposure_factor = random.uniform(1.0, 3.0)
+def current_pedestrian_risk():
+    """Pedestrian risk records for all intersections from the current traffic and crowd snapshots."""
+    return pedestrian_risk_engine.evaluate(feeds.snapshot('traffic'), feeds.snapshot('crowd'))
 
-    pedestrian_risk_score = risk_factor * exposure_factor
-    
-    if pedestrian_risk_score > 15.0: 
-        priority, color = "Critical", "#C51B7D"
-        recommendation = "Immediate infrastructure intervention (e.g., Pedestrian Bridge or Light Signal)"
-    elif pedestrian_risk_score > 8.0: 
-        priority, color = "High", "#DE77AE"
-        recommendation = "Traffic calming measures (e.g., Raised Crosswalks, Curb Extensions)"
-    else: 
-        priority, color = "Standard", "#8856A7"
-        recommendation = "Standard maintenance and monitoring"
+def get_pedestrian_risk(intersection_name):
+    """The current pedestrian risk record of one intersection (None if it is not monitored)."""
+    return next((r for r in current_pedestrian_risk() if r['location'] == intersection_name), None)
 
-    return {
-        'prs': round(pedestrian_risk_score, 2), 
-        'priority': priority, 
-        'color': color,
-        'recommendation': recommendation,  
-        'location': intersection_name, 
-        'risk_type': 'Pedestrian Safety'
-    }
+# --- Mentor Priority Ranking ---
+# Issues are ranked per source as snapshots arrive (stationboards feed -> PT delay
+# and adherence issues, traffic/crowd feeds -> pedestrian safety issues), so the
+# mentor report only reads the current top issue of each source.
+mentor_ranking = PriorityRanking(['pt_delay', 'adherence', 'safety'])
 
-def generate_mentor_advice():
-    # ... (Original code) ...
-    pt_delays = []
+def pt_delay_issues(boards):
+    issues = []
     for name, stop_id in STOPS_TO_ANALYZE.items():
-        avg_delay, _, _, severity_index = get_delay_severity(stop_id, name)
+        avg_delay, _, _, severity_index = get_delay_severity(stop_id, name, boards.get(stop_id))
         if severity_index > 4.0: 
-            pt_delays.append({
+            issues.append({
                 'location': name,
                 'score': round(severity_index, 2),
                 'type': 'PT Delay Severity (Infrastructure)',
                 'action': 'Prioritize dedicated lane expansion or signal pre-emption systems.'
             })
-    pt_delays.sort(key=lambda x: x['score'], reverse=True)
-    top_pt_issue = pt_delays[0] if pt_delays else None
+    return issues
 
-    adherence_data = analyze_route_adherence()
-    adherence_issues = []
-    for segment in adherence_data:
+def adherence_issues(boards):
+    issues = []
+    for segment in analyze_route_adherence(boards):
         adherence_severity = 1 - segment['sas'] 
         if adherence_severity > 0.4: 
-            adherence_issues.append({
+            issues.append({
                 'location': f"Tram 11: {segment['start_stop']} to {segment['end_stop']}",
                 'score': round(adherence_severity, 2),
                 'type': 'Route Adherence Gap (Fleet/Schedule)',
                 'action': 'Allocate reserve fleet capacity or adjust schedules to match real-time flow.'
             })
-    adherence_issues.sort(key=lambda x: x['score'], reverse=True)
-    top_adherence_issue = adherence_issues[0] if adherence_issues else None
-
-    safety_data = []
-    for name, _ in INTERSECTIONS_TO_ANALYZE.items():
-        analysis = get_pedestrian_risk(name)
-        if analysis['prs'] > 8.0: 
-            safety_data.append({
-                'location': name,
-                'score': analysis['prs'],
-                'type': analysis['risk_type'],
-                'action': analysis['recommendation'].split(' (e.g.,')[0]
-            })
-    safety_data.sort(key=lambda x: x['score'], reverse=True)
-    top_safety_issue = safety_data[0] if safety_data else None
+    return issues
+
+def rank_stationboard_issues(snapshot):
+    """Feed subscriber: re-ranks PT delay and adherence issues from a new stationboards snapshot."""
+    if mentor_ranking.version('pt_delay') == snapshot.fetched_at:
+        return
+    mentor_ranking.update('pt_delay', snapshot.fetched_at, pt_delay_issues(snapshot.data))
+    mentor_ranking.update('adherence', snapshot.fetched_at, adherence_issues(snapshot.data))
+
+def rank_safety_issues(_snapshot=None):
+    """Feed subscriber: re-ranks pedestrian safety issues (once per pedestrian risk evaluation)."""
+    risk = current_pedestrian_risk()
+    if mentor_ranking.version('safety') == pedestrian_risk_engine.evaluations:
+        return
+    mentor_ranking.update('safety', pedestrian_risk_engine.evaluations, [{
+        'location': analysis['location'],
+        'score': analysis['prs'],
+        'type': analysis['risk_type'],
+        'action': analysis['recommendation'].split(' (e.g.,')[0]
+    } for analysis in risk if analysis['prs'] > 8.0])
+
+feeds.subscribe('stationboards', rank_stationboard_issues)
+feeds.subscribe('traffic', rank_safety_issues)
+feeds.subscribe('crowd', rank_safety_issues)
 
-    top_issues = [issue for issue in [top_pt_issue, top_adherence_issue, top_safety_issue] if issue is not None]
+def generate_mentor_advice():
+    """The mentor report from the current top issue of each source."""
+    if mentor_ranking.version('pt_delay') is None:
+        # Nothing ranked yet (feeds not started in this process): rank the first snapshot now
+        snapshot = feeds.snapshot('stationboards')
+        if snapshot is not None:
+            rank_stationboard_issues(snapshot)
+    rank_safety_issues() # No-op unless the traffic/crowd snapshots changed
+    top_issues = mentor_ranking.top_per_source()
     
     if not top_issues:
         return "The city is currently operating at optimal efficiency and safety levels. No critical interventions needed."
@@ -403,22 +522,14 @@ def generate_dynamic_reroute():
     return {'event_active': True, **event_data, 'advice': advice}
 
 
-def is_route_crossing_polygon(source_point, dest_point, heat_polygon_coords):
-    # ... (Original code) ...
-    if not heat_polygon_coords:
+def is_route_crossing_polygon(source_point, dest_point, heat_index):
+    """Whether the straight source -> destination line crosses any zone of a HeatZoneIndex."""
+    if heat_index is None or len(heat_index) == 0:
         return False
-        
-    # Create Shapely LineString for the straight path (Shapely uses [lon, lat])
-    route_line = LineString([
-        (source_point['lng'], source_point['lat']), 
-        (dest_point['lng'], dest_point['lat'])
+    return heat_index.crosses([
+        [source_point['lat'], source_point['lng']],
+        [dest_point['lat'], dest_point['lng']]
     ])
-    
-    # Create Shapely Polygon from the [lat, lon] coordinates
-    heat_polygon = Polygon([(lon, lat) for lat, lon in heat_polygon_coords])
-    
-    # Check for intersection
-    return route_line.intersects(heat_polygon)
 
 def calculate_rerouted_path(source, destination, heat_polygon_coords):
     # ... (Original code) ...
@@ -448,15 +559,39 @@ def calculate_rerouted_path(source, destination, heat_polygon_coords):
     
     return reroute_coords, f"Avoided heat zone. Extra distance: {extra_distance:.2f} km."
 
+_heat_mask = None
+_heat_mask_lock = threading.Lock()
+
+def get_heat_penalty_mask(heat_snapshot):
+    """
+    The walk-graph heat penalty mask, brought up to date with the heat-zone snapshot
+    (incrementally, once per snapshot). None while the walking graph is not loaded.
+    """
+    global _heat_mask
+    router = local_router.street_router('walking')
+    if router is None or heat_snapshot is None:
+        return None
+    with _heat_mask_lock:
+        if _heat_mask is None or _heat_mask.router is not router:
+            _heat_mask = HeatPenaltyMask(router)
+        _heat_mask.update(heat_snapshot.data.zones(), snapshot_version=heat_snapshot.fetched_at)
+        return _heat_mask
+
 def calculate_dynamic_user_route(source, destination):
     # ... (Original code) ...
     
-    # 1. Load the NASA Heat Risk Zone coordinates (Mocked)
-    heat_polygon_leaflet = load_nasa_heat_zone()
+    # 1. Heat-risk zone index (NASA LST layer), polled as a feed
+    heat_snapshot = feeds.snapshot('heat_zones')
+    heat_index = heat_snapshot.data if heat_snapshot else load_heat_zone_index()
+    straight_line = [[source['lat'], source['lng']], [destination['lat'], destination['lng']]]
+    # The zone to draw: one the direct line crosses, else the closest one around the trip
+    shown_zones = heat_index.crossing(straight_line) or heat_index.near(straight_line)
+    heat_polygon_leaflet = heat_index.ring_latlon(shown_zones[0]) if shown_zones else []
 
     # 2. Dynamic Activation Logic
     now = datetime.now()
-    weather_data = get_current_weather() # Mocked weather data
+    weather_snapshot = feeds.snapshot('weather') # Last polled weather data
+    weather_data = weather_snapshot.data if weather_snapshot else None
     
     is_hot_time = False
     status_message = "✅ DIRECT ROUTE: Optimal path found. No major heat risks detected."
@@ -475,14 +610,31 @@ def calculate_dynamic_user_route(source, destination):
     
     is_rerouted = False
     
-    # Direct Path (Straight line)
+    # Walking paths on the street graph, with and without heat-zone penalties
+    heat_mask = get_heat_penalty_mask(heat_snapshot)
+    paths = heat_mask.route((source['lat'], source['lng']), (destination['lat'], destination['lng'])) if heat_mask else None
+    if paths is not None:
+        use_avoiding = is_hot_time and paths['is_rerouted']
+        final_route = [[lon, lat] for lat, lon in paths['avoiding' if use_avoiding else 'direct']]
+        if use_avoiding:
+            is_rerouted = True
+            status_message = (f"⚠️ REROUTED: Avoided {paths['direct_heat_m'] - paths['avoiding_heat_m']:.0f} m in heat zones. "
+                              f"Extra distance: {paths['avoiding_km'] - paths['direct_km']:.2f} km. Path shown in green. {status_message}")
+        return {
+            'route_coordinates': final_route,
+            'crowd_polygon': heat_polygon_leaflet,
+            'crowd_status': status_message,
+            'is_rerouted': is_rerouted
+        }
+
+    # Street graph not loaded yet: direct path (straight line)
     final_route = [
         [source['lng'], source['lat']], 
         [destination['lng'], destination['lat']]
     ] 
     print(f"Direct route: {final_route}")
     # 3. Rerouting Decision
-    if is_hot_time and is_route_crossing_polygon(source, destination, heat_polygon_leaflet):
+    if is_hot_time and is_route_crossing_polygon(source, destination, heat_index):
         
         final_route, message_detail = calculate_rerouted_path(source, destination, heat_polygon_leaflet)
         
@@ -523,9 +675,15 @@ def index():
 @app.route('/api/analyze')
 def analyze_api():
     """Provides the data for the public transport delay hotspots."""
+    snapshot = feeds.snapshot('stationboards')
+    boards = snapshot.data if snapshot else stationboard_cache.get_many(STOPS_TO_ANALYZE.values())
+    return snapshot_response(build_pt_delays(boards), snapshot)
+
+def build_pt_delays(boards):
+    """Delay hotspots for all analysed stops from their departures (stop_id -> list), most severe first."""
     pt_delays = []
     for name, stop_id in STOPS_TO_ANALYZE.items():
-        avg_delay, _, _, severity_index = get_delay_severity(stop_id, name)
+        avg_delay, _, _, severity_index = get_delay_severity(stop_id, name, boards[stop_id])
         if severity_index > 0:
             lat, lon = STOP_COORDINATES.get(name, (None, None))
             
@@ -543,7 +701,7 @@ def analyze_api():
             })
             
     pt_delays.sort(key=lambda x: x['severity_index'], reverse=True)
-    return jsonify(pt_delays)
+    return pt_delays
 
 @app.route('/api/route_adherence')
 def route_adherence_api():
@@ -553,20 +711,43 @@ def route_adherence_api():
         'route_segments': analyze_route_adherence()
     })
 
+@app.route('/api/route_adherence/route')
+@response_cache.cached()
+def route_adherence_route_api():
+    """The static Tram 11 route geometry, cached with an ETag so the dashboard can revalidate it cheaply."""
+    return {'route_coords': TRAM_LINE_11_ROUTE}
+
+@app.route('/api/metrics/stationboard-cache')
+def stationboard_cache_metrics_api():
+    """Hit/miss metrics of the shared stationboard snapshot cache."""
+    return jsonify(stationboard_cache.stats())
+
+@app.route('/api/feeds/status')
+def feeds_status_api():
+    """Freshness and error state of every background data feed."""
+    return jsonify(feeds.status())
+
+@app.route('/api/metrics/directions-cache')
+def directions_cache_metrics_api():
+    """Hit/miss metrics of the smart-route directions cache."""
+    return jsonify(directions_cache.stats())
+
+@app.route('/api/metrics/response-cache')
+def response_cache_metrics_api():
+    """Hit/miss/304 metrics of the response cache for static-data APIs."""
+    return jsonify(response_cache.stats())
+
 @app.route('/api/pedestrian_risk')
 def pedestrian_risk_api():
     """Provides data for the pedestrian risk hotspots."""
-    risk_data = []
-    for name, coords in INTERSECTIONS_TO_ANALYZE.items():
-        analysis = get_pedestrian_risk(name)
-        risk_data.append({
-            'intersection_name': name,
-            'risk_score': analysis['prs'],
-            'priority': analysis['priority'],
-            'lat': coords[0],
-            'lon': coords[1],
-            'color': analysis['color']
-        })
+    risk_data = [{
+        'intersection_name': analysis['location'],
+        'risk_score': analysis['prs'],
+        'priority': analysis['priority'],
+        'lat': analysis['lat'],
+        'lon': analysis['lon'],
+        'color': analysis['color']
+    } for analysis in current_pedestrian_risk()]
     return jsonify(risk_data)
 
 @app.route('/api/mentor_advice')
@@ -575,6 +756,11 @@ def mentor_advice_api():
     report = generate_mentor_advice()
     return jsonify({'report': report})
 
+@app.route('/api/metrics/mentor-ranking')
+def mentor_ranking_metrics_api():
+    """Issue counts and snapshot versions of the mentor priority ranking."""
+    return jsonify(mentor_ranking.stats())
+
 @app.route('/api/dynamic_reroute')
 def dynamic_reroute_api():
     """Generates and returns the dynamic rerouting advice."""
@@ -583,10 +769,55 @@ def dynamic_reroute_api():
 
 @app.route('/api/congestion-heatmap')
 def congestion_heatmap_api():
-    """Provides data for the real-time congestion heatmap (now mocked)."""
-    traffic_df = load_traffic_data()
-    heatmap_data = generate_congestion_heatmap_data(traffic_df)
-    return jsonify(heatmap_data)
+    """
+    Provides data for the real-time congestion heatmap (now mocked).
+    Optional `bin=grid|hex` and `cell=<degrees>` aggregate the points server-side.
+    """
+    try:
+        bin_options = parse_heatmap_bin_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    snapshot = feeds.snapshot('traffic')
+    traffic_df = snapshot.data if snapshot else None
+    heatmap_data = generate_congestion_heatmap_data(traffic_df, **bin_options)
+    return snapshot_response(heatmap_data, snapshot)
+
+def parse_heatmap_bin_args(args):
+    """
+    `bin`/`cell` query args as generate_congestion_heatmap_data kwargs.
+
+    Raises:
+        ValueError: with a client-facing message if `bin` or `cell` is invalid.
+    """
+    bin_mode = args.get('bin')
+    if bin_mode not in (None, 'grid', 'hex'):
+        raise ValueError("bin must be 'grid' or 'hex'.")
+    min_cell, max_cell = HEATMAP_CELL_SIZE_RANGE_DEG
+    try:
+        cell_size = float(args.get('cell', HEATMAP_CELL_SIZE_DEG))
+    except ValueError:
+        cell_size = float('nan')
+    if not min_cell <= cell_size <= max_cell: # Also rejects NaN
+        raise ValueError(f"cell must be a size in degrees between {min_cell} and {max_cell}.")
+    return {'bin_mode': bin_mode, 'cell_size': cell_size}
+
+@app.route('/tiles/congestion/<int:z>/<int:x>/<int:y>.png')
+def congestion_tile(z, x, y):
+    """Pre-rendered congestion heatmap tile for the current traffic snapshot, with ETag revalidation."""
+    if not (0 <= z <= 19 and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({'error': 'Tile out of range.'}), 404
+    snapshot = feeds.snapshot('traffic')
+    version = snapshot.fetched_at.isoformat() if snapshot else 'unavailable'
+    traffic_df = snapshot.data if snapshot else None
+    png, etag = congestion_tiles.tile(version, lambda: generate_congestion_heatmap_data(traffic_df), z, x, y)
+
+    if etag in request.headers.get('If-None-Match', ''):
+        response = Response(status=304)
+    else:
+        response = Response(png, mimetype='image/png')
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'no-cache' # Always revalidate; a new snapshot changes the ETag
+    return response
 
 @app.route('/api/live-events')
 def live_events_api():
@@ -597,27 +828,96 @@ def live_events_api():
 @app.route('/api/weather')
 def weather_api():
     """Provides current weather data (now mocked)."""
-    weather = get_current_weather()
-    return jsonify(weather)
+    snapshot = feeds.snapshot('weather')
+    return snapshot_response(snapshot.data if snapshot else None, snapshot)
 
 @app.route('/api/air-quality')
 def air_quality_api():
     """Provides current air quality data (now mocked)."""
-    air_quality = get_air_quality()
-    return jsonify(air_quality)
+    snapshot = feeds.snapshot('air_quality')
+    return snapshot_response(snapshot.data if snapshot else None, snapshot)
 
 @app.route('/api/urban-planning/green-space-equity')
 def green_space_equity_api():
-    """Provides the green space equity analysis (now mocked)."""
-    equity_data = analyze_green_space_equity()
-    return jsonify(equity_data)
+    """Green space equity analysis, computed once per zone/park layer version and served from memory."""
+    body, version = equity_results.get()
+    if version is None: # Analysis failed; nothing cacheable, retried on a later request
+        response = Response(body, status=503, mimetype='application/json')
+        response.headers['Retry-After'] = str(EQUITY_RETRY_SECONDS)
+        return response
+    etag = f'"{version}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'no-cache' # Revalidate; a changed input file changes the ETag
+    return response
+
+@app.route('/api/metrics/equity-results')
+def equity_results_metrics_api():
+    """Version and computation counts of the cached equity analysis."""
+    return jsonify(equity_results.stats())
 
 @app.route('/api/environmental-hazards')
+@response_cache.cached()
 def environmental_hazards_api():
     """Provides data on environmental hazards (now mocked)."""
     hazard_type = request.args.get('type', 'landslide') # Default to landslide
-    hazard_data = get_hazard_data(hazard_type)
-    return jsonify(hazard_data)
+    return get_hazard_data(hazard_type)
+
+@app.route('/api/environmental-hazards/query', methods=['GET', 'POST'])
+def environmental_hazards_query_api():
+    """
+    Only the hazards relevant to a query (type: 'landslide', 'winter' or 'all'):
+    GET ?bbox=south,west,north,east (viewport) or ?point=lat,lon[&radius=m];
+    POST {"route": [[lat, lon], ...], "buffer_m": 30, "type": ...}.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            route = [(float(lat), float(lon)) for lat, lon in data.get('route') or []]
+        except (TypeError, ValueError): # Points that are not [lat, lon] pairs of numbers
+            route = []
+        if len(route) < 2 or not all(-90 <= lat <= 90 and -180 <= lon <= 180 for lat, lon in route): # Also rejects NaN
+            return jsonify({'error': 'route needs at least two [lat, lon] points.'}), 400
+        try:
+            buffer_m = parse_hazard_distance(data.get('buffer_m', HAZARD_ROUTE_BUFFER_M), 'buffer_m')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(hazard_index.along_route(route, data.get('type', 'all'), buffer_m))
+
+    hazard_type = request.args.get('type', 'all')
+    try:
+        if 'bbox' in request.args:
+            south, west, north, east = (float(v) for v in request.args['bbox'].split(','))
+            return jsonify(hazard_index.in_bbox(south, west, north, east, hazard_type))
+        if 'point' in request.args:
+            lat, lon = (float(v) for v in request.args['point'].split(','))
+            try:
+                radius = parse_hazard_distance(request.args.get('radius', 0), 'radius')
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify(hazard_index.at_point(lat, lon, hazard_type, radius))
+    except ValueError:
+        return jsonify({'error': 'bbox must be south,west,north,east and point lat,lon.'}), 400
+    return jsonify({'error': 'Give a bbox, a point or POST a route.'}), 400
+
+def parse_hazard_distance(value, name):
+    """
+    A hazard query distance (`name`) in metres.
+
+    Raises:
+        ValueError: with a client-facing message if `value` is not a number within HAZARD_QUERY_DISTANCE_RANGE_M.
+    """
+    min_distance, max_distance = HAZARD_QUERY_DISTANCE_RANGE_M
+    try:
+        distance = float(value)
+    except (TypeError, ValueError):
+        distance = float('nan')
+    if not min_distance <= distance <= max_distance: # Also rejects NaN
+        raise ValueError(f"{name} must be between {min_distance} and {max_distance} metres.")
+    return distance
 
 @app.route('/user-routing')
 def user_routing():
@@ -700,10 +1000,11 @@ def crowd_analysis_api():
     return jsonify(data)
 
 @app.route('/api/ai-mentor/questions', methods=['GET'])
+@response_cache.cached()
 def ai_mentor_questions():
     """Predefined AI mentor questions (now mocked)."""
     questions = get_predefined_questions()
-    return jsonify({"questions": questions})
+    return {"questions": questions}
 
 @app.route('/api/ai-mentor/answer', methods=['POST'])
 def ai_mentor_answer():
@@ -722,55 +1023,138 @@ def smart_route_api():
     Provides a smart route using Google Maps Directions API for construction 
     and navigation pages.
     """
-    data = request.json
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object.'}), 400
     origin = data.get('origin')
     destination = data.get('destination')
-    mode = data.get('mode', 'driving').lower() # Ensure mode is lowercase
+    mode = str(data.get('mode', 'driving')).lower() # Ensure mode is lowercase
 
     if not origin or not destination:
         return jsonify({'error': 'Origin and destination are required.'}), 400
 
+    backend = data.get('router', ROUTING_BACKEND)
     try:
-        # Get directions from Google Maps
-        directions_result = gmaps.directions(origin, destination, mode=mode)
+        winter = winter_routing_requested(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if backend == 'local':
+        route = local_router.route(origin, destination, mode, winter=winter)
+        if route is None:
+            return jsonify({'error': 'Local routing is unavailable for these locations or this mode.'}), 503
+        return jsonify(format_smart_route(route, origin, destination, mode)[0])
+    if winter and backend == 'auto':
+        # Google knows nothing about the icy segments: prefer the local router while it is ready
+        route = local_router.route(origin, destination, mode, winter=True)
+        if route is not None:
+            return jsonify(format_smart_route(route, origin, destination, mode)[0])
 
-        if not directions_result:
-            return jsonify({'error': 'Could not find a route. Please check the locations.'}), 404
+    try:
+        # Decoded Google Maps route; identical queries are served from the directions cache
+        route = directions_cache.get(origin, destination, mode)
+    except Exception as e:
+        print(f"Error fetching Google Maps route: {e}")
+        route = local_router.route(origin, destination, mode) if backend == 'auto' else None
+        if route is None:
+            return jsonify({'error': 'An error occurred while fetching the route from Google Maps.'}), 500
 
-        # Extract the first leg of the route
-        leg = directions_result[0]['legs'][0]
-        distance = leg['distance']['text']
-        duration = leg['duration']['text']
-        
-        # Decode the overview polyline to get the path for the map
-        path_polyline = directions_result[0]['overview_polyline']['points']
-        path = polyline.decode(path_polyline)
-
-        # Extract turn-by-turn directions for the navigation page
-        directions_steps = []
-        for step in leg['steps']:
-            directions_steps.append({
-                "html_instructions": step['html_instructions'],
-                "distance": step['distance']
-            })
+    payload, status = format_smart_route(route, origin, destination, mode)
+    return jsonify(payload), status
 
-        # Generate a simple summary and advice
-        summary = f"Route from {origin} to {destination}"
-        advice = f"This is the recommended {mode} route. Total distance: {distance}."
-
-        return jsonify({
-            'path': path,
-            'directions': directions_steps,
-            'summary': summary,
-            'distance': distance,
-            'duration': duration,
-            'smart_advice': advice
-        })
+def format_smart_route(route, origin, destination, mode):
+    """Turns a decoded route (see directions_cache.decode_route) into the smart-route payload; returns (payload, status)."""
+    if not route:
+        return {'error': 'Could not find a route. Please check the locations.'}, 404
 
-    except Exception as e:
-        print(f"Error fetching Google Maps route: {e}")
-        return jsonify({'error': 'An error occurred while fetching the route from Google Maps.'}), 500
+    # Generate a simple summary and advice
+    summary = f"Route from {origin} to {destination}"
+    advice = f"This is the recommended {mode} route. Total distance: {route['distance']}."
+    if 'winter_hazard_m' in route:
+        advice += (" Freezing conditions: steep icy roads are avoided where possible"
+                   f" ({route['winter_hazard_m']:.0f} m of the route still on them).")
 
+    return {
+        'path': route['path'],
+        'directions': route['directions'],
+        'summary': summary,
+        'distance': route['distance'],
+        'duration': route['duration'],
+        'smart_advice': advice,
+        'winter_mode': 'winter_hazard_m' in route
+    }, 200
+
+WINTER_FLAG_VALUES = {'true': True, '1': True, 'yes': True, 'on': True,
+                      'false': False, '0': False, 'no': False, 'off': False}
+
+def winter_routing_requested(data):
+    """
+    Whether a route request should avoid winter hazard roads: the request's 'winter' field
+    (true/false), or by default ('auto') whenever the polled weather is below freezing.
+
+    Raises:
+        ValueError: if 'winter' is neither a boolean, 'auto' nor one of WINTER_FLAG_VALUES.
+    """
+    winter = data.get('winter', 'auto')
+    if isinstance(winter, bool):
+        return winter
+    flag = str(winter).strip().lower()
+    if flag == 'auto':
+        snapshot = feeds.snapshot('weather')
+        return is_freezing(snapshot.data if snapshot else None)
+    if flag not in WINTER_FLAG_VALUES:
+        raise ValueError("winter must be true, false or 'auto'.")
+    return WINTER_FLAG_VALUES[flag]
+
+
+@app.route('/api/journey-plan', methods=['POST'])
+def journey_plan_api():
+    """
+    Recommended departure time to reach 'destination' from 'origin' (places as accepted by
+    local_router.resolve) 'arrive_by_minutes' (default 10) before 'event_time' (ISO format),
+    travelling by 'mode' (driving, cycling or walking).
+    """
+    start_journey_planner() # No-op once started; covers hosts that never run __main__
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object.'}), 400
+    origin, destination = local_router.resolve(data.get('origin')), local_router.resolve(data.get('destination'))
+    if origin is None or destination is None:
+        return jsonify({'error': 'Valid origin and destination are required.'}), 400
+    try:
+        event_time = datetime.fromisoformat(str(data['event_time']))
+    except (KeyError, ValueError):
+        return jsonify({'error': 'event_time (ISO format) is required.'}), 400
+    if event_time.tzinfo is not None:
+        event_time = event_time.astimezone(JOURNEY_TIMEZONE).replace(tzinfo=None)
+    min_arrive_by, max_arrive_by = JOURNEY_ARRIVE_BY_RANGE_MIN
+    try:
+        arrive_by_minutes = float(data.get('arrive_by_minutes', 10))
+    except (TypeError, ValueError):
+        arrive_by_minutes = float('nan')
+    if not min_arrive_by <= arrive_by_minutes <= max_arrive_by: # Also rejects NaN
+        return jsonify({'error': f"arrive_by_minutes must be between {min_arrive_by} and {max_arrive_by}."}), 400
+    mode = str(data.get('mode', 'driving')).lower()
+    if mode not in JOURNEY_ROUTER_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(JOURNEY_ROUTER_MODES)}."}), 400
+    if journey_model is None:
+        return jsonify({'error': 'The journey planner is still loading its model.'}), 503
+
+    model, features, stations, station_encoder = journey_model
+    # Driving/cycling/walking time over the street graph once it is loaded, else the count-based estimate
+    router = local_router.street_router(JOURNEY_ROUTER_MODES[mode])
+    plan = plan_journey(model, features, stations, station_encoder, origin, destination, event_time,
+                        arrive_by_minutes=arrive_by_minutes, counts_df=forecast_cube.history,
+                        forecast_cube=forecast_cube, router=router, mode=mode)
+    if 'error' in plan:
+        return jsonify(plan), 404
+    return jsonify({
+        'origin_station': str(plan['origin_station']['station_id']),
+        'dest_station': str(plan['dest_station']['station_id']),
+        'predicted_count': round(float(plan['predicted_count']), 1),
+        'estimated_travel_time_min': round(float(plan['estimated_travel_time_min']), 1),
+        'route_distance_km': round(plan['route_distance_km'], 2) if 'route_distance_km' in plan else None,
+        'recommended_departure_time': plan['recommended_departure_time'].isoformat(timespec='minutes'),
+    })
 
 @app.route('/api/plan-event-visit', methods=['POST'])
 def plan_event_visit_api():
@@ -826,30 +1210,27 @@ def event_route_api():
     if not all([origin, market_id, arrival_time_str]):
         return jsonify({"error": "Missing origin, market ID, or arrival time."}), 400
 
-    # Mock market locations
-    markets = {
-        "bellevue": {"lat": 47.3662, "lon": 8.5448},
-        "hb": {"lat": 47.3779, "lon": 8.5401},
-        "niederdorf": {"lat": 47.3730, "lon": 8.5455},
-        "wienachtsdorf": {"lat": 47.3664, "lon": 8.5485}
-    }
-    
-    destination = markets.get(market_id)
+    destination = EVENT_MARKETS.get(market_id)
     if not destination:
         return jsonify({"error": "Market not found."}), 404
 
-    # Simulate a simple straight-line path for demonstration
-    # A real implementation would use a routing service like Google Directions API
-    start_point = [47.37, 8.54] # Generic start point
-    path = [start_point, [destination['lat'], destination['lon']]]
-
-    # Simulate travel time and calculate departure
-    if mode == 'driving':
-        duration_minutes = random.randint(10, 20)
-    elif mode == 'transit':
-        duration_minutes = random.randint(15, 25)
-    else: # walking
-        duration_minutes = random.randint(25, 40)
+    # Route on the local street graph; unknown origins start from the city centre
+    start_point = list(local_router.resolve(origin) or (47.37, 8.54))
+    route = local_router.route(start_point, (destination['lat'], destination['lon']), mode)
+    if route is not None:
+        path = route['path']
+        duration_minutes = route['duration_min']
+        distance = route['distance']
+    else:
+        # Street graph not loaded (yet): straight line with a simulated travel time
+        path = [start_point, [destination['lat'], destination['lon']]]
+        if mode == 'driving':
+            duration_minutes = random.randint(10, 20)
+        elif mode == 'transit':
+            duration_minutes = random.randint(15, 25)
+        else: # walking
+            duration_minutes = random.randint(25, 40)
+        distance = f"{random.uniform(1.5, 4.0):.1f} km"
 
     try:
         arrival_time = datetime.fromisoformat(arrival_time_str)
@@ -862,22 +1243,54 @@ def event_route_api():
         "path": path,
         "summary": f"To arrive at your destination by {arrival_time.strftime('%H:%M')}, you should leave from {origin} around",
         "estimated_departure": est_departure_str,
-        "distance": f"{random.uniform(1.5, 4.0):.1f} km",
+        "distance": distance,
         "duration": f"{duration_minutes} minutes"
     })
 
 
 @app.route('/api/urban-planning/green-spaces')
+@response_cache.cached()
 def green_spaces_api():
     """Provides the list of green spaces."""
-    return jsonify(get_green_spaces())
+    return get_green_spaces()
 
 @app.route('/api/urban-planning/service-areas')
+@response_cache.cached(cacheable=lambda areas: areas.get('method') == 'network') # Not the warm-up buffers
 def service_areas_api():
-    """Provides the service areas for green spaces."""
+    """Provides the walking service areas for green spaces."""
     walking_distance = request.args.get('distance', 800, type=int)
-    service_areas = calculate_service_areas(walking_distance)
-    return jsonify(service_areas)
+    return calculate_service_areas(walking_distance)
+
+@app.route('/api/urban-planning/accessibility')
+@response_cache.cached()
+def accessibility_api():
+    """Population-weighted distance-to-park coverage for the whole city (50 m raster)."""
+    return city_accessibility().stats()
+
+@app.route('/api/urban-planning/accessibility/scenario', methods=['POST'])
+def accessibility_scenario_api():
+    """
+    What-if: coverage after adding a park at {'lat', 'lon'} with an optional 'radius_m' (default 100)
+    and 'name'. The city raster is copied and recomputed; the baseline is not changed.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        lat, lon = float(data['lat']), float(data['lon'])
+        radius_m = float(data.get('radius_m', 100))
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'lat and lon are required.'}), 400
+    min_radius, max_radius = SCENARIO_PARK_RADIUS_M
+    if not min_radius <= radius_m <= max_radius: # Also rejects NaN
+        return jsonify({'error': f"radius_m must be between {min_radius} and {max_radius}."}), 400
+    baseline = city_accessibility()
+    if not baseline.contains(lat, lon):
+        return jsonify({'error': 'lat/lon lie outside the accessibility raster.'}), 400
+    scenario = baseline.copy()
+    # Circle of radius_m around the point, in degrees (1 deg lat ~ 111.1 km; lon scaled for Zurich)
+    park = Point(lon, lat).buffer(1, resolution=16)
+    park = affinity.scale(park, radius_m / 75600, radius_m / 111100)
+    change = scenario.add_park(data.get('name', 'Proposed park'), park)
+    return jsonify({'change': change, 'before': baseline.stats(), 'after': scenario.stats()})
 
 @app.route('/api/run-simulation', methods=['POST'])
 def run_simulation_api():
@@ -932,6 +1345,12 @@ def run_simulation_api():
     })
 
 if __name__ == '__main__':
+    # Poll all live feeds (traffic, weather, air quality, stationboards) in the background
+    feeds.start()
+    # Train the journey model and keep its forecast cube refreshed in the background
+    start_journey_planner()
+    # Load the street graphs for local routing in the background
+    local_router.warm()
     print("\nStarting server.")
     print("Dashboard: http://127.0.0.1:5000/")
     print("User Rerouting Tool (NASA LST): http://127.0.0.1:5000/user-routing\n")
@@ -0,0 +1,199 @@
+import asyncio
+import contextlib
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+from app import (app as flask_app, feeds, directions_cache, local_router, start_journey_planner, ROUTING_BACKEND, build_pt_delays, format_smart_route, parse_heatmap_bin_args, snapshot_headers,
+                 winter_routing_requested, generate_congestion_heatmap_data, STOPS_TO_ANALYZE, GOOGLE_API_KEY, GOOGLE_MAPS_BASE_URL)
+from directions_cache import OfflineDirectionsClient, decode_route, normalize_query
+from transport_client import stationboard_cache, STATIONBOARD_TIMEOUT_SECONDS, FANOUT_DEADLINE_SECONDS, MAX_CONCURRENT_REQUESTS
+
+# --- Configuration ---
+DIRECTIONS_TIMEOUT_SECONDS = 10
+# Upper bound for concurrent upstream connections from one ASGI process
+MAX_UPSTREAM_CONNECTIONS = 100
+
+# --- Async (ASGI) Serving Mode ---
+# The I/O-heavy endpoints are served by native async handlers, so a request that
+# waits on an upstream API holds no worker thread; everything else is the
+# unchanged Flask app mounted through a WSGI adapter. Run with:
+#     uvicorn asgi_app:asgi_app --workers 4
+# Both modes share the same feeds, caches and response builders from app.py.
+
+_http = None # httpx.AsyncClient, created on startup so it belongs to the server's event loop
+_directions_in_flight = {} # normalized query -> asyncio.Task of the one Directions API call for it
+
+def _json(payload, status=200, headers=None):
+    return JSONResponse(payload, status_code=status, headers=headers)
+
+async def _snapshot(name):
+    # Only the very first call per feed may block (initial fetch), so keep it off the event loop
+    return await run_in_threadpool(feeds.snapshot, name)
+
+async def fetch_stationboards_async(stop_ids, deadline=FANOUT_DEADLINE_SECONDS):
+    """Async counterpart of StationboardCache.get_many (uncached): stop_id -> departures ([] on failure)."""
+    async def fetch(stop_id):
+        params = {'id': stop_id, 'limit': 20, 'transportations[]': ['tram', 'bus', 'train']}
+        try:
+            response = await _http.get(stationboard_cache.base_url, params=params, timeout=STATIONBOARD_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            return response.json().get('departures', [])
+        except (httpx.HTTPError, ValueError):
+            print(f"Failed to fetch real data for stop {stop_id}.")
+            return []
+
+    stop_ids = list(stop_ids)
+    tasks = [asyncio.ensure_future(fetch(stop_id)) for stop_id in stop_ids]
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    return {stop_id: task.result() if task in done else [] for stop_id, task in zip(stop_ids, tasks)}
+
+async def fetch_directions_async(origin, destination, mode):
+    """
+    Directions API call over the shared async client; returns the `routes` list like gmaps.directions.
+    With DIRECTIONS_OFFLINE the app's offline client answers instead, as in Flask mode.
+    """
+    if isinstance(directions_cache.client, OfflineDirectionsClient):
+        return await run_in_threadpool(directions_cache.client.directions, origin, destination, mode=mode)
+    params = {'origin': origin, 'destination': destination, 'mode': mode, 'key': GOOGLE_API_KEY}
+    response = await _http.get(f"{GOOGLE_MAPS_BASE_URL}/maps/api/directions/json", params=params,
+                               timeout=DIRECTIONS_TIMEOUT_SECONDS)
+    response.raise_for_status()
+    body = response.json()
+    if body.get('status') not in ('OK', 'ZERO_RESULTS'):
+        raise RuntimeError(f"Directions API status {body.get('status')}: {body.get('error_message', '')}")
+    return body.get('routes', [])
+
+async def _fetch_and_store_directions(origin, destination, mode):
+    route = decode_route(await fetch_directions_async(origin, destination, mode))
+    await run_in_threadpool(directions_cache.put, origin, destination, mode, route)
+    return route
+
+def _forget_directions_call(key, task):
+    _directions_in_flight.pop(key, None)
+    if not task.cancelled():
+        task.exception() # Retrieved here too, so an error nobody awaited anymore is not logged as unhandled
+
+async def get_directions(origin, destination, mode):
+    """
+    Async counterpart of directions_cache.get: the SQLite lookup and write-through run in
+    the threadpool, and concurrent identical misses await one shared Directions API call
+    (which keeps running if the request that started it goes away).
+    """
+    key = normalize_query(origin, destination, mode)
+    task = _directions_in_flight.get(key)
+    if task is None:
+        route = await run_in_threadpool(directions_cache.get_cached, origin, destination, mode)
+        if route is not None:
+            return route
+        task = _directions_in_flight.get(key) # Another request may have missed meanwhile
+        if task is None:
+            task = asyncio.ensure_future(_fetch_and_store_directions(origin, destination, mode))
+            _directions_in_flight[key] = task
+            task.add_done_callback(lambda t: _forget_directions_call(key, t))
+    return await asyncio.shield(task)
+
+
+async def analyze(request):
+    snapshot = await _snapshot('stationboards')
+    boards = snapshot.data if snapshot else await fetch_stationboards_async(STOPS_TO_ANALYZE.values())
+    pt_delays = await run_in_threadpool(build_pt_delays, boards)
+    return _json(pt_delays, headers=snapshot_headers(snapshot))
+
+async def congestion_heatmap(request):
+    try:
+        bin_options = parse_heatmap_bin_args(request.query_params)
+    except ValueError as e:
+        return _json({'error': str(e)}, status=400)
+    snapshot = await _snapshot('traffic')
+    traffic_df = snapshot.data if snapshot else None
+    heatmap_data = await run_in_threadpool(generate_congestion_heatmap_data, traffic_df, **bin_options)
+    return _json(heatmap_data, headers=snapshot_headers(snapshot))
+
+async def weather(request):
+    snapshot = await _snapshot('weather')
+    return _json(snapshot.data if snapshot else None, headers=snapshot_headers(snapshot))
+
+async def air_quality(request):
+    snapshot = await _snapshot('air_quality')
+    return _json(snapshot.data if snapshot else None, headers=snapshot_headers(snapshot))
+
+async def smart_route(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    if not isinstance(data, dict):
+        return _json({'error': 'Expected a JSON object.'}, status=400)
+    origin = data.get('origin')
+    destination = data.get('destination')
+    mode = str(data.get('mode', 'driving')).lower()
+
+    if not origin or not destination:
+        return _json({'error': 'Origin and destination are required.'}, status=400)
+
+    backend = data.get('router', ROUTING_BACKEND)
+    try:
+        # 'auto' reads the weather snapshot, whose first fetch may block
+        winter = await run_in_threadpool(winter_routing_requested, data)
+    except ValueError as e:
+        return _json({'error': str(e)}, status=400)
+    if backend == 'local':
+        route = await run_in_threadpool(local_router.route, origin, destination, mode, winter)
+        if route is None:
+            return _json({'error': 'Local routing is unavailable for these locations or this mode.'}, status=503)
+        return _json(format_smart_route(route, origin, destination, mode)[0])
+    if winter and backend == 'auto':
+        route = await run_in_threadpool(local_router.route, origin, destination, mode, True)
+        if route is not None:
+            return _json(format_smart_route(route, origin, destination, mode)[0])
+
+    try:
+        route = await get_directions(origin, destination, mode)
+    except Exception as e:
+        print(f"Error fetching Google Maps route: {e}")
+        route = await run_in_threadpool(local_router.route, origin, destination, mode) if backend == 'auto' else None
+        if route is None:
+            return _json({'error': 'An error occurred while fetching the route from Google Maps.'}, status=500)
+
+    payload, status = format_smart_route(route, origin, destination, mode)
+    return _json(payload, status=status)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    global _http
+    limits = httpx.Limits(max_connections=MAX_UPSTREAM_CONNECTIONS, max_keepalive_connections=MAX_CONCURRENT_REQUESTS)
+    _http = httpx.AsyncClient(limits=limits)
+    feeds.start()
+    start_journey_planner()
+    local_router.warm()
+    try:
+        yield
+    finally:
+        await _http.aclose()
+
+
+asgi_app = Starlette(
+    routes=[
+        Route('/api/analyze', analyze),
+        Route('/api/congestion-heatmap', congestion_heatmap),
+        Route('/api/weather', weather),
+        Route('/api/air-quality', air_quality),
+        Route('/api/smart-route', smart_route, methods=['POST']),
+        Mount('/', app=WsgiToAsgi(flask_app)),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    print("\nStarting async server.")
+    print("Dashboard: http://127.0.0.1:8000/")
+    uvicorn.run(asgi_app, host='127.0.0.1', port=8000)
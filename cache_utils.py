@@ -0,0 +1,48 @@
+import threading
+
+# --- Single-Flight Request Deduplication ---
+# When several threads miss the same cache key at once, only the first one
+# (the leader) runs the expensive call; the others wait for and share its result.
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0 # Number of callers that piggy-backed on an in-flight call
+
+    def do(self, key, fn, timeout=None):
+        """
+        Runs `fn()` once per `key` among concurrent callers and returns its result
+        to all of them. Exceptions raised by `fn` are re-raised in every caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+        elif not call.done.wait(timeout):
+            raise TimeoutError(f"Timed out waiting for in-flight call {key!r}")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
@@ -1,42 +1,148 @@
+import json
+import threading
 import pandas as pd
+import numpy as np
 import random
-from datetime import datetime
+from datetime import datetime, timedelta
 import requests
 
-# URL for real-time traffic data from Zurich's Open Data Portal
-TRAFFIC_DATA_URL = "https://www.ogd.stadt-zuerich.ch/wfs/geoportal/Verkehrszaehlung_Messwerte_Oeff?service=WFS&version=2.0.0&request=GetFeature&outputFormat=GeoJSON&typeName=adm_vzo_messwert_v"
+try:
+    import orjson # Optional, several times faster than json for large GeoJSON payloads
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
-def load_traffic_data():
+# Real-time traffic counts from Zurich's Open Data Portal, fetched in pages and filtered server-side
+TRAFFIC_WFS_URL = "https://www.ogd.stadt-zuerich.ch/wfs/geoportal/Verkehrszaehlung_Messwerte_Oeff"
+TRAFFIC_WFS_TYPE_NAME = "adm_vzo_messwert_v"
+TRAFFIC_WFS_PAGE_SIZE = 5000
+TRAFFIC_STORE_MAX_ROWS = 500_000
+TRAFFIC_STORE_MAX_AGE = timedelta(hours=24)
+
+# --- Incremental Traffic Store ---
+# Instead of downloading the whole layer on every call, the store asks the WFS
+# only for measurements newer than the last `zeitpunkt` it has seen (FES filter
+# + startIndex/count paging), parses the features straight into column lists
+# and appends them to a time-indexed frame trimmed to TRAFFIC_STORE_MAX_AGE /
+# TRAFFIC_STORE_MAX_ROWS.
+
+def _newer_than_filter(since):
+    return (
+        '<fes:Filter xmlns:fes="http://www.opengis.net/fes/2.0">'
+        '<fes:PropertyIsGreaterThan>'
+        '<fes:ValueReference>zeitpunkt</fes:ValueReference>'
+        f'<fes:Literal>{since.isoformat()}</fes:Literal>'
+        '</fes:PropertyIsGreaterThan>'
+        '</fes:Filter>'
+    )
+
+def parse_traffic_features(payload):
     """
-    Loads and processes real-time traffic data from Zurich's Open Data Portal.
+    Parses a WFS GeoJSON payload (bytes or str) into a DataFrame built from
+    per-property column lists; only Point features are kept, as before.
     """
-    try:
-        response = requests.get(TRAFFIC_DATA_URL, timeout=15)
-        response.raise_for_status()
-        data = response.json()
+    features = _json_loads(payload).get('features', [])
+    points = [f for f in features if f.get('geometry') and f['geometry']['type'] == 'Point']
+    if not points:
+        return None
 
-        features = data.get('features', [])
-        if not features:
-            print("Warning: Real-time traffic data feed is empty.")
+    keys = list(points[0]['properties'].keys())
+    columns = {key: [f['properties'].get(key) for f in points] for key in keys}
+    coords = np.array([f['geometry']['coordinates'][:2] for f in points], dtype=float)
+    df = pd.DataFrame(columns)
+    # GeoJSON is [lon, lat]
+    df['lon'] = coords[:, 0]
+    df['lat'] = coords[:, 1]
+
+    # Basic data cleaning and preparation
+    df['messwert'] = pd.to_numeric(df['messwert'], errors='coerce')
+    df['zeitpunkt'] = pd.to_datetime(df['zeitpunkt'], errors='coerce')
+    df.dropna(subset=['messwert', 'lat', 'lon', 'zeitpunkt'], inplace=True)
+    return df
+
+class TrafficStore:
+    def __init__(self, base_url=TRAFFIC_WFS_URL, page_size=TRAFFIC_WFS_PAGE_SIZE,
+                 max_rows=TRAFFIC_STORE_MAX_ROWS, max_age=TRAFFIC_STORE_MAX_AGE):
+        self.base_url = base_url
+        self.page_size = page_size
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.last_seen = None
+        self.server_filtering = True # Switched off if the server rejects filter/paging parameters
+        self._frame = None
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+
+    def _params(self, start_index):
+        params = {
+            'service': 'WFS', 'version': '2.0.0', 'request': 'GetFeature',
+            'outputFormat': 'GeoJSON', 'typeName': TRAFFIC_WFS_TYPE_NAME,
+        }
+        if self.server_filtering:
+            params.update({'count': self.page_size, 'startIndex': start_index, 'sortBy': 'zeitpunkt ASC'})
+            if self.last_seen is not None:
+                params['filter'] = _newer_than_filter(self.last_seen)
+        return params
+
+    def _fetch_new(self):
+        pages = []
+        start_index = 0
+        while True:
+            response = self._session.get(self.base_url, params=self._params(start_index), timeout=15)
+            if self.server_filtering and 400 <= response.status_code < 500:
+                print("WFS rejected paging/filter parameters; falling back to full downloads.")
+                self.server_filtering = False
+                pages, start_index = [], 0
+                continue
+            response.raise_for_status()
+            page = parse_traffic_features(response.content)
+            if page is not None:
+                pages.append(page)
+            if not self.server_filtering or page is None or len(page) < self.page_size:
+                break
+            start_index += self.page_size
+        if not pages:
             return None
+        new = pd.concat(pages, ignore_index=True)
+        if self.last_seen is not None:
+            new = new[new['zeitpunkt'] > self.last_seen] # Also guards against servers ignoring the filter
+        return new
 
-        # Extract properties and geometry
-        records = []
-        for f in features:
-            props = f['properties']
-            geom = f.get('geometry')
-            if geom and geom['type'] == 'Point':
-                # GeoJSON is [lon, lat]
-                props['lon'], props['lat'] = geom['coordinates']
-                records.append(props)
+    def update(self):
+        """Fetches measurements newer than the last seen one and appends them to the store."""
+        with self._lock:
+            new = self._fetch_new()
+            if new is not None and not new.empty:
+                new = new.set_index('zeitpunkt', drop=False).sort_index()
+                frame = new if self._frame is None else pd.concat([self._frame, new])
+                self.last_seen = frame.index.max()
+                frame = frame[frame.index > self.last_seen - self.max_age]
+                self._frame = frame.iloc[-self.max_rows:]
+            return self._frame
 
-        df = pd.DataFrame(records)
+    def history(self):
+        """All stored measurements, indexed by `zeitpunkt`."""
+        return self._frame
+
+    def latest(self):
+        """The most recent measurement of every sensor location."""
+        if self._frame is None or self._frame.empty:
+            return None
+        return self._frame.drop_duplicates(subset=['lat', 'lon'], keep='last').reset_index(drop=True)
 
-        # Basic data cleaning and preparation
-        df['messwert'] = pd.to_numeric(df['messwert'], errors='coerce')
-        df.dropna(subset=['messwert', 'lat', 'lon'], inplace=True)
-        df['zeitpunkt'] = pd.to_datetime(df['zeitpunkt'])
+traffic_store = TrafficStore()
 
+def load_traffic_data():
+    """
+    Loads and processes real-time traffic data from Zurich's Open Data Portal.
+    Only measurements newer than the previous call are downloaded; the result is
+    the latest measurement per sensor from the in-memory store.
+    """
+    try:
+        traffic_store.update()
+        df = traffic_store.latest()
+        if df is None:
+            print("Warning: Real-time traffic data feed is empty.")
         return df
 
     except requests.exceptions.RequestException as e:
@@ -47,6 +153,29 @@ def load_traffic_data():
         return None
 
 
+# These are known busy areas in Zurich we can use for simulation.
+SATELLITE_HOTSPOTS = {
+    "Hardbrücke_Satellite": (47.3828, 8.5135),
+    "Rosengartenstrasse_Satellite": (47.3900, 8.5250),
+    "Escher-Wyss-Platz_Satellite": (47.3912, 8.5145),
+    "Bellevue_Satellite": (47.3662, 8.5448),
+}
+SATELLITE_POINTS_PER_HOTSPOT = 10
+BACKGROUND_POINTS = 50
+# Vehicles/hour at which a sensor is drawn at full intensity
+HEATMAP_MAX_VOLUME = 1500
+# Default cell size (degrees) for server-side binning; ~220 m north-south in Zurich
+HEATMAP_CELL_SIZE_DEG = 0.002
+# Accepted cell sizes: ~11 m (below that binning reduces nothing) up to ~11 km
+HEATMAP_CELL_SIZE_RANGE_DEG = (0.0001, 0.1)
+
+def _simulated_satellite_points(rng):
+    """(n, 3) array of [lat, lon, intensity] jittered around every hotspot."""
+    centers = np.repeat(np.array(list(SATELLITE_HOTSPOTS.values())), SATELLITE_POINTS_PER_HOTSPOT, axis=0)
+    jitter = rng.uniform(-0.001, 0.001, size=centers.shape)
+    intensity = rng.uniform(0.8, 1.0, size=len(centers)) # High intensity
+    return np.column_stack([centers + jitter, intensity])
+
 def simulate_satellite_view():
     """
     Simulates analysis from satellite imagery (e.g., Sentinel/Copernicus).
@@ -56,62 +185,97 @@ def simulate_satellite_view():
     Here, we'll simulate this by identifying a few "hotspots" that
     the satellite "sees" as congested.
     """
-    # These are known busy areas in Zurich we can use for simulation.
-    hotspots = {
-        "Hardbrücke_Satellite": (47.3828, 8.5135),
-        "Rosengartenstrasse_Satellite": (47.3900, 8.5250),
-        "Escher-Wyss-Platz_Satellite": (47.3912, 8.5145),
-        "Bellevue_Satellite": (47.3662, 8.5448),
-    }
-
-    satellite_congestion_points = []
-    for name, (lat, lon) in hotspots.items():
-        # Simulate a high congestion score for these satellite-detected hotspots.
-        # Add some randomness to the location to make the heatmap more dynamic.
-        for _ in range(10): # Add more points around the hotspot
-            satellite_congestion_points.append({
-                'lat': lat + random.uniform(-0.001, 0.001),
-                'lon': lon + random.uniform(-0.001, 0.001),
-                'intensity': random.uniform(0.8, 1.0) # High intensity
-            })
-            
-    return satellite_congestion_points
-
-def generate_congestion_heatmap_data(traffic_df):
+    points = _simulated_satellite_points(np.random.default_rng())
+    return [{'lat': lat, 'lon': lon, 'intensity': intensity} for lat, lon, intensity in points.tolist()]
+
+def _hex_cells(lat, lon, cell_size, scale):
+    """
+    Axial (q, r) coordinates of the pointy-top hexagon containing each point, on
+    a grid with spacing `cell_size` degrees of latitude (longitude is multiplied
+    by `scale` = cos(lat) so cells are roughly regular on the ground).
+    """
+    x = lon * scale / cell_size
+    y = lat / cell_size
+    q = np.sqrt(3) / 3 * x - y / 3
+    r = 2 / 3 * y
+    # Cube rounding: round all three coordinates, then fix the one with the largest error
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+def bin_heatmap_points(points, mode='grid', cell_size=HEATMAP_CELL_SIZE_DEG):
+    """
+    Aggregates [lat, lon, intensity] points into fixed-size cells, keeping the
+    maximum intensity per cell. The output size depends only on the covered area
+    and `cell_size`, not on the number of input points.
+
+    Args:
+        points (np.ndarray): (n, 3) array of [lat, lon, intensity].
+        mode (str): 'grid' for square cells or 'hex' for hexagonal cells.
+    """
+    if len(points) == 0:
+        return points
+    lat, lon, intensity = points[:, 0], points[:, 1], points[:, 2]
+    if mode == 'hex':
+        scale = np.cos(np.radians(np.mean(lat)))
+        keys = np.column_stack(_hex_cells(lat, lon, cell_size, scale))
+    elif mode == 'grid':
+        keys = np.column_stack([np.floor(lat / cell_size), np.floor(lon / cell_size)]).astype(np.int64)
+    else:
+        raise ValueError(f"Unknown heatmap binning mode: {mode}")
+
+    cells, inverse = np.unique(keys, axis=0, return_inverse=True)
+    max_intensity = np.zeros(len(cells))
+    np.maximum.at(max_intensity, inverse.ravel(), intensity)
+
+    if mode == 'hex':
+        q, r = cells[:, 0], cells[:, 1]
+        cell_lat = 1.5 * r * cell_size
+        cell_lon = np.sqrt(3) * (q + r / 2) * cell_size / scale
+    else:
+        cell_lat = (cells[:, 0] + 0.5) * cell_size
+        cell_lon = (cells[:, 1] + 0.5) * cell_size
+    return np.column_stack([cell_lat, cell_lon, max_intensity])
+
+def generate_congestion_heatmap_data(traffic_df, bin_mode=None, cell_size=HEATMAP_CELL_SIZE_DEG):
     """
     Combines Zurich open data with simulated satellite views to create a heatmap.
     
     Args:
-        traffic_df (pd.DataFrame): DataFrame from `load_traffic_data`.
+        traffic_df (pd.DataFrame): DataFrame from `load_traffic_data` (not modified).
+        bin_mode (str, optional): 'grid' or 'hex' to aggregate points server-side
+            into cells of `cell_size` degrees, capping the payload size.
 
     Returns:
         list: A list of [lat, lon, intensity] for the heatmap.
     """
-    heatmap_data = []
+    rng = np.random.default_rng()
+    parts = []
 
     # 1. Process Real-Time Zurich Open Data
     if traffic_df is not None and not traffic_df.empty:
         # Normalize the 'messwert' (measurement value) to get an intensity score.
-        # Different sensors have different max values, so we'll cap at a reasonable number
-        # for visualization purposes, e.g., 1500 vehicles/hour.
-        max_volume = 1500 
-        traffic_df['intensity'] = traffic_df['messwert'] / max_volume
-        traffic_df['intensity'] = traffic_df['intensity'].clip(0, 1) # Ensure intensity is between 0 and 1
-
-        for _, row in traffic_df.iterrows():
-            # The new load_traffic_data function already extracts lat and lon
-            heatmap_data.append([row['lat'], row['lon'], row['intensity']])
+        # Different sensors have different max values, so we cap at HEATMAP_MAX_VOLUME
+        # vehicles/hour for visualization purposes.
+        intensity = np.clip(traffic_df['messwert'].to_numpy(dtype=float) / HEATMAP_MAX_VOLUME, 0, 1)
+        parts.append(np.column_stack([traffic_df['lat'].to_numpy(dtype=float), traffic_df['lon'].to_numpy(dtype=float), intensity]))
 
     # 2. Add Simulated Satellite Data (as before)
-    satellite_points = simulate_satellite_view()
-    for point in satellite_points:
-        heatmap_data.append([point['lat'], point['lon'], point['intensity']])
-        
+    parts.append(_simulated_satellite_points(rng))
+
     # 3. Add some general "background" congestion (as before)
-    for _ in range(50):
-        lat = random.uniform(47.36, 47.39)
-        lon = random.uniform(8.52, 8.56)
-        intensity = random.uniform(0.1, 0.3)
-        heatmap_data.append([lat, lon, intensity])
+    parts.append(np.column_stack([
+        rng.uniform(47.36, 47.39, BACKGROUND_POINTS),
+        rng.uniform(8.52, 8.56, BACKGROUND_POINTS),
+        rng.uniform(0.1, 0.3, BACKGROUND_POINTS),
+    ]))
 
-    return heatmap_data
+    heatmap_data = np.vstack(parts)
+    if bin_mode:
+        heatmap_data = bin_heatmap_points(heatmap_data, bin_mode, cell_size)
+    return heatmap_data.tolist()
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import polyline
+
+from cache_utils import SingleFlight
+
+# --- Configuration ---
+DIRECTIONS_CACHE_DB = os.environ.get("DIRECTIONS_CACHE_DB", "directions_cache.sqlite3")
+DIRECTIONS_CACHE_TTL_SECONDS = 24 * 3600
+DIRECTIONS_CACHE_MAX_ENTRIES = 1024 # In-memory LRU size; SQLite keeps everything within the TTL
+
+# --- Directions Result Cache ---
+# Decoded smart-route results (path, steps, distance, duration) keyed by the
+# normalized (origin, destination, mode). Lookups go memory LRU -> SQLite ->
+# Directions API, concurrent identical misses share one API call, and every
+# fetched route is written through to SQLite so it survives restarts.
+
+def normalize_query(origin, destination, mode):
+    """Cache key: case- and whitespace-insensitive place strings plus the travel mode."""
+    def norm(place):
+        if isinstance(place, (list, tuple)): # (lat, lng) pairs, rounded to ~10 m
+            return ",".join(f"{float(c):.4f}" for c in place)
+        return " ".join(str(place).lower().replace(",", " , ").split())
+    return f"{norm(origin)}|{norm(destination)}|{str(mode).lower()}"
+
+def decode_route(directions_result):
+    """
+    The first route of a Directions API result as {'path', 'directions', 'distance', 'duration'},
+    or None if there is no route. Raises KeyError/IndexError on malformed results.
+    """
+    if not directions_result:
+        return None
+    leg = directions_result[0]['legs'][0]
+    return {
+        'path': polyline.decode(directions_result[0]['overview_polyline']['points']),
+        'directions': [{"html_instructions": step['html_instructions'], "distance": step['distance']}
+                       for step in leg['steps']],
+        'distance': leg['distance']['text'],
+        'duration': leg['duration']['text'],
+    }
+
+
+class DirectionsCache:
+    def __init__(self, client, db_path=DIRECTIONS_CACHE_DB, ttl=DIRECTIONS_CACHE_TTL_SECONDS,
+                 max_entries=DIRECTIONS_CACHE_MAX_ENTRIES):
+        self.client = client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # key -> (route, stored_at), most recently used last
+        self._single_flight = SingleFlight()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS directions "
+                         "(key TEXT PRIMARY KEY, route TEXT NOT NULL, stored_at REAL NOT NULL)")
+        self._db.execute("DELETE FROM directions WHERE stored_at < ?", (time.time() - ttl,))
+        self._db.commit()
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+
+    def _remember(self, key, route, stored_at):
+        self._entries[key] = (route, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_cached(self, origin, destination, mode):
+        """The cached route for a query, or None if it is not cached (or expired)."""
+        key = normalize_query(origin, destination, mode)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            row = self._db.execute("SELECT route, stored_at FROM directions WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] < self.ttl:
+                route = json.loads(row[0])
+                self._remember(key, route, row[1])
+                self.db_hits += 1
+                return route
+            self.misses += 1
+        return None
+
+    def put(self, origin, destination, mode, route):
+        """Stores a decoded route in memory and SQLite. Queries without a route are not stored."""
+        if route is None:
+            return
+        key = normalize_query(origin, destination, mode)
+        stored_at = time.time()
+        with self._lock:
+            self._remember(key, route, stored_at)
+            self._db.execute("INSERT OR REPLACE INTO directions (key, route, stored_at) VALUES (?, ?, ?)",
+                             (key, json.dumps(route), stored_at))
+            self._db.commit()
+
+    def _fetch(self, origin, destination, mode):
+        with self._lock:
+            self.upstream_calls += 1
+        route = decode_route(self.client.directions(origin, destination, mode=mode))
+        self.put(origin, destination, mode, route)
+        return route
+
+    def get(self, origin, destination, mode):
+        """
+        Decoded route for a query, or None if the Directions API found no route.
+        API errors propagate to the caller and are not cached.
+        """
+        route = self.get_cached(origin, destination, mode)
+        if route is not None:
+            return route
+        key = normalize_query(origin, destination, mode)
+        return self._single_flight.do(key, lambda: self._fetch(origin, destination, mode))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.db_hits + self.misses
+            stored = self._db.execute("SELECT COUNT(*) FROM directions").fetchone()[0]
+            return {
+                'hits': self.hits,
+                'sqlite_hits': self.db_hits,
+                'misses': self.misses,
+                'hit_ratio': round((self.hits + self.db_hits) / lookups, 3) if lookups else None,
+                'coalesced_misses': self._single_flight.coalesced,
+                'upstream_calls': self.upstream_calls,
+                'cached_in_memory': len(self._entries),
+                'cached_in_sqlite': stored,
+            }
+
+
+# --- Offline Directions Client ---
+# Drop-in stand-in for googlemaps.Client.directions that needs no key or network
+# (set DIRECTIONS_OFFLINE=1 for app.py). It returns a deterministic two-point
+# route in the Directions API result shape and counts its calls.
+
+class OfflineDirectionsClient:
+    CENTER = (47.3769, 8.5417)
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def _place(self, place):
+        if isinstance(place, (list, tuple)):
+            return float(place[0]), float(place[1])
+        digest = hashlib.sha1(normalize_query(place, '', '').encode()).digest()
+        return (self.CENTER[0] + (digest[0] - 128) / 128 * 0.03,
+                self.CENTER[1] + (digest[1] - 128) / 128 * 0.05)
+
+    def directions(self, origin, destination, mode='driving', **kwargs):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        start, end = self._place(origin), self._place(destination)
+        km = max(0.1, (((start[0] - end[0]) * 111.2) ** 2 + ((start[1] - end[1]) * 75.3) ** 2) ** 0.5)
+        minutes = max(1, round(km / {'walking': 5, 'bicycling': 15, 'transit': 20}.get(mode, 30) * 60))
+        step = {'html_instructions': f"Head towards <b>{destination}</b>", 'distance': {'text': f"{km:.1f} km"}}
+        return [{
+            'overview_polyline': {'points': polyline.encode([start, end])},
+            'legs': [{'distance': {'text': f"{km:.1f} km"}, 'duration': {'text': f"{minutes} mins"}, 'steps': [step]}],
+        }]
+
+
+if __name__ == '__main__':
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    db_path = os.path.join(tempfile.mkdtemp(), "directions.sqlite3")
+    client = OfflineDirectionsClient(delay=0.3)
+    cache = DirectionsCache(client, db_path=db_path)
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        list(pool.map(lambda _: cache.get("Zürich HB", "Bellevue, Zürich", "walking"), range(10)))
+    cache.get(" zürich hb", "bellevue,  zürich", "WALKING")
+    print(f"11 identical requests -> {client.calls} upstream call(s); {cache.stats()}")
+
+    restarted = DirectionsCache(client, db_path=db_path)
+    restarted.get("Zürich HB", "Bellevue, Zürich", "walking")
+    print(f"After restart -> {client.calls} upstream call(s); {restarted.stats()}")
@@ -1,4 +1,17 @@
+import os
+import json
 import random
+import numpy as np
+import shapely
+from shapely.geometry import shape, Polygon, LineString, Point, box
+
+# --- Configuration ---
+# Optional GeoJSON FeatureCollection of hazards (properties: id, name, hazard_type
+# 'landslide'/'winter', risk_level, analysis, solutions); replaces the built-in lists.
+HAZARDS_GEOJSON = os.environ.get("HAZARDS_GEOJSON")
+HAZARD_ROUTE_BUFFER_M = 30 # A hazard this close to a route affects it
+HAZARD_QUERY_DISTANCE_RANGE_M = (0, 1000) # Accepted route buffer_m / point radius in queries
+METERS_PER_DEGREE = 75600 # Metres per degree of longitude at Zurich (the shorter axis, so buffers never fall short)
 
 # --- Simulated Data for Environmental Hazards ---
 # This data is for demonstration purposes to simulate risk zones in Zurich.
@@ -78,16 +91,88 @@ WINTER_HAZARD_ROADS = [
     }
 ]
 
+# --- Hazard Spatial Index ---
+# All hazard polygons (landslide zones) and polylines (winter roads) are parsed
+# once into shapely geometries and stored in one STRtree, so point, viewport and
+# route lookups only touch the hazards near the query instead of shipping every
+# record to the client. Records keep their original shape ('polygon'/'path' as
+# [lat, lon] lists) so existing clients can draw them unchanged.
+
+def _record_geometry(record):
+    if 'polygon' in record:
+        return Polygon([(lon, lat) for lat, lon in record['polygon']])
+    return LineString([(lon, lat) for lat, lon in record['path']])
+
+def read_hazard_geojson(path):
+    """{hazard_type: [record, ...]} from a GeoJSON FeatureCollection, in the built-in record format."""
+    with open(path) as f:
+        features = json.load(f)['features']
+    records = {}
+    for feature in features:
+        properties = dict(feature.get('properties') or {})
+        hazard_type = properties.pop('hazard_type')
+        geometry = shape(feature['geometry'])
+        if geometry.geom_type == 'Polygon':
+            properties['polygon'] = [[lat, lon] for lon, lat in geometry.exterior.coords[:-1]]
+        else:
+            properties['path'] = [[lat, lon] for lon, lat in geometry.coords]
+        records.setdefault(hazard_type, []).append(properties)
+    return records
+
+
+class HazardIndex:
+    def __init__(self, records_by_type):
+        """`records_by_type`: hazard_type -> list of records with a 'polygon' or 'path' in [lat, lon]."""
+        self.records = [record for records in records_by_type.values() for record in records]
+        self.types = np.array([t for t, records in records_by_type.items() for _ in records], dtype=object)
+        self.geometries = np.array([_record_geometry(record) for record in self.records], dtype=object)
+        shapely.prepare(self.geometries)
+        self._tree = shapely.STRtree(self.geometries)
+
+    @classmethod
+    def from_file(cls, path=HAZARDS_GEOJSON):
+        return cls(read_hazard_geojson(path))
+
+    def __len__(self):
+        return len(self.records)
+
+    def _select(self, positions, hazard_type):
+        positions = np.sort(positions) # Keep the records' original order
+        if hazard_type not in (None, 'all'):
+            positions = positions[self.types[positions] == hazard_type]
+        return [self.records[i] for i in positions]
+
+    def of_type(self, hazard_type):
+        return self._select(np.arange(len(self.records)), hazard_type)
+
+    def at_point(self, lat, lon, hazard_type=None, radius_m=0):
+        """Hazards containing (or within `radius_m` of) a point."""
+        point = Point(lon, lat)
+        if radius_m:
+            positions = self._tree.query(point, predicate='dwithin', distance=radius_m / METERS_PER_DEGREE)
+        else:
+            positions = self._tree.query(point, predicate='intersects')
+        return self._select(positions, hazard_type)
+
+    def in_bbox(self, south, west, north, east, hazard_type=None):
+        """Hazards intersecting a viewport."""
+        return self._select(self._tree.query(box(west, south, east, north), predicate='intersects'), hazard_type)
+
+    def along_route(self, route_latlon, hazard_type=None, buffer_m=HAZARD_ROUTE_BUFFER_M):
+        """Hazards within `buffer_m` of a route given as [[lat, lon], ...]."""
+        line = LineString([(lon, lat) for lat, lon in route_latlon])
+        return self._select(self._tree.query(line, predicate='dwithin', distance=buffer_m / METERS_PER_DEGREE),
+                            hazard_type)
+
+
+hazard_index = HazardIndex.from_file() if HAZARDS_GEOJSON else \
+    HazardIndex({'landslide': LANDSLIDE_RISK_ZONES, 'winter': WINTER_HAZARD_ROADS})
+
 def get_hazard_data(hazard_type):
     """
-    Returns the simulated data for a given hazard type.
+    Returns the simulated data for a given hazard type ('all' for every type).
     """
-    if hazard_type == 'landslide':
-        return LANDSLIDE_RISK_ZONES
-    elif hazard_type == 'winter':
-        return WINTER_HAZARD_ROADS
-    else:
-        return []
+    return hazard_index.of_type(hazard_type) if hazard_type in set(hazard_index.types) | {'all'} else []
 
 if __name__ == '__main__':
     # Example of how to access the data
@@ -104,3 +189,24 @@ if __name__ == '__main__':
         print(f"Road: {road['name']} (Risk: {road['risk_level']})")
         for solution in road['solutions']:
             print(f"  - {solution['title']}: {solution['desc']}")
+
+    # --- Benchmark: lookups against a synthetic layer of 5,000 hazards ---
+    import time
+    rng = np.random.default_rng(0)
+    synthetic = {'landslide': [], 'winter': []}
+    for i, (lat, lon) in enumerate(zip(rng.uniform(47.32, 47.44, 5000), rng.uniform(8.45, 8.62, 5000))):
+        if i % 2:
+            synthetic['landslide'].append({'id': f"zone_{i}", 'polygon': [[lat, lon], [lat + 0.002, lon], [lat + 0.002, lon + 0.003], [lat, lon + 0.003]]})
+        else:
+            synthetic['winter'].append({'id': f"road_{i}", 'path': [[lat, lon], [lat + 0.001, lon + 0.002]]})
+    start = time.perf_counter()
+    index = HazardIndex(synthetic)
+    print(f"\nIndexed {len(index)} hazards in {(time.perf_counter() - start) * 1000:.1f} ms")
+    route = [[47.3779, 8.5401], [47.3739, 8.5445], [47.3662, 8.5448]]
+    for label, query in [("route", lambda: index.along_route(route)),
+                         ("viewport", lambda: index.in_bbox(47.36, 8.52, 47.39, 8.56)),
+                         ("point", lambda: index.at_point(47.3769, 8.5417, radius_m=200))]:
+        start = time.perf_counter()
+        for _ in range(1000):
+            hits = query()
+        print(f"{label:>8}: {len(hits)} hazards, {(time.perf_counter() - start):.3f} ms per query")
@@ -0,0 +1,165 @@
+import os
+import json
+import glob
+import time
+import hashlib
+import threading
+import geopandas as gpd
+
+from urban_planning import (ZURICH_POPULATION_DENSITY_GEOJSON, GREEN_SPACES_GEOJSON, SIMULATED_PARKS_COUNT,
+                            SIMULATED_PARKS_SEED, load_green_spaces, equity_frame, equity_payload)
+
+# --- Configuration ---
+EQUITY_CACHE_DIR = os.environ.get("EQUITY_CACHE_DIR", "equity_cache")
+EQUITY_RETRY_SECONDS = 30 # A failed analysis is retried after this long, or as soon as an input file changes
+
+# --- Versioned Equity Results ---
+# The green-space equity analysis depends only on the zone layer and the park
+# layer, so it is computed once per (zone file hash, park layer hash). Each
+# result is written to disk as GeoParquet (the per-zone table) plus the
+# serialized API body, and served from memory until an input file's content
+# hash changes. Files are re-hashed only when their mtime or size changes.
+# Failed analyses (e.g. an unreadable zone file) are never cached as a version.
+
+class FileFingerprint:
+    def __init__(self, path):
+        self.path = path
+        self._stat = None
+        self._digest = None
+
+    def digest(self):
+        """SHA-256 of the file's content; None if the file cannot be read."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._stat = self._digest = None
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key != self._stat:
+            sha = hashlib.sha256()
+            with open(self.path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(chunk)
+            self._stat, self._digest = key, sha.hexdigest()
+        return self._digest
+
+
+class EquityResultStore:
+    def __init__(self, zones_path=ZURICH_POPULATION_DENSITY_GEOJSON, parks_path=GREEN_SPACES_GEOJSON,
+                 cache_dir=EQUITY_CACHE_DIR):
+        self.zones_path = zones_path
+        self.parks_path = parks_path
+        self.cache_dir = cache_dir
+        self._zones = FileFingerprint(zones_path)
+        self._parks = FileFingerprint(parks_path) if parks_path else None
+        self._lock = threading.Lock()
+        self._version = None
+        self._body = None
+        self._failure = None # (version, error body, monotonic time) of the last failed analysis
+        self.computations = 0
+        self.failures = 0
+        self.disk_loads = 0
+        self.served = 0
+
+    def version(self):
+        """'<zone hash>-<park hash>' (12 hex chars each) for the current input files."""
+        zones = self._zones.digest() or 'missing'
+        if self._parks is None:
+            parks = hashlib.sha256(f"simulated:{SIMULATED_PARKS_COUNT}:{SIMULATED_PARKS_SEED}".encode()).hexdigest()
+        else:
+            parks = self._parks.digest() or 'missing'
+        return f"{zones[:12]}-{parks[:12]}"
+
+    def _paths(self, version):
+        base = os.path.join(self.cache_dir, f"equity-{version}")
+        return base + ".json", base + ".parquet"
+
+    def _compute(self, version):
+        """Runs the analysis; returns the JSON body and whether it succeeded."""
+        try:
+            gdf_population = gpd.read_file(self.zones_path)
+        except Exception as e:
+            print(f"Error loading GeoJSON: {e}")
+            return json.dumps({"error": "Failed to load population data.", "zones": []}).encode(), False
+        gdf_parks = load_green_spaces(self.parks_path)
+        frame = equity_frame(gdf_population, gdf_parks)
+        self.computations += 1
+        self._frame_to_disk(frame, version)
+        return json.dumps(equity_payload(frame, gdf_parks)).encode(), True
+
+    def _frame_to_disk(self, frame, version):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            frame.to_parquet(self._paths(version)[1])
+        except ImportError as e: # GeoParquet needs pyarrow
+            print(f"Equity results: GeoParquet not written ({e})")
+
+    def _persist(self, version, body):
+        json_path, parquet_path = self._paths(version)
+        tmp_path = json_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, json_path)
+        # Results of older input versions are no longer served
+        for path in glob.glob(os.path.join(self.cache_dir, "equity-*")):
+            if path not in (json_path, parquet_path):
+                os.remove(path)
+
+    def get(self):
+        """
+        (JSON body bytes, version) for the current inputs, computing them only if an input changed.
+        If the analysis fails, its error body is returned with version None and is not cached;
+        the next request after EQUITY_RETRY_SECONDS tries again.
+        """
+        version = self.version()
+        with self._lock:
+            if version != self._version:
+                failure = self._failure
+                if failure is not None and failure[0] == version and time.monotonic() - failure[2] < EQUITY_RETRY_SECONDS:
+                    return failure[1], None
+                json_path, _ = self._paths(version)
+                if os.path.exists(json_path):
+                    with open(json_path, 'rb') as f:
+                        body = f.read()
+                    self.disk_loads += 1
+                else:
+                    body, ok = self._compute(version)
+                    if not ok:
+                        self._failure = (version, body, time.monotonic())
+                        self.failures += 1
+                        return body, None
+                    self._persist(version, body)
+                self._version, self._body, self._failure = version, body, None
+            self.served += 1
+            return self._body, self._version
+
+    def frame(self):
+        """
+        The per-zone results of the current version as a GeoDataFrame, read back from
+        GeoParquet; None if the analysis failed or no GeoParquet was written for it.
+        """
+        _, version = self.get()
+        if version is None:
+            return None
+        parquet_path = self._paths(version)[1]
+        if not os.path.exists(parquet_path):
+            return None
+        try:
+            return gpd.read_parquet(parquet_path)
+        except ImportError as e: # GeoParquet needs pyarrow
+            print(f"Equity results: GeoParquet not read ({e})")
+            return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'version': self._version,
+                'computations': self.computations,
+                'failures': self.failures,
+                'disk_loads': self.disk_loads,
+                'served': self.served,
+                'body_bytes': len(self._body) if self._body is not None else 0,
+            }
+
+
+equity_results = EquityResultStore()
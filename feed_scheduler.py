@@ -0,0 +1,156 @@
+import random
+import threading
+from datetime import datetime
+
+from cache_utils import SingleFlight
+
+# --- Background Refresh Scheduler for Live Data Feeds ---
+# Every external feed (traffic WFS, weather, air quality, stationboards) is
+# polled on its own interval by a daemon thread. The latest good result is kept
+# in memory with its timestamp, so request handlers return instantly from the
+# last snapshot instead of calling the upstream API themselves. Failures keep
+# the previous snapshot and retry with jittered exponential backoff.
+
+class Snapshot:
+    def __init__(self, data, fetched_at, interval, last_error=None):
+        self.data = data
+        self.fetched_at = fetched_at
+        self.interval = interval
+        self.last_error = last_error
+
+    @property
+    def age_seconds(self):
+        return (datetime.now() - self.fetched_at).total_seconds()
+
+    @property
+    def is_stale(self):
+        """Older than two polling intervals, i.e. at least one refresh was missed."""
+        return self.age_seconds > 2 * self.interval
+
+    def metadata(self):
+        return {
+            'fetched_at': self.fetched_at.isoformat(timespec='seconds'),
+            'age_seconds': round(self.age_seconds, 1),
+            'stale': self.is_stale,
+            'last_error': self.last_error,
+        }
+
+
+class _Feed:
+    def __init__(self, name, fetch, interval, max_backoff, jitter):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.snapshot = None
+        self.failures = 0
+        self.last_error = None
+        self.attempted = False
+        self.subscribers = []
+
+
+class FeedScheduler:
+    def __init__(self):
+        self._feeds = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._single_flight = SingleFlight()
+
+    def register(self, name, fetch, interval, max_backoff=None, jitter=0.1):
+        """
+        Adds a feed. `fetch()` returns the parsed data; returning None or raising
+        counts as a failure (the existing loaders return None on errors).
+        """
+        self._feeds[name] = _Feed(name, fetch, interval, max_backoff or interval * 8, jitter)
+
+    def subscribe(self, name, callback):
+        """Calls `callback(snapshot)` after every successful refresh of a feed, on the polling thread."""
+        self._feeds[name].subscribers.append(callback)
+
+    def poll(self, name):
+        """Fetches one feed now (shared with concurrent callers) and stores the result if it succeeded."""
+        return self._single_flight.do(name, lambda: self._poll(name))
+
+    def _poll(self, name):
+        feed = self._feeds[name]
+        try:
+            data = feed.fetch()
+            error = None if data is not None else "Feed returned no data"
+        except Exception as e:
+            data, error = None, str(e)
+
+        with self._lock:
+            feed.attempted = True
+            if error is None:
+                feed.failures = 0
+                feed.last_error = None
+                feed.snapshot = Snapshot(data, datetime.now(), feed.interval)
+            else:
+                feed.failures += 1
+                feed.last_error = error
+                if feed.snapshot is not None:
+                    feed.snapshot.last_error = error
+                print(f"Feed '{name}' refresh failed ({feed.failures}x): {error}")
+            snapshot = feed.snapshot
+        if error is None:
+            for callback in feed.subscribers:
+                try:
+                    callback(snapshot)
+                except Exception as e:
+                    print(f"Feed '{name}' subscriber failed: {e}")
+        return error is None
+
+    def _next_delay(self, feed):
+        if feed.failures:
+            delay = min(feed.max_backoff, feed.interval * 2 ** (feed.failures - 1))
+        else:
+            delay = feed.interval
+        # Jitter keeps feeds (and several app processes) from polling in lockstep
+        return delay * random.uniform(1 - feed.jitter, 1 + feed.jitter)
+
+    def _run(self, feed):
+        while not self._stop.is_set():
+            self.poll(feed.name)
+            self._stop.wait(self._next_delay(feed))
+
+    def start(self):
+        """Starts one polling thread per feed; calling it again is a no-op."""
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            for feed in self._feeds.values():
+                thread = threading.Thread(target=self._run, args=(feed,), name=f"feed-{feed.name}", daemon=True)
+                self._threads.append(thread)
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self, name):
+        """
+        The last good snapshot of a feed, or None if it has never succeeded. If the
+        feed was never polled (e.g. the scheduler was not started in this process),
+        the scheduler is started and the first fetch is awaited.
+        """
+        feed = self._feeds[name]
+        if feed.snapshot is None and not feed.attempted:
+            self.start()
+            self.poll(name)
+        return feed.snapshot
+
+    def status(self):
+        """Metadata for all feeds, for monitoring."""
+        with self._lock:
+            return {
+                name: {
+                    **(feed.snapshot.metadata() if feed.snapshot else {'fetched_at': None}),
+                    'interval_seconds': feed.interval,
+                    'consecutive_failures': feed.failures,
+                    'last_error': feed.last_error,
+                }
+                for name, feed in self._feeds.items()
+            }
@@ -0,0 +1,150 @@
+import os
+import json
+import threading
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+
+from journey_planner import forecast_at
+
+# --- Configuration ---
+# Directory holding the memory-mapped cube files and the pointer to the current version.
+FORECAST_CUBE_DIR = "forecast_cube"
+FORECAST_HORIZON_HOURS = 48
+REFRESH_INTERVAL_SECONDS = 3600
+
+# --- Station Forecast Cube ---
+# A stations x next-48-hours array of predicted counts. It is written to a fresh
+# versioned .npy file on every refresh, and the small `current.json` pointer is
+# swapped with os.replace(), so readers (in this or another process) only ever
+# see a complete cube. The values come from journey_planner.forecast_at, the same
+# routine live inference uses on a cube miss, so an hour gets the same count
+# whether or not it falls inside the cube window.
+
+class ForecastCube:
+    def __init__(self, cube_dir=FORECAST_CUBE_DIR, horizon=FORECAST_HORIZON_HOURS):
+        self.cube_dir = cube_dir
+        self.horizon = horizon
+        self._lock = threading.Lock()
+        self._values = None
+        self._station_index = {}
+        self._start_ts = None
+        self.history = None # Counts the current cube was seeded from, for live inference on a miss
+        self._thread = None
+        self._stop = threading.Event()
+        self.load()
+
+    def refresh(self, model, features, counts_df, station_encoder, start_ts=None):
+        """
+        Recomputes the cube for all stations and atomically publishes it.
+        `start_ts` defaults to the current hour.
+        """
+        if start_ts is None:
+            start_ts = pd.Timestamp.now().floor('h')
+        hours = pd.date_range(start=pd.Timestamp(start_ts).floor('h'), periods=self.horizon, freq='h')
+        forecast = forecast_at(model, features, counts_df, station_encoder, counts_df['station_id'].unique(), hours)
+
+        os.makedirs(self.cube_dir, exist_ok=True)
+        version = pd.Timestamp.now().strftime("%Y%m%d%H%M%S%f")
+        cube_path = os.path.join(self.cube_dir, f"cube_{version}.npy")
+        values = np.lib.format.open_memmap(cube_path, mode='w+', dtype=np.float32, shape=forecast.shape)
+        values[:] = forecast.to_numpy(dtype=np.float32)
+        values.flush()
+        del values
+
+        meta = {
+            'version': version,
+            'cube_file': os.path.basename(cube_path),
+            'start_ts': hours[0].isoformat(),
+            'station_ids': [str(s) for s in forecast.index],
+        }
+        tmp_pointer = os.path.join(self.cube_dir, "current.json.tmp")
+        with open(tmp_pointer, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_pointer, os.path.join(self.cube_dir, "current.json"))
+
+        self.load()
+        self._remove_stale_files(meta['cube_file'])
+        print(f"Forecast cube refreshed: {forecast.shape[0]} stations x {forecast.shape[1]} hours from {meta['start_ts']}.")
+
+    def load(self):
+        """Maps the currently published cube (if any) read-only into memory."""
+        pointer = os.path.join(self.cube_dir, "current.json")
+        try:
+            with open(pointer) as f:
+                meta = json.load(f)
+            values = np.load(os.path.join(self.cube_dir, meta['cube_file']), mmap_mode='r')
+        except (OSError, ValueError, KeyError):
+            return False
+
+        station_index = {station_id: i for i, station_id in enumerate(meta['station_ids'])}
+        with self._lock:
+            self._values = values
+            self._station_index = station_index
+            self._start_ts = pd.Timestamp(meta['start_ts'])
+        return True
+
+    def lookup(self, station_id, ts):
+        """
+        Returns the predicted count for a station at `ts`, or None when the
+        station or hour is not covered by the current cube.
+        """
+        with self._lock:
+            values, station_index, start_ts = self._values, self._station_index, self._start_ts
+        if values is None:
+            return None
+        row = station_index.get(str(station_id))
+        if row is None:
+            return None
+        step = int((pd.Timestamp(ts).floor('h') - start_ts) / timedelta(hours=1))
+        if not 0 <= step < values.shape[1]:
+            return None
+        return float(values[row, step])
+
+    def lookup_many(self, station_ids, ts):
+        """Vectorized `lookup` for one hour: an array of counts with NaN for misses."""
+        result = np.full(len(station_ids), np.nan)
+        with self._lock:
+            values, station_index, start_ts = self._values, self._station_index, self._start_ts
+        if values is None:
+            return result
+        step = int((pd.Timestamp(ts).floor('h') - start_ts) / timedelta(hours=1))
+        if not 0 <= step < values.shape[1]:
+            return result
+        rows = np.array([station_index.get(str(s), -1) for s in station_ids], dtype=np.int64)
+        hit = rows >= 0
+        result[hit] = values[rows[hit], step]
+        return result
+
+    def start_background_refresh(self, model, features, load_history, station_encoder, interval=REFRESH_INTERVAL_SECONDS):
+        """
+        Refreshes the cube now and then every `interval` seconds on a daemon thread.
+        `load_history()` is called before every refresh so the lag state is seeded
+        from the latest observed counts.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.history = load_history()
+                    self.refresh(model, features, self.history, station_encoder)
+                except Exception as e:
+                    print(f"Error refreshing forecast cube: {e}")
+                self._stop.wait(interval)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="forecast-cube-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _remove_stale_files(self, current_file):
+        for name in os.listdir(self.cube_dir):
+            if name.startswith("cube_") and name.endswith(".npy") and name != current_file:
+                try:
+                    os.remove(os.path.join(self.cube_dir, name))
+                except OSError:
+                    pass # Still mapped by a reader on some platforms; removed on a later refresh
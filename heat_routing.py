@@ -0,0 +1,112 @@
+import threading
+import numpy as np
+import shapely
+
+# --- Configuration ---
+# Edges inside a heat zone cost this many times their length: routes avoid them
+# when a reasonable detour exists, but can still cross a zone if they must.
+HEAT_PENALTY_FACTOR = 5.0
+
+# --- Heat-Zone Penalty Mask ---
+# For heat-aware walking routes every street edge that intersects a heat-risk
+# polygon is penalised. The edge geometries are indexed once per graph in an
+# STRtree; each zone's edge set is computed when the zone first appears, and a
+# per-edge counter is adjusted for added/removed/changed zones only, so a new
+# heat snapshot costs work proportional to the zones that actually changed.
+
+def edge_geometries(router):
+    """Shapely (lon, lat) LineStrings of every edge of `router` plus their STRtree (cached per graph)."""
+    if 'edge_geometries' not in router.cache:
+        coords = np.stack([np.column_stack([router.lon[router.edge_u], router.lat[router.edge_u]]),
+                           np.column_stack([router.lon[router.edge_v], router.lat[router.edge_v]])], axis=1)
+        lines = shapely.linestrings(coords)
+        router.cache['edge_geometries'] = (lines, shapely.STRtree(lines))
+    return router.cache['edge_geometries']
+
+
+class HeatPenaltyMask:
+    def __init__(self, router, penalty_factor=HEAT_PENALTY_FACTOR):
+        self.router = router
+        self.penalty_factor = penalty_factor
+        self._lock = threading.Lock()
+        self._zones = {} # zone_id -> (geometry WKB, edge indices inside it)
+        self._counts = np.zeros(router.n_edges, dtype=np.int32) # Number of zones covering each edge
+        self._weights = None
+        self.version = 0
+        self.snapshot_version = None # Version tag of the heat snapshot last applied
+
+    def _zone_edges(self, geometry):
+        _, tree = edge_geometries(self.router)
+        return tree.query(geometry, predicate='intersects')
+
+    def update(self, zones, snapshot_version=None):
+        """
+        Brings the mask in line with `zones` (zone_id -> shapely lon/lat geometry, e.g.
+        HeatZoneIndex.zones()). Only zones that were added, removed or whose geometry changed are recomputed;
+        with a `snapshot_version`, re-applying the same snapshot is skipped entirely.
+        Returns True if anything changed.
+        """
+        with self._lock:
+            if snapshot_version is not None and snapshot_version == self.snapshot_version:
+                return False
+            self.snapshot_version = snapshot_version
+            wkb = {zone_id: shapely.to_wkb(geometry) for zone_id, geometry in zones.items()}
+            removed = [z for z, (old_wkb, _) in self._zones.items() if wkb.get(z) != old_wkb]
+            added = [z for z in zones if z not in self._zones or z in removed]
+            if not removed and not added:
+                return False
+            for zone_id in removed:
+                np.subtract.at(self._counts, self._zones.pop(zone_id)[1], 1)
+            for zone_id in added:
+                edges = self._zone_edges(zones[zone_id])
+                np.add.at(self._counts, edges, 1)
+                self._zones[zone_id] = (wkb[zone_id], edges)
+            self._weights = None
+            self.version += 1
+        return True
+
+    @property
+    def penalized(self):
+        """Boolean mask of edges inside at least one heat zone."""
+        return self._counts > 0
+
+    def weights(self):
+        """Per-edge routing weights: length, multiplied by the penalty factor inside heat zones."""
+        with self._lock:
+            if self._weights is None:
+                self._weights = np.where(self._counts > 0, self.router.edge_length * self.penalty_factor,
+                                         self.router.edge_length)
+            return self._weights
+
+    def route(self, source, destination):
+        """
+        Shortest and heat-avoiding walking paths between two (lat, lon) points.
+
+        Returns:
+            dict: 'direct' and 'avoiding' paths ([[lat, lon], ...]), their lengths in km,
+            metres of each path inside heat zones, and whether the avoiding path is cooler.
+            None if either point cannot be connected.
+        """
+        router = self.router
+        orig, dest = router.nearest_nodes([source[0], destination[0]], [source[1], destination[1]])
+        direct, _ = router.shortest_path(orig, dest, router.edge_length)
+        avoiding, _ = router.shortest_path(orig, dest, self.weights())
+        if direct is None or avoiding is None:
+            return None
+        penalized = self.penalized
+
+        def summary(path):
+            edges = router.path_edges(path, router.edge_length)
+            return router.edge_length[edges].sum() / 1000, router.edge_length[edges][penalized[edges]].sum()
+
+        direct_km, direct_hot_m = summary(direct)
+        avoiding_km, avoiding_hot_m = summary(avoiding)
+        return {
+            'direct': router.path_latlon(direct),
+            'avoiding': router.path_latlon(avoiding),
+            'direct_km': round(float(direct_km), 3),
+            'avoiding_km': round(float(avoiding_km), 3),
+            'direct_heat_m': round(float(direct_hot_m), 1),
+            'avoiding_heat_m': round(float(avoiding_hot_m), 1),
+            'is_rerouted': avoiding_hot_m < direct_hot_m,
+        }
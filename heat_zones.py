@@ -0,0 +1,105 @@
+import os
+import json
+import numpy as np
+import shapely
+from shapely.geometry import shape, Polygon, LineString, box
+
+# --- Configuration ---
+# GeoJSON FeatureCollection of heat-risk polygons (or the single-polygon
+# {"polygon": [[lat, lon], ...]} format of the bundled NASA LST file).
+HEAT_ZONES_PATH = os.environ.get("HEAT_ZONES_PATH", os.path.join("templates", "nasa_heat_risk_zone.json"))
+
+# --- Heat-Zone Spatial Index ---
+# All heat-risk polygons are parsed once, prepared (shapely.prepare caches the
+# edge index each predicate needs) and stored in an STRtree. A route check is a
+# single tree query with predicate='intersects', so its cost grows with the
+# number of zones near the route rather than with the size of the city layer.
+
+def read_heat_zones(path=HEAT_ZONES_PATH):
+    """zone_id -> shapely geometry (lon/lat) from a GeoJSON FeatureCollection or the legacy polygon file."""
+    with open(path) as f:
+        data = json.load(f)
+    if 'polygon' in data:
+        return {'nasa_lst': Polygon([(lon, lat) for lat, lon in data['polygon']])}
+    features = data['features'] if data.get('type') == 'FeatureCollection' else [data]
+    zones = {}
+    for i, feature in enumerate(features):
+        zone_id = feature.get('id', (feature.get('properties') or {}).get('id', f"zone_{i}"))
+        zones[str(zone_id)] = shape(feature['geometry'])
+    return zones
+
+
+class HeatZoneIndex:
+    def __init__(self, zones):
+        """`zones`: zone_id -> shapely (lon, lat) Polygon/MultiPolygon."""
+        self.ids = np.array(list(zones), dtype=object)
+        self._positions = {zone_id: i for i, zone_id in enumerate(zones)}
+        self.geometries = np.array(list(zones.values()), dtype=object)
+        shapely.prepare(self.geometries)
+        self._tree = shapely.STRtree(self.geometries)
+
+    @classmethod
+    def from_file(cls, path=HEAT_ZONES_PATH):
+        return cls(read_heat_zones(path))
+
+    @classmethod
+    def from_latlon(cls, zones):
+        """Index from zone_id -> [[lat, lon], ...] rings (the format of load_nasa_heat_zone)."""
+        return cls({zone_id: Polygon([(lon, lat) for lat, lon in coords]) for zone_id, coords in zones.items()})
+
+    def __len__(self):
+        return len(self.ids)
+
+    def zones(self):
+        """zone_id -> geometry, e.g. for HeatPenaltyMask.update."""
+        return dict(zip(self.ids, self.geometries))
+
+    def crossing(self, route_latlon):
+        """Ids of the zones a route ([[lat, lon], ...], at least two points) passes through."""
+        line = LineString([(lon, lat) for lat, lon in route_latlon])
+        return list(self.ids[self._tree.query(line, predicate='intersects')])
+
+    def crosses(self, route_latlon):
+        return len(self.crossing(route_latlon)) > 0
+
+    def crossing_many(self, routes_latlon):
+        """Bulk `crossing` for many routes: a list of zone-id lists, one per route."""
+        lines = np.array([LineString([(lon, lat) for lat, lon in route]) for route in routes_latlon], dtype=object)
+        route_idx, zone_idx = self._tree.query(lines, predicate='intersects')
+        result = [[] for _ in routes_latlon]
+        for r, z in zip(route_idx, zone_idx):
+            result[r].append(self.ids[z])
+        return result
+
+    def near(self, route_latlon, margin_deg=0.005):
+        """Ids of zones within the route's bounding box grown by `margin_deg`."""
+        lats, lons = zip(*route_latlon)
+        area = box(min(lons) - margin_deg, min(lats) - margin_deg, max(lons) + margin_deg, max(lats) + margin_deg)
+        return list(self.ids[self._tree.query(area, predicate='intersects')])
+
+    def ring_latlon(self, zone_id):
+        """Outer ring of a zone as [[lat, lon], ...] for Leaflet (largest part of a MultiPolygon)."""
+        geometry = self.geometries[self._positions[zone_id]]
+        if geometry.geom_type == 'MultiPolygon':
+            geometry = max(geometry.geoms, key=lambda g: g.area)
+        return [[lat, lon] for lon, lat in geometry.exterior.coords]
+
+
+if __name__ == '__main__':
+    import time
+
+    # Synthetic city layer: 5,000 small heat polygons scattered over Zurich
+    rng = np.random.default_rng(0)
+    centres = np.column_stack([rng.uniform(47.32, 47.44, 5000), rng.uniform(8.45, 8.62, 5000)])
+    zones = {f"zone_{i}": Polygon([(lon - 0.001, lat - 0.0007), (lon + 0.001, lat - 0.0007),
+                                    (lon + 0.001, lat + 0.0007), (lon - 0.001, lat + 0.0007)])
+             for i, (lat, lon) in enumerate(centres)}
+    start = time.perf_counter()
+    index = HeatZoneIndex(zones)
+    print(f"Indexed {len(index)} zones in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    route = [[47.3779, 8.5401], [47.3739, 8.5445], [47.3662, 8.5448]]
+    start = time.perf_counter()
+    for _ in range(1000):
+        hits = index.crossing(route)
+    print(f"Route check: {len(hits)} zones crossed, {(time.perf_counter() - start):.3f} ms per check")
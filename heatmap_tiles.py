@@ -0,0 +1,137 @@
+import math
+import struct
+import zlib
+import hashlib
+import threading
+import numpy as np
+from scipy.ndimage import gaussian_filter
+
+# --- Configuration ---
+TILE_SIZE = 256
+# Same look as the dashboard's former leaflet.heat layer
+HEAT_RADIUS_PX = 25
+HEAT_GRADIENT = [(0.0, (0, 0, 255)), (0.1, (0, 0, 255)), (0.4, (0, 255, 0)), (0.8, (255, 255, 0)), (1.0, (255, 0, 0))]
+# Zoom levels rendered ahead of time for every new data snapshot
+PRERENDER_ZOOMS = (12, 13, 14)
+ZURICH_BBOX = (47.32, 8.44, 47.44, 8.63) # min_lat, min_lon, max_lat, max_lon
+MAX_CACHED_TILES = 4096
+
+# --- Congestion Heatmap Tiles ---
+# The heatmap points from `generate_congestion_heatmap_data` are rasterised
+# server-side into Web Mercator z/x/y PNG tiles. Points are built once per data
+# snapshot version; tiles are cached per version and keyed by a content-hash
+# ETag, so the dashboard's cost no longer grows with the number of sensors.
+
+def lat_lon_to_pixels(lat, lon, zoom):
+    """Global Web Mercator pixel coordinates at `zoom`."""
+    world = TILE_SIZE * 2 ** zoom
+    lat_rad = np.radians(np.clip(lat, -85.0511, 85.0511))
+    px = (np.asarray(lon) + 180.0) / 360.0 * world
+    py = (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / math.pi) / 2.0 * world
+    return px, py
+
+def tiles_covering(bbox, zoom):
+    """(x, y) tile indices covering a (min_lat, min_lon, max_lat, max_lon) box."""
+    min_lat, min_lon, max_lat, max_lon = bbox
+    px, py = lat_lon_to_pixels(np.array([max_lat, min_lat]), np.array([min_lon, max_lon]), zoom)
+    x0, x1 = int(px[0] // TILE_SIZE), int(px[1] // TILE_SIZE)
+    y0, y1 = int(py[0] // TILE_SIZE), int(py[1] // TILE_SIZE)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+def encode_png(rgba):
+    """Minimal RGBA PNG encoder (no Pillow dependency)."""
+    height, width, _ = rgba.shape
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8) # Filter byte 0 per row
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)) + chunk(b"IEND", b""))
+
+def _colorize(value):
+    stops = np.array([s for s, _ in HEAT_GRADIENT])
+    colors = np.array([c for _, c in HEAT_GRADIENT], dtype=float)
+    rgba = np.zeros(value.shape + (4,), dtype=np.uint8)
+    for channel in range(3):
+        rgba[..., channel] = np.interp(value, stops, colors[:, channel]).astype(np.uint8)
+    rgba[..., 3] = (np.clip(value * 1.5, 0, 0.8) * 255).astype(np.uint8)
+    return rgba
+
+def render_tile(points, zoom, x, y, radius=HEAT_RADIUS_PX):
+    """
+    Rasterises (n, 3) [lat, lon, intensity] points into one 256x256 RGBA tile.
+    Each point is splatted as a Gaussian, so a lone point of intensity 1 peaks at 1.
+    """
+    pad = 2 * radius
+    size = TILE_SIZE + 2 * pad
+    grid = np.zeros((size, size))
+    if len(points):
+        px, py = lat_lon_to_pixels(points[:, 0], points[:, 1], zoom)
+        col = np.floor(px - x * TILE_SIZE + pad).astype(np.int64)
+        row = np.floor(py - y * TILE_SIZE + pad).astype(np.int64)
+        inside = (col >= 0) & (col < size) & (row >= 0) & (row < size)
+        np.add.at(grid, (row[inside], col[inside]), points[inside, 2])
+    sigma = radius / 2
+    heat = gaussian_filter(grid, sigma=sigma, mode='constant') * (2 * math.pi * sigma ** 2)
+    return _colorize(np.clip(heat[pad:-pad, pad:-pad], 0, 1))
+
+
+class HeatmapTileCache:
+    def __init__(self, max_tiles=MAX_CACHED_TILES):
+        self.max_tiles = max_tiles
+        self._lock = threading.Lock()
+        self._version = None
+        self._points = None
+        self._tiles = {} # (z, x, y) -> (png bytes, etag)
+
+    def _points_for(self, version, build_points):
+        with self._lock:
+            if version == self._version and self._points is not None:
+                return self._points, False
+        points = np.asarray(build_points(), dtype=float).reshape(-1, 3)
+        with self._lock:
+            is_new = version != self._version
+            if is_new or self._points is None:
+                self._version = version
+                self._points = points
+                self._tiles = {}
+            return self._points, is_new
+
+    def tile(self, version, build_points, z, x, y):
+        """
+        PNG bytes and ETag of tile z/x/y for the data snapshot `version`.
+        `build_points()` returns the heatmap points and is called once per version;
+        a new version also pre-renders PRERENDER_ZOOMS over Zurich in the background.
+        """
+        points, is_new = self._points_for(version, build_points)
+        if is_new:
+            threading.Thread(target=self.prerender, args=(version, points), daemon=True).start()
+        with self._lock:
+            cached = self._tiles.get((z, x, y)) if version == self._version else None
+        if cached is not None:
+            return cached
+        return self._render_and_store(version, points, z, x, y)
+
+    def _render_and_store(self, version, points, z, x, y):
+        png = encode_png(render_tile(points, z, x, y))
+        entry = (png, '"' + hashlib.sha1(png).hexdigest()[:20] + '"')
+        with self._lock:
+            if version == self._version and len(self._tiles) < self.max_tiles:
+                self._tiles[(z, x, y)] = entry
+        return entry
+
+    def prerender(self, version, points, zooms=PRERENDER_ZOOMS, bbox=ZURICH_BBOX):
+        for zoom in zooms:
+            for x, y in tiles_covering(bbox, zoom):
+                with self._lock:
+                    if version != self._version:
+                        return # Superseded by a newer snapshot
+                    done = (zoom, x, y) in self._tiles
+                if not done:
+                    self._render_and_store(version, points, zoom, x, y)
+
+
+congestion_tiles = HeatmapTileCache()
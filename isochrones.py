@@ -0,0 +1,93 @@
+import threading
+import numpy as np
+import shapely
+from shapely.geometry import mapping
+from pyproj import Transformer
+
+# --- Configuration ---
+SERVICE_AREA_BUCKET_M = 50 # Walking distances are rounded up to this step (the planner's slider step)
+CONCAVE_HULL_RATIO = 0.15 # 0 = tightest hull around the reached points, 1 = convex hull
+STREET_REACH_M = 25 # Buildings along a reached street count as served
+
+# --- Walking Isochrones ---
+# Service areas follow the walk graph instead of a circle: one multi-source
+# bounded Dijkstra from all green spaces labels every reachable node with its
+# nearest green space, edges are cut where the walking budget runs out, and
+# each green space's reached points are wrapped in a concave hull. Results are
+# cached on the graph per distance bucket.
+
+def distance_bucket(walking_distance_m):
+    """`walking_distance_m` rounded up to the next SERVICE_AREA_BUCKET_M step."""
+    return int(np.ceil(max(walking_distance_m, 1) / SERVICE_AREA_BUCKET_M) * SERVICE_AREA_BUCKET_M)
+
+def reached_points(router, sources, max_m):
+    """
+    Projected points reachable within `max_m` from the nearest source node, and that source:
+    every reached node plus, on each edge leaving one, the point where the budget runs out.
+    """
+    dist, nearest = router.distances_from(sources, router.edge_length, limit=max_m)
+    edges = np.flatnonzero(np.isfinite(dist[router.edge_u]))
+    u, v = router.edge_u[edges], router.edge_v[edges]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        reach = np.clip((max_m - dist[u]) / router.edge_length[edges], 0.0, 1.0)
+    reach[~np.isfinite(reach)] = 1.0 # Zero-length edges
+    x = router.x[u] + reach * (router.x[v] - router.x[u])
+    y = router.y[u] + reach * (router.y[v] - router.y[u])
+    return np.column_stack([x, y]), nearest[u]
+
+def _to_latlon(router):
+    if 'to_wgs84' not in router.cache:
+        router.cache['to_wgs84'] = Transformer.from_crs(router.crs, "epsg:4326", always_xy=True)
+    transformer = router.cache['to_wgs84']
+    return lambda coords: np.column_stack(transformer.transform(coords[:, 0], coords[:, 1]))
+
+
+class IsochroneCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.computations = 0
+
+    def service_areas(self, router, places, walking_distance_m):
+        """
+        GeoJSON FeatureCollection with one walking isochrone per place ({'name', 'lat', 'lon'} dicts).
+        Each area holds the streets for which that place is the nearest one within the distance.
+        """
+        bucket = distance_bucket(walking_distance_m)
+        key = ('service_areas', bucket, tuple((p['name'], p['lat'], p['lon']) for p in places))
+        with self._lock:
+            cached = router.cache.get(key)
+        if cached is not None:
+            return cached
+
+        nodes = router.nearest_nodes([p['lat'] for p in places], [p['lon'] for p in places])
+        sources = np.unique(nodes)
+        points, nearest = reached_points(router, sources, bucket)
+        to_latlon = _to_latlon(router)
+
+        features = []
+        for place, node in zip(places, nodes):
+            own = points[nearest == node]
+            hull = shapely.concave_hull(shapely.multipoints(own), ratio=CONCAVE_HULL_RATIO) if len(own) else \
+                shapely.points(router.x[node], router.y[node])
+            area = hull.buffer(STREET_REACH_M).simplify(5)
+            features.append({
+                "type": "Feature",
+                "geometry": mapping(shapely.transform(area, to_latlon)),
+                "properties": {
+                    "name": place["name"],
+                    "walking_distance_m": bucket,
+                    "area_sqm": round(area.area)
+                }
+            })
+        result = {
+            "type": "FeatureCollection",
+            "method": "network",
+            "features": features
+        }
+        with self._lock:
+            router.cache[key] = result
+            self.computations += 1
+        return result
+
+
+isochrones = IsochroneCache()
@@ -1,15 +1,19 @@
 import os
 import io
+import time
 import pandas as pd
 import numpy as np
 from datetime import timedelta
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, TimeSeriesSplit
 from sklearn.metrics import mean_absolute_error
+from sklearn.neighbors import BallTree
+import weakref
 import xgboost as xgb
 from math import radians, cos, sin, asin, sqrt
 from pandas.errors import ParserError
 import chardet
 import glob # Added glob for easily handling lists of files
+from concurrent.futures import ThreadPoolExecutor
 
 # -------------------------
 # USER: input LOCAL file paths
@@ -135,8 +139,34 @@ def load_stations(file_path):
     # Normalize and return
     stations = df.rename(columns={station_col: 'station_id', lon_col:'lon', lat_col:'lat'})
     stations = stations.dropna(subset=['lat', 'lon'])
+
+    # Swiss grid coordinates are converted to WGS84 once here so every distance below is in degrees
+    if stations['lon'].median() > 1000:
+        print("Station coordinates look like Swiss grid (LV95/LV03); converting to WGS84.")
+        stations['lat'], stations['lon'] = swiss_grid_to_wgs84(stations['lon'].to_numpy(), stations['lat'].to_numpy())
+
     print(f"✅ Final station metadata has {len(stations)} valid stations.")
-    return stations[['station_id', 'lon', 'lat']].drop_duplicates(subset=['station_id'])
+    stations = stations[['station_id', 'lon', 'lat']].drop_duplicates(subset=['station_id']).reset_index(drop=True)
+    get_station_index(stations) # Build the nearest-station tree once, at load time
+    return stations
+
+def swiss_grid_to_wgs84(east, north):
+    """
+    Converts Swiss grid coordinates (LV95, or LV03 if the values are 6-digit)
+    to WGS84 using swisstopo's approximate formulas (~1 m accuracy).
+    Works on scalars or NumPy arrays; returns (lat, lon).
+    """
+    east = np.asarray(east, dtype=float)
+    north = np.asarray(north, dtype=float)
+    # LV95 adds 2'000'000 / 1'000'000 to the LV03 easting / northing
+    east = np.where(east > 2_000_000, east - 2_000_000, east)
+    north = np.where(north > 1_000_000, north - 1_000_000, north)
+
+    y = (east - 600_000) / 1_000_000
+    x = (north - 200_000) / 1_000_000
+    lon = 2.6779094 + 4.728982*y + 0.791484*y*x + 0.1306*y*x**2 - 0.0436*y**3
+    lat = 16.9023892 + 3.238272*x - 0.270978*y**2 - 0.002528*x**2 - 0.0447*y**2*x - 0.0140*x**3
+    return lat * 100 / 36, lon * 100 / 36
 
 
 def load_counts(file_paths):
@@ -216,7 +246,7 @@ def make_features(df):
     df = df.dropna(subset=['count_lag1'])
     return df
 
-def train_xgb(df, use_station_feature=True):
+def _prepare_training_frame(df, use_station_feature=True):
     df = df.copy()
     if use_station_feature:
         df['station_id_enc'] = df['station_id'].astype('category').cat.codes
@@ -226,6 +256,10 @@ def train_xgb(df, use_station_feature=True):
     features = ['hour_sin','hour_cos','dow_sin','dow_cos','count_lag1','count_rolling_3','count_rolling_24']
     if use_station_feature:
         features.append('station_id_enc')
+    return df, features, station_encoder
+
+def train_xgb(df, use_station_feature=True):
+    df, features, station_encoder = _prepare_training_frame(df, use_station_feature)
     X = df[features]
     y = df['count'].values
     if len(X) < 100:
@@ -240,7 +274,119 @@ def train_xgb(df, use_station_feature=True):
     print("XGBoost MAE on test:", mae)
     return model, features, station_encoder
 
-def predict_counts(model, features, station_id, future_ts_list, station_encoder):
+# ----------------------------------------------------------------------
+# HISTOGRAM TRAINING AND HYPERPARAMETER SEARCH
+# ----------------------------------------------------------------------
+# For multi-year count histories: 'hist' trees on a QuantileDMatrix (features
+# are binned once instead of materialised as a full float matrix), explicit
+# thread counts, and a time-series cross-validated search whose folds run in
+# parallel. XGBoost releases the GIL while training, so threads are enough.
+
+XGB_BASE_PARAMS = {"objective":"reg:squarederror", "eval_metric":"mae", "tree_method":"hist", "subsample":0.8, "seed":42}
+
+XGB_PARAM_GRID = [
+    {"eta":0.1, "max_depth":6},
+    {"eta":0.1, "max_depth":8, "min_child_weight":5},
+    {"eta":0.05, "max_depth":6, "max_bin":128},
+    {"eta":0.2, "max_depth":4},
+]
+
+# Share of each (time-ordered) training set held back for early stopping, so the
+# eval fold that is scored and ranked never influences training.
+EARLY_STOPPING_FRACTION = 0.1
+
+def _fit_hist(X_train, y_train, X_eval, y_eval, params, nthread, num_boost_round, early_stopping_rounds=20):
+    """
+    Trains one hist model, early-stopping on the last EARLY_STOPPING_FRACTION of the
+    training rows, and returns (model, MAE on the untouched eval rows, wall-time seconds).
+    """
+    start = time.perf_counter()
+    max_bin = params.get('max_bin', 256)
+    split = int(len(X_train) * (1 - EARLY_STOPPING_FRACTION))
+    dtrain = xgb.QuantileDMatrix(X_train[:split], label=y_train[:split], max_bin=max_bin, nthread=nthread)
+    dstop = xgb.QuantileDMatrix(X_train[split:], label=y_train[split:], ref=dtrain, max_bin=max_bin, nthread=nthread)
+    model = xgb.train({**XGB_BASE_PARAMS, **params, "nthread": nthread}, dtrain, num_boost_round=num_boost_round,
+                      evals=[(dstop, 'early_stopping')], early_stopping_rounds=early_stopping_rounds, verbose_eval=False)
+    elapsed = time.perf_counter() - start
+    preds = model.inplace_predict(X_eval, iteration_range=(0, model.best_iteration + 1))
+    return model, mean_absolute_error(y_eval, preds), elapsed
+
+def train_xgb_hist(df, use_station_feature=True, params=None, nthread=None, num_boost_round=500):
+    """
+    Same contract as `train_xgb`, but trains with tree_method='hist' on a
+    QuantileDMatrix using `nthread` threads (default: all cores). `params`
+    overrides the defaults, e.g. the best row from `search_xgb_params`.
+    """
+    df, features, station_encoder = _prepare_training_frame(df, use_station_feature)
+    if len(df) < 100:
+        return None, features, station_encoder
+    df = df.sort_values('ts')
+    X = df[features].to_numpy(dtype=np.float32)
+    y = df['count'].to_numpy(dtype=np.float32)
+    split = int(len(df) * 0.85)
+    nthread = nthread or os.cpu_count()
+    params = params or XGB_PARAM_GRID[0]
+    model, mae, elapsed = _fit_hist(X[:split], y[:split], X[split:], y[split:], params, nthread, num_boost_round)
+    print(f"XGBoost (hist, {nthread} threads) MAE on test: {mae:.3f}, trained in {elapsed:.1f}s")
+    return model, features, station_encoder
+
+def search_xgb_params(df, param_grid=None, n_splits=4, use_station_feature=True, n_jobs=None, nthread=None, num_boost_round=500):
+    """
+    Time-series cross-validated search over `param_grid`. Every (config, fold)
+    pair is trained in parallel on `n_jobs` workers, each with its share of the
+    `nthread` cores.
+
+    Returns:
+        pd.DataFrame: one row per configuration with mean/std MAE, total and
+        per-fold training wall-time, sorted best first.
+    """
+    df, features, _ = _prepare_training_frame(df, use_station_feature)
+    df = df.sort_values('ts')
+    X = df[features].to_numpy(dtype=np.float32)
+    y = df['count'].to_numpy(dtype=np.float32)
+    param_grid = param_grid or XGB_PARAM_GRID
+    folds = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+
+    nthread = nthread or os.cpu_count()
+    n_jobs = n_jobs or min(len(param_grid) * len(folds), nthread)
+    threads_per_job = max(1, nthread // n_jobs)
+
+    def run(task):
+        config_id, fold_id = task
+        train_idx, eval_idx = folds[fold_id]
+        _, mae, elapsed = _fit_hist(X[train_idx], y[train_idx], X[eval_idx], y[eval_idx],
+                                    param_grid[config_id], threads_per_job, num_boost_round)
+        return config_id, mae, elapsed
+
+    tasks = [(c, f) for c in range(len(param_grid)) for f in range(len(folds))]
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        fold_results = list(pool.map(run, tasks))
+
+    results = []
+    for config_id, params in enumerate(param_grid):
+        maes = [mae for c, mae, _ in fold_results if c == config_id]
+        times = [t for c, _, t in fold_results if c == config_id]
+        results.append({
+            'params': params,
+            'mae_mean': float(np.mean(maes)),
+            'mae_std': float(np.std(maes)),
+            'train_seconds_total': float(np.sum(times)),
+            'train_seconds_per_fold': float(np.mean(times)),
+        })
+    results = pd.DataFrame(results).sort_values('mae_mean').reset_index(drop=True)
+    print("Hyperparameter search results:")
+    print(results.to_string())
+    return results
+
+def predict_counts(model, features, station_id, future_ts_list, station_encoder, history=None):
+    """
+    Predicts hourly counts for one station. When `history` (the normalized counts
+    from `load_counts`) is given, lag/rolling features are seeded from the
+    station's observed hours and rolled forward recursively; otherwise they fall
+    back to 0 as before.
+    """
+    if history is not None:
+        return forecast_at(model, features, history, station_encoder, [station_id], future_ts_list).loc[station_id].to_numpy()
     rows = []
     last_count_lag1 = 0 
     last_count_rolling_3 = 0
@@ -256,6 +402,142 @@ def predict_counts(model, features, station_id, future_ts_list, station_encoder)
     dmat = xgb.DMatrix(Xf)
     return model.predict(dmat)
 
+# ----------------------------------------------------------------------
+# RECURSIVE MULTI-STEP FORECASTING
+# ----------------------------------------------------------------------
+# The model is trained on lag/rolling features, so future hours have to be
+# predicted one step at a time, feeding each prediction back in as the next
+# hour's lag. The last LAG_WINDOW hours of every station live in a single
+# (n_stations, LAG_WINDOW) ring buffer, so each horizon step is one batched
+# model call for all stations instead of a Python loop per station. The count
+# history can be months old, so the recursion is capped: hours further than
+# MAX_RECURSION_HOURS past its start come from the station's seasonal
+# (weekday x hour) profile instead.
+
+LAG_WINDOW = 24
+MAX_RECURSION_HOURS = 3 * LAG_WINDOW
+HOURS_PER_WEEK = 7 * 24
+
+_SEASONAL_PROFILES = {}
+
+def seed_lag_state(counts_df, station_ids, start_ts, window=LAG_WINDOW):
+    """
+    Builds the ring buffer holding the `window` observed hours before `start_ts`
+    for each station (oldest -> newest, NaN where an hour is missing) and the
+    last observed count per station, which seeds `count_lag1`.
+    """
+    hours = pd.date_range(end=start_ts - timedelta(hours=1), periods=window, freq='h')
+    past = counts_df[counts_df['ts'] < start_ts]
+    recent = past[past['ts'] >= hours[0]]
+    grid = recent.pivot_table(index='station_id', columns='ts', values='count', aggfunc='sum')
+    buffer = grid.reindex(index=station_ids, columns=hours).to_numpy(dtype=float)
+    last_count = past.sort_values('ts').groupby('station_id')['count'].last()
+    last_count = last_count.reindex(station_ids).fillna(0).to_numpy(dtype=float)
+    return buffer, last_count
+
+def _ring_mean(buffer, pos, n, fallback):
+    """Mean of the newest `n` ring buffer slots before `pos`, ignoring NaN gaps."""
+    idx = (pos - 1 - np.arange(n)) % buffer.shape[1]
+    vals = buffer[:, idx]
+    observed = ~np.isnan(vals)
+    total = np.where(observed, vals, 0.0).sum(axis=1)
+    n_obs = observed.sum(axis=1)
+    return np.where(n_obs > 0, total / np.maximum(n_obs, 1), fallback)
+
+def forecast_counts(model, features, counts_df, station_encoder, start_ts=None, horizon=24, station_ids=None):
+    """
+    Recursively forecasts `horizon` hours for all stations at once.
+
+    Lag state is seeded from the hours observed before `start_ts` (default: the
+    hour after the latest observation) and every prediction is written back into
+    the ring buffer so the next step sees it as `count_lag1` / rolling history.
+
+    Returns:
+        pd.DataFrame: predicted counts, one row per station, one column per hour.
+    """
+    if station_ids is None:
+        station_ids = counts_df['station_id'].unique()
+    station_ids = list(station_ids)
+    if start_ts is None:
+        start_ts = counts_df['ts'].max().floor('h') + timedelta(hours=1)
+    start_ts = pd.Timestamp(start_ts).floor('h')
+
+    buffer, last_count = seed_lag_state(counts_df, station_ids, start_ts)
+    pos = 0 # Next slot to overwrite, i.e. the oldest hour in the window
+    n_stations = len(station_ids)
+    if 'station_id_enc' in features:
+        station_enc = np.array([station_encoder.get(s, 0) for s in station_ids], dtype=float)
+
+    timestamps = pd.date_range(start=start_ts, periods=horizon, freq='h')
+    preds = np.empty((n_stations, horizon))
+    for step, ts in enumerate(timestamps):
+        hour = ts.hour
+        dow = ts.weekday()
+        columns = {
+            'hour_sin': np.full(n_stations, np.sin(2*np.pi*hour/24)),
+            'hour_cos': np.full(n_stations, np.cos(2*np.pi*hour/24)),
+            'dow_sin': np.full(n_stations, np.sin(2*np.pi*dow/7)),
+            'dow_cos': np.full(n_stations, np.cos(2*np.pi*dow/7)),
+            'count_lag1': last_count,
+            'count_rolling_3': _ring_mean(buffer, pos, 3, last_count),
+            'count_rolling_24': _ring_mean(buffer, pos, LAG_WINDOW, last_count),
+        }
+        if 'station_id_enc' in features:
+            columns['station_id_enc'] = station_enc
+        X = np.column_stack([columns[f] for f in features])
+        step_preds = model.predict(xgb.DMatrix(X, feature_names=features))
+
+        preds[:, step] = step_preds
+        buffer[:, pos] = step_preds
+        last_count = step_preds.astype(float)
+        pos = (pos + 1) % LAG_WINDOW
+
+    return pd.DataFrame(preds, index=station_ids, columns=timestamps)
+
+def seasonal_profile(history):
+    """
+    Mean count per station and hour of the week (weekday * 24 + hour), one row per
+    station; hours never observed at a station get its overall mean. Built once per
+    `history` DataFrame.
+    """
+    cached = _SEASONAL_PROFILES.get(id(history))
+    if cached is not None and cached[0]() is history:
+        return cached[1]
+    hour_of_week = (history['ts'].dt.weekday * 24 + history['ts'].dt.hour).rename('hour_of_week')
+    profile = history.groupby(['station_id', hour_of_week])['count'].mean().unstack()
+    profile = profile.reindex(columns=range(HOURS_PER_WEEK))
+    profile = profile.T.fillna(history.groupby('station_id')['count'].mean()).T
+    key = id(history)
+    _SEASONAL_PROFILES[key] = (weakref.ref(history, lambda _: _SEASONAL_PROFILES.pop(key, None)), profile)
+    return profile
+
+def forecast_at(model, features, history, station_encoder, station_ids, future_ts_list):
+    """
+    Forecast for `station_ids` at the (hour-floored) `future_ts_list`. The recursion
+    starts right after the last observation in `history` (or at the earliest
+    requested hour, if that is earlier) so the gap up to the requested hours is
+    forecast too, but runs for at most MAX_RECURSION_HOURS; later hours are read
+    from `seasonal_profile` (0 for stations without history).
+    """
+    hours = pd.DatetimeIndex(future_ts_list).floor('h')
+    station_ids = list(station_ids)
+    start_ts = hours.min()
+    if not history.empty:
+        start_ts = min(start_ts, history['ts'].max().floor('h') + timedelta(hours=1))
+    steps = np.asarray((hours - start_ts) // timedelta(hours=1), dtype=np.int64)
+    recursive = steps < MAX_RECURSION_HOURS
+
+    values = np.empty((len(station_ids), len(hours)))
+    if recursive.any():
+        forecast = forecast_counts(model, features, history, station_encoder, start_ts=start_ts,
+                                   horizon=int(steps[recursive].max()) + 1, station_ids=station_ids)
+        values[:, recursive] = forecast.to_numpy()[:, steps[recursive]]
+    if not recursive.all():
+        profile = seasonal_profile(history).reindex(index=station_ids).to_numpy(dtype=float)
+        hour_of_week = np.asarray(hours.weekday * 24 + hours.hour)[~recursive]
+        values[:, ~recursive] = np.nan_to_num(profile[:, hour_of_week])
+    return pd.DataFrame(values, index=station_ids, columns=hours)
+
 def haversine(lat1, lon1, lat2, lon2):
     lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
     dlon = lon2 - lon1
@@ -264,13 +546,50 @@ def haversine(lat1, lon1, lat2, lon2):
     c = 2 * asin(sqrt(a))
     return 6371 * c
 
-def find_nearest_station(stations_df, lat, lon, k=1):
-    stations_df = stations_df.copy()
+# ----------------------------------------------------------------------
+# NEAREST-STATION INDEX
+# ----------------------------------------------------------------------
+# A haversine BallTree over the station coordinates, built once per stations
+# DataFrame and looked up by object identity, so each query is a tree lookup
+# instead of a full distance computation and sort over every station.
+
+EARTH_RADIUS_KM = 6371
+
+_STATION_INDEXES = {}
+
+def get_station_index(stations_df):
+    """Returns the BallTree for `stations_df`, building it on first use."""
     if 'lat' not in stations_df.columns or 'lon' not in stations_df.columns:
         raise ValueError("Station DataFrame is missing 'lat' or 'lon' columns. Data parsing failed.")
-    stations_df['dist_km'] = stations_df.apply(lambda r: haversine(lat, lon, r['lat'], r['lon']), axis=1)
-    stations_df = stations_df.sort_values('dist_km')
-    return stations_df.head(k)
+    cached = _STATION_INDEXES.get(id(stations_df))
+    if cached is not None and cached[0]() is stations_df:
+        return cached[1]
+
+    coords = np.radians(stations_df[['lat', 'lon']].to_numpy(dtype=float))
+    tree = BallTree(coords, metric='haversine')
+    key = id(stations_df)
+    _STATION_INDEXES[key] = (weakref.ref(stations_df, lambda _: _STATION_INDEXES.pop(key, None)), tree)
+    return tree
+
+def find_nearest_stations(stations_df, lats, lons, k=1):
+    """
+    Batched k-nearest lookup.
+
+    Returns:
+        tuple: (dist_km, positions), both shaped (n_queries, k); positions are
+        row positions into `stations_df`, nearest first.
+    """
+    tree = get_station_index(stations_df)
+    k = min(k, len(stations_df))
+    query = np.radians(np.column_stack([np.atleast_1d(lats), np.atleast_1d(lons)]).astype(float))
+    dist, positions = tree.query(query, k=k)
+    return dist * EARTH_RADIUS_KM, positions
+
+def find_nearest_station(stations_df, lat, lon, k=1):
+    dist_km, positions = find_nearest_stations(stations_df, lat, lon, k=k)
+    nearest = stations_df.iloc[positions[0]].copy()
+    nearest['dist_km'] = dist_km[0]
+    return nearest
 
 def counts_to_travel_time_base(count, base_travel_time_min=15.0):
     saturation = 2000.0
@@ -278,21 +597,96 @@ def counts_to_travel_time_base(count, base_travel_time_min=15.0):
     factor = 1.0 + alpha * (count / saturation)
     return base_travel_time_min * factor
 
-def plan_journey(model, features, stations_df, station_encoder, origin, destination, event_time, arrive_by_minutes=10):
+# ----------------------------------------------------------------------
+# ROUTE-AWARE TRAVEL TIME
+# ----------------------------------------------------------------------
+# Travel time is the shortest time over the street graph (see street_router),
+# with every edge slowed by a BPR volume-delay factor taken from the forecast
+# count at its nearest counting station. The edge -> station mapping is built
+# once per (graph, stations) pair; a request only rebuilds the weight array.
+
+BPR_ALPHA = 0.15
+BPR_BETA = 4
+EDGE_CAPACITY_PER_HOUR = 2000.0 # Same saturation volume as counts_to_travel_time_base
+MODE_SPEEDS_KMH = {'walking': 5.0, 'cycling': 15.0, 'driving': 30.0}
+
+_EDGE_STATION_MAPS = {}
+
+def get_edge_station_map(router, stations_df):
+    """Row position in `stations_df` of the station nearest to each edge midpoint."""
+    key = (id(router), id(stations_df))
+    cached = _EDGE_STATION_MAPS.get(key)
+    if cached is not None and cached[0]() is stations_df:
+        return cached[1]
+    mid_lat, mid_lon = router.edge_midpoints_latlon()
+    _, positions = find_nearest_stations(stations_df, mid_lat, mid_lon, k=1)
+    edge_station = positions[:, 0]
+    _EDGE_STATION_MAPS[key] = (weakref.ref(stations_df, lambda _: _EDGE_STATION_MAPS.pop(key, None)), edge_station)
+    return edge_station
+
+def station_counts_at(model, features, stations_df, station_encoder, ts, history=None, forecast_cube=None):
+    """
+    Forecast counts for every station (in `stations_df` row order) at hour `ts`: read
+    from `forecast_cube` where it covers them, with one batched `forecast_at` for the rest.
+    """
+    station_ids = stations_df['station_id'].tolist()
+    if forecast_cube is not None:
+        counts = forecast_cube.lookup_many(station_ids, ts)
+    else:
+        counts = np.full(len(station_ids), np.nan)
+    missing = np.isnan(counts)
+    if missing.any():
+        if history is None:
+            history = pd.DataFrame({'station_id': pd.Series(dtype=object), 'ts': pd.Series(dtype='datetime64[ns]'), 'count': pd.Series(dtype=float)})
+        missing_ids = [s for s, m in zip(station_ids, missing) if m]
+        counts[missing] = forecast_at(model, features, history, station_encoder, missing_ids, [ts]).iloc[:, 0].to_numpy()
+    return counts
+
+def bpr_edge_times(router, edge_station, station_counts, speed_kmh):
+    """Per-edge travel time in minutes: free-flow time x (1 + alpha * (v/c)^beta)."""
+    free_flow_min = router.edge_length / (speed_kmh * 1000 / 60)
+    volume = np.clip(station_counts[edge_station], 0, None)
+    return free_flow_min * (1 + BPR_ALPHA * (volume / EDGE_CAPACITY_PER_HOUR) ** BPR_BETA)
+
+def network_travel_time(router, edge_times, origin, destination):
+    """Shortest (path, minutes) between two (lat, lon) points under `edge_times`."""
+    nodes = router.nearest_nodes([origin[0], destination[0]], [origin[1], destination[1]])
+    return router.shortest_path(nodes[0], nodes[1], edge_times)
+
+def plan_journey(model, features, stations_df, station_encoder, origin, destination, event_time, arrive_by_minutes=10, counts_df=None, forecast_cube=None, router=None, mode='driving'):
     if model is None:
         return {'error': 'Model training failed due to insufficient or poorly parsed data.'}
-    s_o = find_nearest_station(stations_df, origin[0], origin[1], k=1).iloc[0]
-    s_d = find_nearest_station(stations_df, destination[0], destination[1], k=1).iloc[0]
+    dist_km, positions = find_nearest_stations(stations_df, [origin[0], destination[0]], [origin[1], destination[1]], k=1)
+    pos_o, pos_d = positions[:, 0]
+    s_o, s_d = stations_df.iloc[pos_o].copy(), stations_df.iloc[pos_d].copy()
+    s_o['dist_km'], s_d['dist_km'] = dist_km[:, 0]
     print("Nearest origin station:", s_o.get('name', s_o.get('station_id', 'unknown')), "dist_km", s_o['dist_km'])
     print("Nearest dest station:", s_d.get('name', s_d.get('station_id', 'unknown')), "dist_km", s_d['dist_km'])
     travel_ts = (event_time - timedelta(minutes=counts_to_travel_time_base(0) + arrive_by_minutes)).replace(minute=0, second=0, microsecond=0)
-    preds_o = predict_counts(model, features, s_o['station_id'], [travel_ts], station_encoder)
-    preds_d = predict_counts(model, features, s_d['station_id'], [travel_ts], station_encoder)
-    count_sample = float((preds_o.mean()+preds_d.mean())/2)
-    base_travel_time_min = 15.0 
-    est_travel_time_min = counts_to_travel_time_base(count_sample, base_travel_time_min=base_travel_time_min)
+    # One batched forecast per request: every station when the route is weighted by
+    # them, else just the two end stations
+    if router is not None:
+        counts = station_counts_at(model, features, stations_df, station_encoder, travel_ts, history=counts_df, forecast_cube=forecast_cube)
+        count_o, count_d = counts[pos_o], counts[pos_d]
+    else:
+        count_o, count_d = station_counts_at(model, features, stations_df.iloc[[pos_o, pos_d]], station_encoder, travel_ts,
+                                             history=counts_df, forecast_cube=forecast_cube)
+    count_sample = (count_o + count_d) / 2
+    plan = {'origin_station': s_o.to_dict(), 'dest_station': s_d.to_dict(), 'predicted_count': count_sample}
+    if router is not None:
+        # Network travel time with volume-delay on every edge of the route
+        edge_times = bpr_edge_times(router, get_edge_station_map(router, stations_df), counts, MODE_SPEEDS_KMH.get(mode, MODE_SPEEDS_KMH['driving']))
+        path, est_travel_time_min = network_travel_time(router, edge_times, origin, destination)
+        if path is None:
+            return {'error': 'No street network path found between origin and destination.'}
+        plan['route_distance_km'] = router.path_length(path) / 1000
+    else:
+        base_travel_time_min = 15.0 
+        est_travel_time_min = counts_to_travel_time_base(count_sample, base_travel_time_min=base_travel_time_min)
     recommended_departure = event_time - timedelta(minutes=arrive_by_minutes + est_travel_time_min)
-    return {'origin_station': s_o.to_dict(), 'dest_station': s_d.to_dict(), 'predicted_count': count_sample, 'estimated_travel_time_min': est_travel_time_min, 'recommended_departure_time': recommended_departure}
+    plan['estimated_travel_time_min'] = est_travel_time_min
+    plan['recommended_departure_time'] = recommended_departure
+    return plan
 
 
 # ----------------------------------------------------------------------
@@ -315,7 +709,7 @@ if __name__ == "__main__":
         origin = (47.3769, 8.5417)
         destination = (47.3745, 8.5480)
         event_time = pd.Timestamp("2025-10-10 19:00:00")
-        plan = plan_journey(model, features, stations, station_encoder, origin, destination, event_time, arrive_by_minutes=10)
+        plan = plan_journey(model, features, stations, station_encoder, origin, destination, event_time, arrive_by_minutes=10, counts_df=counts)
         print("\nJourney plan:", plan)
 
     except Exception as e:
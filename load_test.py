@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import socket
+import itertools
+import tempfile
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+import numpy as np
+
+# --- Configuration ---
+STUB_DELAY_SECONDS = 0.2 # Latency of every upstream call
+SYNC_WORKERS = 8 # Like `gunicorn --workers 8` with sync workers
+CONCURRENCY = 64 # Simultaneous clients
+DURATION_SECONDS = 10
+STUB_PORT, SYNC_PORT, ASYNC_PORT = 5100, 5101, 5102
+
+# --- Load Test: Sync (WSGI) vs Async (ASGI) Serving ---
+# Starts a slow local stub for the Directions and stationboard APIs, serves the
+# app once through a worker-capped WSGI server and once through uvicorn, and
+# reports requests/sec and latency percentiles for the same client load.
+#     python load_test.py
+
+class SlowUpstreamHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(STUB_DELAY_SECONDS)
+        if self.path.startswith('/maps/api/directions/json'):
+            step = {'html_instructions': 'Head north', 'distance': {'text': '1.2 km', 'value': 1200}}
+            leg = {'distance': {'text': '1.2 km'}, 'duration': {'text': '4 mins'}, 'steps': [step]}
+            payload = {'status': 'OK', 'routes': [{'legs': [leg], 'overview_polyline': {'points': '_p~iF~ps|U_ulLnnqC'}}]}
+        else:
+            payload = {'departures': [{'prognosis': {'delay': 120}, 'name': 'Stub 11'}]}
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    request_queue_size = 256
+
+
+class PooledWSGIServer(ThreadingMixIn, WSGIServer):
+    """WSGI server handling at most SYNC_WORKERS requests at a time, like a fixed pool of sync workers."""
+    request_queue_size = 256
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self.process_request_thread, request, client_address)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_stub(port):
+    StubServer(('127.0.0.1', port), SlowUpstreamHandler).serve_forever()
+
+def _import_app(stub_url):
+    # Point the app's upstreams at the stub before it is imported
+    os.environ['GOOGLE_MAPS_BASE_URL'] = stub_url
+    os.environ.setdefault('GOOGLE_API_KEY', 'AIzaLoadTestPlaceholderKey')
+    os.environ['DIRECTIONS_CACHE_DB'] = os.path.join(tempfile.mkdtemp(), "directions.sqlite3")
+    from transport_client import stationboard_cache
+    stationboard_cache.base_url = f"{stub_url}/v1/stationboard"
+
+def serve_sync(stub_url):
+    _import_app(stub_url)
+    from app import app as flask_app
+    server = make_server('127.0.0.1', SYNC_PORT, flask_app, server_class=PooledWSGIServer, handler_class=QuietHandler)
+    server._pool = ThreadPoolExecutor(max_workers=SYNC_WORKERS)
+    server.serve_forever()
+
+def serve_async(stub_url):
+    _import_app(stub_url)
+    import uvicorn
+    from asgi_app import asgi_app
+    uvicorn.run(asgi_app, host='127.0.0.1', port=ASYNC_PORT, log_level='warning', backlog=256)
+
+def wait_for_port(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(('127.0.0.1', port)) == 0:
+                return
+        time.sleep(0.1)
+    raise TimeoutError(f"Nothing listening on port {port}")
+
+async def _request(reader, writer, method, path, body):
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by server")
+    length, keep_alive = 0, not status_line.startswith(b"HTTP/1.0")
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+        elif name.lower() == 'connection':
+            keep_alive = value.strip().lower() != 'close'
+    await reader.readexactly(length)
+    return int(status_line.split()[1]), keep_alive
+
+async def run_load(port, path, method='GET', payload=None, concurrency=CONCURRENCY, duration=DURATION_SECONDS):
+    """
+    Keeps `concurrency` requests in flight for `duration` seconds; returns (latencies, errors).
+    Uses a minimal keep-alive HTTP/1.1 client so the load generator itself stays cheap.
+    `payload` may be a callable returning a fresh body per request.
+    """
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def client_loop():
+        nonlocal errors
+        connection = None
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if connection is None:
+                    connection = await asyncio.open_connection('127.0.0.1', port)
+                body = payload() if callable(payload) else payload
+                body = json.dumps(body).encode() if body is not None else b""
+                status, keep_alive = await _request(*connection, method, path, body)
+            except (OSError, asyncio.IncompleteReadError):
+                errors += 1
+                connection = None
+                continue
+            if not keep_alive:
+                connection[1].close()
+                connection = None
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        if connection is not None:
+            connection[1].close()
+
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return np.array(latencies), errors
+
+def report(label, latencies, errors, duration=DURATION_SECONDS):
+    if len(latencies) == 0:
+        print(f"{label:<28} no successful requests ({errors} errors)")
+        return
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(f"{label:<28} {len(latencies) / duration:8.1f} req/s   p50 {p50:7.1f} ms   p99 {p99:7.1f} ms   errors {errors}")
+
+
+if __name__ == '__main__':
+    # Stub, sync server and async server run in their own processes so they
+    # don't compete with the load generator (or each other) for the GIL.
+    stub_url = f"http://127.0.0.1:{STUB_PORT}"
+    processes = [multiprocessing.Process(target=serve_stub, args=(STUB_PORT,), daemon=True),
+                 multiprocessing.Process(target=serve_sync, args=(stub_url,), daemon=True),
+                 multiprocessing.Process(target=serve_async, args=(stub_url,), daemon=True)]
+    for process in processes:
+        process.start()
+    for port in (STUB_PORT, SYNC_PORT, ASYNC_PORT):
+        wait_for_port(port)
+
+    # Distinct origins, so every request misses the directions cache and goes upstream
+    request_ids = itertools.count()
+    route_request = lambda: {'origin': f"Zürich HB {next(request_ids)}", 'destination': 'Bellevue, Zürich', 'mode': 'walking'}
+    print(f"Upstream delay {STUB_DELAY_SECONDS * 1000:.0f} ms, {CONCURRENCY} concurrent clients, "
+          f"{DURATION_SECONDS}s per run, sync server capped at {SYNC_WORKERS} workers.\n")
+    for path, method, payload in [('/api/smart-route', 'POST', route_request), ('/api/analyze', 'GET', None)]:
+        for label, port in [('sync', SYNC_PORT), ('async', ASYNC_PORT)]:
+            latencies, errors = asyncio.run(run_load(port, path, method, payload))
+            report(f"{path} [{label}]", latencies, errors)
+
+    for process in processes:
+        process.terminate()
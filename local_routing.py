@@ -0,0 +1,201 @@
+import re
+import time
+import threading
+import numpy as np
+
+from street_router import get_router, DEFAULT_PLACE
+from winter_routing import winter_weights, hazard_edge_severity
+
+# --- Configuration ---
+# Free-flow speeds per mode and OSM highway class; 'default' covers unlisted classes.
+SPEED_PROFILES_KMH = {
+    'walking': {'default': 4.8, 'steps': 2.0},
+    'bicycling': {'default': 15.0, 'cycleway': 18.0, 'path': 12.0, 'footway': 8.0, 'pedestrian': 8.0, 'steps': 2.0},
+    'driving': {'default': 25.0, 'motorway': 80.0, 'motorway_link': 50.0, 'trunk': 60.0, 'trunk_link': 40.0,
+                'primary': 40.0, 'secondary': 35.0, 'tertiary': 30.0, 'residential': 25.0,
+                'living_street': 15.0, 'service': 15.0},
+    # No timetable data offline: approximate transit as the average tram/bus speed
+    # (stops included) along the walking network.
+    'transit': {'default': 15.0},
+}
+MODE_NETWORK_TYPES = {'walking': 'walk', 'bicycling': 'bike', 'driving': 'drive', 'transit': 'walk'}
+# Share of a posted maxspeed reached on average in city traffic
+MAXSPEED_FACTOR = 0.7
+WARM_MODES = ('walking', 'bicycling', 'driving', 'transit')
+# A graph that failed to load is retried by the next route request after this long
+WARM_RETRY_SECONDS = 300
+
+_COORDINATES_RE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+# --- Local Street-Graph Router ---
+# Routes on preloaded OSM street graphs (one per network type, via
+# street_router.get_router) with mode-specific speed profiles, so smart-route and
+# event-route keep working without the Google Directions API. Graphs are loaded
+# in the background, at startup or on the first request that needs one (so any
+# WSGI host works); until a graph is warm, `route` returns None and callers fall
+# back to their previous behaviour instead of blocking.
+
+def _first(value):
+    return value[0] if isinstance(value, list) else value
+
+def _parse_maxspeed(value):
+    match = re.match(r"\s*(\d+)", str(_first(value))) if value is not None else None
+    return float(match.group(1)) if match else None
+
+def edge_travel_times(router, mode):
+    """Seconds to traverse every edge of `router` for `mode` (cached per graph and mode)."""
+    key = ('travel_time_s', mode)
+    if key not in router.cache:
+        profile = SPEED_PROFILES_KMH[mode]
+        speeds = np.empty(router.n_edges)
+        for i, data in enumerate(router.edge_attrs):
+            speed = profile.get(_first(data.get('highway')), profile['default'])
+            if mode == 'driving':
+                maxspeed = _parse_maxspeed(data.get('maxspeed'))
+                if maxspeed:
+                    speed = maxspeed * MAXSPEED_FACTOR
+            speeds[i] = speed
+        router.cache[key] = router.edge_length / (speeds / 3.6)
+    return router.cache[key]
+
+
+class LocalRouter:
+    def __init__(self, place=DEFAULT_PLACE):
+        self.place = place
+        self._lock = threading.Lock()
+        self._routers = {} # network_type -> StreetRouter, only once fully loaded
+        self._known_places = {}
+        self._warm_lock = threading.Lock()
+        self._warm_thread = None
+        self._warm_started = None
+
+    def add_places(self, places):
+        """Registers named places (name -> (lat, lon)) that can be routed without geocoding."""
+        with self._lock:
+            for name, (lat, lon) in places.items():
+                self._known_places[" ".join(name.lower().split())] = (float(lat), float(lon))
+
+    def resolve(self, place):
+        """
+        (lat, lon) for a place given as a (lat, lon) pair, a {'lat', 'lng'/'lon'} dict,
+        a "lat,lon" string or a registered place name; None if unknown or malformed.
+        """
+        try:
+            if isinstance(place, dict):
+                return float(place['lat']), float(place.get('lng', place.get('lon')))
+            if isinstance(place, (list, tuple)):
+                return float(place[0]), float(place[1])
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+        match = _COORDINATES_RE.match(str(place))
+        if match:
+            return float(match.group(1)), float(match.group(2))
+        text = " ".join(str(place).lower().split())
+        with self._lock:
+            if text in self._known_places:
+                return self._known_places[text]
+            # Autocomplete strings like "Bellevue, 8001 Zürich, Switzerland": longest known name they start with
+            names = [name for name in self._known_places if text.startswith(name)]
+        return self._known_places[max(names, key=len)] if names else None
+
+    def warm(self, modes=WARM_MODES, retry_after=0):
+        """
+        Loads the street graphs and speed arrays for `modes` on a daemon thread. A no-op
+        while a warm-up is running or if the last one started less than `retry_after` seconds ago.
+        """
+        with self._warm_lock:
+            if self._warm_thread is not None and self._warm_thread.is_alive():
+                return
+            if self._warm_started is not None and time.monotonic() - self._warm_started < retry_after:
+                return
+
+            def run():
+                for mode in modes:
+                    try:
+                        self._router_for(mode, load=True)
+                    except Exception as e:
+                        print(f"Local router: could not load the {mode} network: {e}")
+
+            self._warm_started = time.monotonic()
+            self._warm_thread = threading.Thread(target=run, name="local-router-warmup", daemon=True)
+            self._warm_thread.start()
+
+    def _router_for(self, mode, load=False):
+        network_type = MODE_NETWORK_TYPES[mode]
+        with self._lock:
+            router = self._routers.get(network_type)
+        if router is None and not load:
+            self.warm(retry_after=WARM_RETRY_SECONDS) # First request under a host that never called warm()
+        elif router is None and load:
+            router = get_router(self.place, network_type=network_type)
+            edge_travel_times(router, mode)
+            hazard_edge_severity(router)
+            router.pair_edges()
+            with self._lock:
+                self._routers[network_type] = router
+            print(f"Local router ready for {mode} ({router.n_nodes} nodes).")
+        elif router is not None and load:
+            edge_travel_times(router, mode)
+        return router
+
+    def street_router(self, mode):
+        """The loaded StreetRouter used for `mode`, or None while it is still warming up."""
+        return self._router_for(mode) if mode in MODE_NETWORK_TYPES else None
+
+    def is_ready(self, mode):
+        return mode in MODE_NETWORK_TYPES and self._router_for(mode) is not None
+
+    def route(self, origin, destination, mode, winter=False):
+        """
+        Fastest route for `mode` in the shape of directions_cache.decode_route, plus
+        'distance_km' and 'duration_min'. None if the mode's graph is not loaded yet,
+        a place cannot be resolved, or there is no path. With `winter`, icy hazard roads
+        are penalised and 'winter_hazard_m' reports the metres still on them.
+        """
+        mode = mode.lower()
+        if mode not in MODE_NETWORK_TYPES:
+            return None
+        router = self._router_for(mode)
+        start, end = self.resolve(origin), self.resolve(destination)
+        if router is None or start is None or end is None:
+            return None
+
+        times = edge_travel_times(router, mode)
+        weights = winter_weights(router, times) if winter else times
+        orig, dest = router.nearest_nodes([start[0], end[0]], [start[1], end[1]])
+        path, _ = router.shortest_path(orig, dest, weights)
+        if path is None:
+            return None
+        edges = router.path_edges(path, weights)
+        distance_km = float(router.edge_length[edges].sum()) / 1000
+        duration_min = max(1, round(float(times[edges].sum()) / 60))
+        route = {
+            'path': router.path_latlon(path),
+            'directions': self._steps(router, edges),
+            'distance': f"{distance_km:.1f} km",
+            'duration': f"{duration_min} mins",
+            'distance_km': round(distance_km, 3),
+            'duration_min': duration_min,
+        }
+        if winter:
+            hazardous = hazard_edge_severity(router)[edges] > 0
+            route['winter_hazard_m'] = round(float(router.edge_length[edges][hazardous].sum()), 1)
+        return route
+
+    @staticmethod
+    def _steps(router, edges):
+        """Turn-by-turn steps: consecutive edges on the same street are merged."""
+        steps = []
+        for edge in edges:
+            name = _first(router.edge_attrs[edge].get('name')) or "unnamed road"
+            if steps and steps[-1][0] == name:
+                steps[-1][1] += router.edge_length[edge]
+            else:
+                steps.append([name, router.edge_length[edge]])
+        return [{"html_instructions": f"{'Head along' if i == 0 else 'Continue onto'} <b>{name}</b>",
+                 "distance": {"text": f"{metres / 1000:.1f} km" if metres >= 1000 else f"{metres:.0f} m",
+                              "value": int(metres)}}
+                for i, (name, metres) in enumerate(steps)]
+
+
+local_router = LocalRouter()
@@ -0,0 +1,134 @@
+import threading
+import numpy as np
+from scipy.spatial import cKDTree
+
+from congestion_analysis import HEATMAP_MAX_VOLUME
+
+# --- Configuration ---
+# Base risk of the road layout (vehicle speed/volume design) and base pedestrian
+# exposure per class; the midpoints of the ranges the per-name simulation used.
+ROAD_CLASS_RISK = {'arterial': 4.25, 'urban': 2.75}
+EXPOSURE_CLASS = {'high': 4.0, 'medium': 3.0, 'low': 2.0}
+DEFAULT_PROFILE = ('urban', 'low')
+SENSOR_RADIUS_M = 400 # Traffic counters / crowd areas further away than this don't inform an intersection
+METERS_PER_DEGREE_LAT = 111100
+METERS_PER_DEGREE_LON = 75600 # At Zurich's latitude
+
+CRITICAL_SCORE = 15.0
+HIGH_SCORE = 8.0
+PRIORITY_LEVELS = [ # (priority, color, recommendation): above CRITICAL_SCORE, above HIGH_SCORE, otherwise
+    ("Critical", "#C51B7D", "Immediate infrastructure intervention (e.g., Pedestrian Bridge or Light Signal)"),
+    ("High", "#DE77AE", "Traffic calming measures (e.g., Raised Crosswalks, Curb Extensions)"),
+    ("Standard", "#8856A7", "Standard maintenance and monitoring"),
+]
+
+# --- Pedestrian Risk Engine ---
+# Intersection attributes live in column arrays. A score is
+#   road risk  = class risk * (0.8 + 0.4 * traffic volume share of the nearest counter)
+#   exposure   = class exposure * (0.75 + 0.25 * crowd density / normal density nearby)
+#   risk score = road risk * exposure
+# computed for all intersections in one vectorized pass. With no nearby reading the
+# volume share counts as 0.5 and the crowd ratio as 1, i.e. the class midpoints.
+# Results are cached per (traffic snapshot, crowd snapshot) so every endpoint
+# reading the same snapshots shares one evaluation.
+
+def _xy(lats, lons):
+    return np.column_stack([np.asarray(lats, dtype=float) * METERS_PER_DEGREE_LAT,
+                            np.asarray(lons, dtype=float) * METERS_PER_DEGREE_LON])
+
+def _nearest(points_xy, sensors_xy, values, default):
+    """The value of the nearest sensor within SENSOR_RADIUS_M of each point, else `default`."""
+    result = np.full(len(points_xy), default, dtype=float)
+    if len(sensors_xy):
+        distance, idx = cKDTree(sensors_xy).query(points_xy, distance_upper_bound=SENSOR_RADIUS_M)
+        found = np.isfinite(distance)
+        result[found] = values[idx[found]]
+    return result
+
+
+class PedestrianRiskEngine:
+    def __init__(self, intersections, profiles=None):
+        """
+        `intersections`: name -> (lat, lon); `profiles`: name -> (road class, exposure class),
+        keys of ROAD_CLASS_RISK / EXPOSURE_CLASS (DEFAULT_PROFILE for unlisted names).
+        """
+        profiles = profiles or {}
+        self.names = list(intersections)
+        self.lat = np.array([intersections[n][0] for n in self.names], dtype=float)
+        self.lon = np.array([intersections[n][1] for n in self.names], dtype=float)
+        self.xy = _xy(self.lat, self.lon)
+        road_class, exposure_class = zip(*(profiles.get(n, DEFAULT_PROFILE) for n in self.names)) if self.names else ((), ())
+        self.class_risk = np.array([ROAD_CLASS_RISK[c] for c in road_class], dtype=float)
+        self.class_exposure = np.array([EXPOSURE_CLASS[c] for c in exposure_class], dtype=float)
+        self._lock = threading.Lock()
+        self._key = None
+        self._result = None
+        self.evaluations = 0
+
+    def volume_share(self, traffic_df):
+        """Nearest counter's volume as a share of HEATMAP_MAX_VOLUME (0.5 without one)."""
+        if traffic_df is None or traffic_df.empty:
+            return np.full(len(self.names), 0.5)
+        volume = np.clip(traffic_df['messwert'].to_numpy(dtype=float) / HEATMAP_MAX_VOLUME, 0, 1)
+        return _nearest(self.xy, _xy(traffic_df['lat'], traffic_df['lon']), volume, 0.5)
+
+    def crowd_ratio(self, crowd):
+        """Nearest monitored area's current/normal density (1 without one), capped at 3."""
+        if not crowd:
+            return np.ones(len(self.names))
+        lats, lons = zip(*(area['coords'] for area in crowd))
+        ratio = np.array([area['current_density'] / max(area['normal_density'], 1) for area in crowd], dtype=float)
+        return _nearest(self.xy, _xy(lats, lons), np.clip(ratio, 0, 3), 1.0)
+
+    def score(self, traffic_df=None, crowd=None):
+        """Risk score for every intersection, in `names` order."""
+        road_risk = self.class_risk * (0.8 + 0.4 * self.volume_share(traffic_df))
+        exposure = self.class_exposure * (0.75 + 0.25 * self.crowd_ratio(crowd))
+        return road_risk * exposure
+
+    def evaluate(self, traffic_snapshot=None, crowd_snapshot=None):
+        """
+        Records (in the get_pedestrian_risk format, plus lat/lon) for all intersections,
+        computed once per pair of snapshots (FeedScheduler snapshots or None).
+        """
+        key = tuple(s.fetched_at if s is not None else None for s in (traffic_snapshot, crowd_snapshot))
+        with self._lock:
+            if key == self._key and self._result is not None:
+                return self._result
+            scores = self.score(traffic_snapshot.data if traffic_snapshot else None,
+                                crowd_snapshot.data if crowd_snapshot else None)
+            level = np.select([scores > CRITICAL_SCORE, scores > HIGH_SCORE], [0, 1], default=2)
+            self._result = [{
+                'prs': round(float(score), 2),
+                'priority': PRIORITY_LEVELS[lvl][0],
+                'color': PRIORITY_LEVELS[lvl][1],
+                'recommendation': PRIORITY_LEVELS[lvl][2],
+                'location': name,
+                'risk_type': 'Pedestrian Safety',
+                'lat': float(lat),
+                'lon': float(lon),
+            } for name, score, lvl, lat, lon in zip(self.names, scores.tolist(), level.tolist(), self.lat, self.lon)]
+            self._key = key
+            self.evaluations += 1
+            return self._result
+
+
+if __name__ == '__main__':
+    import time
+    import pandas as pd
+
+    # Synthetic city: 10,000 intersections, 2,000 traffic counters, 50 crowd areas
+    rng = np.random.default_rng(0)
+    n = 10000
+    intersections = {f"x{i}": (lat, lon) for i, (lat, lon) in
+                     enumerate(zip(rng.uniform(47.32, 47.44, n), rng.uniform(8.45, 8.62, n)))}
+    profiles = {name: (rng.choice(list(ROAD_CLASS_RISK)), rng.choice(list(EXPOSURE_CLASS))) for name in intersections}
+    traffic = pd.DataFrame({'lat': rng.uniform(47.32, 47.44, 2000), 'lon': rng.uniform(8.45, 8.62, 2000),
+                            'messwert': rng.uniform(0, 2000, 2000)})
+    crowd = [{'coords': [lat, lon], 'current_density': d, 'normal_density': 200}
+             for lat, lon, d in zip(rng.uniform(47.32, 47.44, 50), rng.uniform(8.45, 8.62, 50), rng.uniform(50, 500, 50))]
+    engine = PedestrianRiskEngine(intersections, profiles)
+    start = time.perf_counter()
+    scores = engine.score(traffic, crowd)
+    print(f"Scored {n} intersections in {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"(max {scores.max():.1f}, {int((scores > CRITICAL_SCORE).sum())} critical)")
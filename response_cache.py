@@ -0,0 +1,120 @@
+import gzip
+import json
+import time
+import hashlib
+import threading
+from functools import wraps
+from flask import request, Response
+
+from cache_utils import SingleFlight
+
+try:
+    import brotli # Optional: smaller bodies for browsers that accept `br`
+except ImportError:
+    brotli = None
+
+# --- Configuration ---
+RESPONSE_CACHE_TTL_SECONDS = 3600
+# Bodies below this size are not worth compressing
+MIN_COMPRESS_BYTES = 512
+
+# --- Response Cache for Rarely-Changing APIs ---
+# Serialized JSON bodies are cached per endpoint + query args together with a
+# content-hash ETag and pre-compressed gzip/brotli variants. Repeat requests are
+# answered with 304 when the client's If-None-Match matches, or with the stored
+# bytes otherwise, so the view function and json serialization run once per TTL.
+
+class _Entry:
+    def __init__(self, body, status, expires_at):
+        self.body = body
+        self.status = status
+        self.expires_at = expires_at
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.encoded = {}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.encoded['gzip'] = gzip.compress(body, compresslevel=6)
+            if brotli is not None:
+                self.encoded['br'] = brotli.compress(body)
+
+
+class ResponseCache:
+    def __init__(self, ttl=RESPONSE_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._single_flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def _build(self, key, view, args, kwargs, ttl, cacheable):
+        payload = view(*args, **kwargs)
+        status = 200
+        if isinstance(payload, tuple):
+            payload, status = payload
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        entry = _Entry(body, status, time.monotonic() + ttl)
+        if status == 200 and (cacheable is None or cacheable(payload)):
+            with self._lock:
+                self._entries[key] = entry
+        return entry
+
+    def _get(self, key, view, args, kwargs, ttl, cacheable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry.expires_at:
+                self.hits += 1
+                return entry
+            self.misses += 1
+        return self._single_flight.do(key, lambda: self._build(key, view, args, kwargs, ttl, cacheable))
+
+    def cached(self, ttl=None, cacheable=None):
+        """
+        Decorator for Flask views that return JSON-serializable data (optionally
+        with a status code) instead of a response. Errors are returned but not cached, and
+        neither is data for which `cacheable(data)` is false (e.g. provisional results).
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                key = (request.path, tuple(sorted(request.args.items(multi=True))))
+                entry = self._get(key, view, args, kwargs, ttl or self.ttl, cacheable)
+                return self._respond(entry)
+            return wrapper
+        return decorator
+
+    def _respond(self, entry):
+        if entry.status == 200 and entry.etag in request.headers.get('If-None-Match', ''):
+            with self._lock:
+                self.not_modified += 1
+            response = Response(status=304)
+        else:
+            accepted = request.headers.get('Accept-Encoding', '')
+            encoding = next((e for e in ('br', 'gzip') if e in entry.encoded and e in accepted), None)
+            response = Response(entry.encoded[encoding] if encoding else entry.body,
+                                status=entry.status, mimetype='application/json')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.headers['ETag'] = entry.etag
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache' # Revalidate, but skip the body when unchanged
+        return response
+
+    def invalidate(self, path_prefix=''):
+        """Drops cached responses whose path starts with `path_prefix` (all by default)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0].startswith(path_prefix)]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'cached_responses': len(self._entries),
+                'brotli': brotli is not None,
+            }
+
+
+response_cache = ResponseCache()
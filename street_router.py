@@ -0,0 +1,148 @@
+import threading
+import numpy as np
+import networkx as nx
+from pyproj import Transformer
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+# --- Configuration ---
+DEFAULT_PLACE = "Zurich, Switzerland"
+
+# --- Array-Backed Street Router ---
+# networkx shortest paths with a Python weight callback cost seconds on the full
+# Zurich graph. StreetRouter flattens a projected OSMnx graph once into NumPy
+# edge arrays plus a KD-tree over the nodes; every query then builds a CSR matrix
+# from a per-edge weight array and runs SciPy's Dijkstra. Callers derive the
+# weight array (travel time, penalties, ...) without touching the base graph.
+
+class StreetRouter:
+    def __init__(self, G: nx.MultiDiGraph):
+        self.crs = G.graph['crs']
+        nodes = list(G.nodes)
+        self.node_ids = np.array(nodes)
+        node_pos = {n: i for i, n in enumerate(nodes)}
+        self.x = np.array([G.nodes[n]['x'] for n in nodes], dtype=float)
+        self.y = np.array([G.nodes[n]['y'] for n in nodes], dtype=float)
+
+        to_wgs84 = Transformer.from_crs(self.crs, "epsg:4326", always_xy=True)
+        self._to_projected = Transformer.from_crs("epsg:4326", self.crs, always_xy=True)
+        self.lon, self.lat = to_wgs84.transform(self.x, self.y)
+
+        edges = list(G.edges(keys=True, data=True))
+        self.edge_u = np.array([node_pos[u] for u, _, _, _ in edges], dtype=np.int64)
+        self.edge_v = np.array([node_pos[v] for _, v, _, _ in edges], dtype=np.int64)
+        self.edge_keys = [(u, v, k) for u, v, k, _ in edges]
+        self.edge_length = np.array([data.get('length', 0.0) for _, _, _, data in edges], dtype=float)
+        self.edge_attrs = [data for _, _, _, data in edges]
+        self.n_nodes = len(nodes)
+        self.n_edges = len(edges)
+
+        # Parallel edges collapse onto one CSR entry; sort once so each query can
+        # take the cheapest of them with a single reduceat.
+        order = np.lexsort((self.edge_v, self.edge_u))
+        pairs_u, pairs_v = self.edge_u[order], self.edge_v[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (pairs_u[1:] != pairs_u[:-1]) | (pairs_v[1:] != pairs_v[:-1])
+        self._edge_order = order
+        self._pair_starts = np.flatnonzero(first)
+        self._pair_u = pairs_u[first]
+        self._pair_v = pairs_v[first]
+        # Pairs are sorted by (u, v), so a weight array in pair order is already the
+        # data array of a CSR matrix with this fixed structure.
+        self._csr_indptr = np.searchsorted(self._pair_u, np.arange(self.n_nodes + 1))
+
+        self._node_tree = cKDTree(np.column_stack([self.x, self.y]))
+        self.cache = {} # Per-graph derived arrays (edge->station maps, penalty masks, ...)
+
+    def to_projected(self, lats, lons):
+        return self._to_projected.transform(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+
+    def nearest_nodes(self, lats, lons):
+        """Node positions nearest to each (lat, lon) query point."""
+        x, y = self.to_projected(np.atleast_1d(lats), np.atleast_1d(lons))
+        _, idx = self._node_tree.query(np.column_stack([x, y]))
+        return idx
+
+    def edge_midpoints(self):
+        """Projected (x, y) midpoints of every edge, in edge order."""
+        return (self.x[self.edge_u] + self.x[self.edge_v]) / 2, (self.y[self.edge_u] + self.y[self.edge_v]) / 2
+
+    def edge_midpoints_latlon(self):
+        """(lat, lon) midpoints of every edge, in edge order."""
+        return (self.lat[self.edge_u] + self.lat[self.edge_v]) / 2, (self.lon[self.edge_u] + self.lon[self.edge_v]) / 2
+
+    def _csr(self, edge_weights):
+        weights = np.minimum.reduceat(np.asarray(edge_weights, dtype=float)[self._edge_order], self._pair_starts)
+        # Explicit zeros would read as missing edges in the sparse graph
+        weights = np.maximum(weights, 1e-9)
+        return csr_matrix((weights, self._pair_v, self._csr_indptr), shape=(self.n_nodes, self.n_nodes))
+
+    def shortest_path(self, orig, dest, edge_weights):
+        """
+        Shortest path between node positions `orig` and `dest` under `edge_weights`
+        (one non-negative value per edge; np.inf removes an edge).
+
+        Returns:
+            tuple: (list of node positions, total cost), or (None, inf) if unreachable.
+        """
+        dist, pred = dijkstra(self._csr(edge_weights), indices=orig, return_predecessors=True)
+        if not np.isfinite(dist[dest]):
+            return None, float('inf')
+        path = [dest]
+        while path[-1] != orig:
+            path.append(pred[path[-1]])
+        return path[::-1], float(dist[dest])
+
+    def distances_from(self, sources, edge_weights, limit=np.inf):
+        """
+        Multi-source bounded Dijkstra: cost from the nearest of the `sources` node positions
+        to every node, and which source that is (-9999 and inf beyond `limit`).
+        """
+        dist, _, nearest = dijkstra(self._csr(edge_weights), indices=np.asarray(sources), limit=limit,
+                                    min_only=True, return_predecessors=True)
+        return dist, nearest
+
+    def path_length(self, path):
+        """Length in metres along a node path, using the shortest parallel edge."""
+        if not path or len(path) < 2:
+            return 0.0
+        if 'length_csr' not in self.cache:
+            self.cache['length_csr'] = self._csr(self.edge_length)
+        return float(self.cache['length_csr'][path[:-1], path[1:]].sum())
+
+    def pair_edges(self):
+        """(u, v) node positions -> indices of all parallel edges between them (built once)."""
+        if 'pair_edges' not in self.cache:
+            groups = np.split(self._edge_order, self._pair_starts[1:])
+            self.cache['pair_edges'] = {(int(u), int(v)): g for u, v, g in zip(self._pair_u, self._pair_v, groups)}
+        return self.cache['pair_edges']
+
+    def path_edges(self, path, edge_weights):
+        """Edge indices along a node path, taking the cheapest parallel edge for every hop."""
+        pair_edges = self.pair_edges()
+        weights = np.asarray(edge_weights, dtype=float)
+        edges = []
+        for u, v in zip(path[:-1], path[1:]):
+            candidates = pair_edges[(int(u), int(v))]
+            edges.append(int(candidates[np.argmin(weights[candidates])]))
+        return edges
+
+    def path_latlon(self, path):
+        """[[lat, lon], ...] for a node path, ready for Leaflet."""
+        return [[float(self.lat[n]), float(self.lon[n])] for n in path]
+
+
+_ROUTERS = {}
+_ROUTERS_LOCK = threading.Lock()
+
+def get_router(place=DEFAULT_PLACE, network_type='walk'):
+    """Loads (once per place and network type) the projected street graph and returns its router."""
+    key = (place, network_type)
+    with _ROUTERS_LOCK:
+        router = _ROUTERS.get(key)
+        if router is None:
+            import StreetNetwork as sn # Pulls in osmnx/matplotlib, only needed when a graph is loaded
+            router = StreetRouter(sn.load_zurich_walk_network(place, network_type=network_type))
+            _ROUTERS[key] = router
+    return router
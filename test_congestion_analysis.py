@@ -0,0 +1,117 @@
+import re
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+from congestion_analysis import TrafficStore
+
+# Stub WFS serving a growing list of measurements. It honours count/startIndex
+# paging and the zeitpunkt FES filter, or answers 400 to filtered requests when
+# `reject_filter` is set (like a server without FES support).
+N_SENSORS = 500
+T0 = datetime(2025, 1, 1, 8, 0)
+
+
+class StubWFSHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        self.server.requests.append(query)
+        if 'filter' in query and self.server.reject_filter:
+            self.send_error(400, "Unsupported filter")
+            return
+        rows = self.server.measurements
+        since = re.search(r'<fes:Literal>(.*?)</fes:Literal>', query.get('filter', ''))
+        if since:
+            rows = [f for f in rows if f['properties']['zeitpunkt'] > since.group(1)]
+        if 'count' in query:
+            start = int(query.get('startIndex', 0))
+            rows = rows[start:start + int(query['count'])]
+        body = json.dumps({'type': 'FeatureCollection', 'features': rows}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def add_measurements(server, ts, n_sensors=N_SENSORS):
+    for i in range(n_sensors):
+        server.measurements.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [8.50 + (i % 100) * 0.001, 47.35 + (i // 100) * 0.001]},
+            'properties': {'messwert': i, 'zeitpunkt': ts.isoformat()},
+        })
+
+
+@pytest.fixture
+def wfs():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubWFSHandler)
+    server.daemon_threads = True
+    server.measurements, server.requests, server.reject_filter = [], [], False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def store(wfs):
+    return TrafficStore(base_url=f"http://127.0.0.1:{wfs.server_address[1]}/wfs", page_size=200)
+
+
+def test_update_pages_through_the_layer(store, wfs):
+    add_measurements(wfs, T0)
+    store.update()
+
+    assert [int(r['startIndex']) for r in wfs.requests] == [0, 200, 400]
+    assert all(int(r['count']) == 200 and 'filter' not in r for r in wfs.requests)
+    assert len(store.history()) == N_SENSORS
+    assert store.last_seen == T0
+
+
+def test_update_fetches_only_measurements_newer_than_last_seen(store, wfs):
+    add_measurements(wfs, T0)
+    store.update()
+    wfs.requests.clear()
+
+    t1 = T0 + timedelta(minutes=15)
+    add_measurements(wfs, t1)
+    store.update()
+
+    assert all(T0.isoformat() in r['filter'] for r in wfs.requests)
+    assert len(wfs.requests) == 3 # Only the new rows are paged through
+    assert len(store.history()) == 2 * N_SENSORS
+    assert store.last_seen == t1
+    latest = store.latest()
+    assert len(latest) == N_SENSORS and (latest['zeitpunkt'] == t1).all()
+
+    wfs.requests.clear()
+    store.update() # Nothing new
+    assert len(wfs.requests) == 1
+    assert len(store.history()) == 2 * N_SENSORS
+
+
+def test_rejected_filter_falls_back_to_full_downloads(store, wfs):
+    wfs.reject_filter = True
+    add_measurements(wfs, T0)
+    store.update() # First load has nothing to filter on yet
+    assert store.server_filtering
+
+    t1 = T0 + timedelta(minutes=15)
+    add_measurements(wfs, t1)
+    wfs.requests.clear()
+    store.update()
+
+    assert not store.server_filtering
+    assert 'filter' in wfs.requests[0]
+    assert len(wfs.requests) == 2 and 'count' not in wfs.requests[1] and 'filter' not in wfs.requests[1]
+    # The full download is filtered client-side: no duplicates of the first batch
+    assert len(store.history()) == 2 * N_SENSORS
+    assert store.last_seen == t1
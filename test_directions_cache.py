@@ -0,0 +1,80 @@
+import os
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+# app.py builds its Directions client at import time; run it offline with a throwaway cache
+os.environ.setdefault("DIRECTIONS_OFFLINE", "1")
+os.environ.setdefault("DIRECTIONS_CACHE_DB", ":memory:")
+
+import asgi_app
+from directions_cache import DirectionsCache, OfflineDirectionsClient
+
+# Every offline Directions call takes this long, so concurrent misses overlap
+CLIENT_DELAY_SECONDS = 0.3
+QUERY = ("Zürich HB", "Bellevue, Zürich", "walking")
+
+
+@pytest.fixture
+def client():
+    return OfflineDirectionsClient(delay=CLIENT_DELAY_SECONDS)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "directions.sqlite3")
+
+
+def test_miss_then_memory_then_sqlite_hit(client, db_path):
+    cache = DirectionsCache(client, db_path=db_path)
+    route = cache.get(*QUERY)
+    assert route['path'] and route['duration'].endswith("mins")
+    assert cache.get(" zürich hb", "bellevue,  zürich", "WALKING") == route # Same normalized query
+
+    restarted = DirectionsCache(client, db_path=db_path)
+    stored = restarted.get(*QUERY)
+    assert stored['path'] == [list(point) for point in route['path']] # JSON turns the tuples into lists
+    assert stored['directions'] == route['directions'] and stored['duration'] == route['duration']
+    assert client.calls == 1
+    assert cache.stats()['hits'] == 1 and restarted.stats()['sqlite_hits'] == 1
+
+
+def test_expired_entries_are_refetched(client, db_path):
+    cache = DirectionsCache(client, db_path=db_path, ttl=0)
+    cache.get(*QUERY)
+    cache.get(*QUERY)
+    assert client.calls == 2 and cache.stats()['upstream_calls'] == 2
+
+
+def test_concurrent_misses_share_one_call(client, db_path):
+    cache = DirectionsCache(client, db_path=db_path)
+    threads = [threading.Thread(target=cache.get, args=QUERY) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.calls == 1
+    assert cache.stats()['coalesced_misses'] > 0
+
+
+def test_asgi_smart_route_coalesces_concurrent_misses(client, db_path, monkeypatch):
+    cache = DirectionsCache(client, db_path=db_path)
+    monkeypatch.setattr(asgi_app, "directions_cache", cache)
+    body = {'origin': QUERY[0], 'destination': QUERY[1], 'mode': QUERY[2], 'router': 'google', 'winter': False}
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi_app.asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http:
+            first = await asyncio.gather(*[http.post("/api/smart-route", json=body) for _ in range(10)])
+            again = await http.post("/api/smart-route", json=body)
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert all(response.status_code == 200 for response in first + [again])
+    assert len({response.text for response in first + [again]}) == 1
+    assert client.calls == 1
+    assert not asgi_app._directions_in_flight
+    assert cache.stats()['hits'] == 1 # The follow-up request is served from memory
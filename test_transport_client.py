@@ -0,0 +1,97 @@
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+from transport_client import StationboardCache, FANOUT_DEADLINE_SECONDS
+
+# Stub stationboard API: every stop answers after STUB_DELAY_SECONDS, except
+# SLOW_STOP (never within the fan-out deadline) and FAILING_STOP (HTTP 500).
+STUB_DELAY_SECONDS = 0.3
+SLOW_STOP = "slow"
+FAILING_STOP = "failing"
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 64 # Accept the whole fan-out at once
+
+
+class StubStationboardHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        stop_id = parse_qs(urlparse(self.path).query)['id'][0]
+        self.server.requests.append(stop_id)
+        if stop_id == FAILING_STOP:
+            self.send_error(500)
+            return
+        time.sleep(FANOUT_DEADLINE_SECONDS + 0.5 if stop_id == SLOW_STOP else STUB_DELAY_SECONDS)
+        body = json.dumps({'departures': [{'prognosis': {'delay': 120}, 'name': f"Stub {stop_id}"}]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = StubServer(('127.0.0.1', 0), StubStationboardHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(stub):
+    return StationboardCache(base_url=f"http://127.0.0.1:{stub.server_address[1]}/v1/stationboard")
+
+
+def test_get_many_fetches_stops_concurrently(cache):
+    stop_ids = [str(8591000 + i) for i in range(20)]
+    start = time.perf_counter()
+    boards = cache.get_many(stop_ids)
+    elapsed = time.perf_counter() - start
+
+    assert set(boards) == set(stop_ids)
+    assert all(board[0]['name'] == f"Stub {stop_id}" for stop_id, board in boards.items())
+    # Serially this would take 20 x STUB_DELAY_SECONDS = 6 s
+    assert elapsed < 4 * STUB_DELAY_SECONDS
+
+
+def test_get_many_returns_empty_boards_for_failed_and_late_stops(cache):
+    start = time.perf_counter()
+    boards = cache.get_many(["8591100", FAILING_STOP, SLOW_STOP])
+    elapsed = time.perf_counter() - start
+
+    assert boards["8591100"] and boards[FAILING_STOP] == [] and boards[SLOW_STOP] == []
+    assert elapsed < FANOUT_DEADLINE_SECONDS + 0.5
+    assert cache.stats()['upstream_errors'] >= 1
+
+
+def test_cached_stops_are_not_refetched(cache, stub):
+    stop_ids = ["8591100", "8591147"]
+    cache.get_many(stop_ids)
+    boards = cache.get_many(stop_ids)
+
+    assert all(boards.values())
+    assert sorted(stub.requests) == sorted(stop_ids)
+    assert cache.stats()['hits'] == len(stop_ids)
+
+
+def test_concurrent_misses_share_one_request(cache, stub):
+    threads = [threading.Thread(target=cache.get, args=("8503000",)) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stub.requests == ["8503000"]
+    assert cache.stats()['coalesced_misses'] > 0
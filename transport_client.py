@@ -0,0 +1,125 @@
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from cache_utils import SingleFlight
+
+# --- Configuration ---
+TRANSPORT_API_URL = "https://transport.opendata.ch/v1/stationboard"
+STATIONBOARD_TIMEOUT_SECONDS = 1
+# Upper bound for a whole fan-out; stops that have not answered by then are treated as failed.
+FANOUT_DEADLINE_SECONDS = 1.5
+MAX_CONCURRENT_REQUESTS = 20
+# Departures older than this are refetched; the 'stationboards' feed (see app.py) refreshes well within it.
+STATIONBOARD_TTL_SECONDS = 60
+
+# --- Shared Connection Pool ---
+# One session for all stationboard calls keeps TCP/TLS connections alive between
+# requests; the pool is sized so a full fan-out never waits for a free connection.
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENT_REQUESTS)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix="stationboard")
+
+def fetch_stationboard(stop_id, base_url=TRANSPORT_API_URL, timeout=STATIONBOARD_TIMEOUT_SECONDS):
+    """
+    Fetches the next departures for one stop.
+
+    Raises:
+        requests.exceptions.RequestException: on network errors or bad status codes.
+    """
+    params = {'id': stop_id, 'limit': 20, 'transportations[]': ['tram', 'bus', 'train']}
+    response = _session.get(base_url, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json().get('departures', [])
+
+# --- Stationboard Snapshot Cache ---
+# /api/analyze, /api/route_adherence and /api/mentor_advice all need the same
+# stops' departures. They read them from one TTL cache that the FeedScheduler's
+# 'stationboards' feed keeps warm via `refresh`; concurrent misses for a stop
+# share a single upstream request. Failed fetches are cached as empty boards
+# too, so an upstream outage costs one timeout per stop per TTL rather than one
+# per request.
+
+class StationboardCache:
+    def __init__(self, ttl=STATIONBOARD_TTL_SECONDS, base_url=TRANSPORT_API_URL):
+        self.ttl = ttl
+        self.base_url = base_url
+        self._lock = threading.Lock()
+        self._entries = {} # stop_id -> (departures, fetched_at)
+        self._single_flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.refreshes = 0
+
+    def _fetch_and_store(self, stop_id):
+        try:
+            departures = fetch_stationboard(stop_id, base_url=self.base_url)
+        except requests.exceptions.RequestException:
+            print(f"Failed to fetch real data for stop {stop_id}.")
+            departures = []
+            with self._lock:
+                self.errors += 1
+        with self._lock:
+            self._entries[stop_id] = (departures, time.monotonic())
+            self.refreshes += 1
+        return departures
+
+    def get(self, stop_id):
+        """Departures for `stop_id`, fetched (once across concurrent callers) if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(stop_id)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        return self._single_flight.do(stop_id, lambda: self._fetch_and_store(stop_id))
+
+    def get_many(self, stop_ids, deadline=FANOUT_DEADLINE_SECONDS):
+        """
+        Departures for several stops. Cached stops return immediately; misses are
+        fetched concurrently, and any still missing at `deadline` come back empty,
+        so the latency is bounded by the slowest single stop rather than the sum.
+        """
+        futures = {stop_id: _executor.submit(self.get, stop_id) for stop_id in stop_ids}
+        done, _ = wait(futures.values(), timeout=deadline)
+        return {stop_id: future.result() if future in done and future.exception() is None else []
+                for stop_id, future in futures.items()}
+
+    def refresh(self, stop_ids):
+        """
+        Refetches `stop_ids` concurrently regardless of age (used by the feed scheduler).
+        Returns stop_id -> departures.
+        """
+        futures = {stop_id: _executor.submit(self._single_flight.do, stop_id, lambda s=stop_id: self._fetch_and_store(s))
+                   for stop_id in stop_ids}
+        wait(futures.values())
+        return {stop_id: future.result() if future.exception() is None else []
+                for stop_id, future in futures.items()}
+
+    def stats(self):
+        """Hit/miss metrics for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            now = time.monotonic()
+            ages = [now - fetched_at for _, fetched_at in self._entries.values()]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else None,
+                'coalesced_misses': self._single_flight.coalesced,
+                'upstream_fetches': self.refreshes,
+                'upstream_errors': self.errors,
+                'cached_stops': len(self._entries),
+                'max_age_seconds': round(max(ages), 1) if ages else None,
+                'ttl_seconds': self.ttl,
+            }
+
+
+stationboard_cache = StationboardCache()
+
@@ -1,42 +1,49 @@
+import os
 import pandas as pd
+import numpy as np
 import geopandas as gpd
+import shapely
 from shapely.geometry import Polygon
 import random
 
+from local_routing import local_router
+from isochrones import isochrones
+
 # --- Configuration ---
 # In a real app, this would come from a config file or environment variables
 ZURICH_POPULATION_DENSITY_GEOJSON = 'templates/nasa_heat_risk_zone.json'
+# Optional park layer (GeoJSON); without it a fixed, seeded set of parks is simulated
+GREEN_SPACES_GEOJSON = os.environ.get("GREEN_SPACES_GEOJSON")
+SIMULATED_PARKS_COUNT = 15
+SIMULATED_PARKS_SEED = 42
 
 # --- Green Space Equity Analysis ---
+# Both layers are projected to UTM 32N once; park/zone pairs come from a single
+# spatial join, their intersection areas from one vectorized shapely call, and
+# the per-zone totals from a groupby, instead of one overlay per zone.
 
-def analyze_green_space_equity():
-    """
-    Analyzes the distribution of green space relative to population density.
-    This is a simulation and uses the NASA heat risk data as a proxy for population density.
-    """
-    try:
-        # Load the GeoJSON which contains population density (proxied by heat risk)
-        gdf_population = gpd.read_file(ZURICH_POPULATION_DENSITY_GEOJSON)
-        gdf_population = gdf_population.to_crs(epsg=4326) # Ensure standard CRS
-    except Exception as e:
-        print(f"Error loading GeoJSON: {e}")
-        return {
-            "error": "Failed to load population data.",
-            "zones": []
-        }
+EQUITY_CRS = "EPSG:32632" # UTM zone 32N, metres, for area calculation in Zurich
 
-    # --- Simulate Green Spaces ---
+EQUITY_RECOMMENDATIONS = {
+    "Very Low": "Urgent priority. This area is critically underserved with green space relative to its population density. Recommend immediate land acquisition for new parks, development of community gardens, and greening of public spaces.",
+    "Low": "High priority. Consider incentives for green roofs, converting vacant lots to 'pocket parks', and planting street trees to improve local green coverage.",
+    "Moderate": "Monitor. While not critical, opportunities to enhance existing parks or add small green installations should be explored in future planning cycles.",
+    "Good": "Well-served. This area has a healthy ratio of green space to population. Focus on maintenance and biodiversity enhancement of existing parks.",
+}
+
+def simulate_green_spaces(n_parks=SIMULATED_PARKS_COUNT, seed=None):
+    """Random small-to-medium parks around Zurich's main area, as a GeoDataFrame (EPSG:4326)."""
     # In a real scenario, this data would come from a GIS database (e.g., OpenStreetMap, City's GIS data)
-    # Here, we generate random "parks" for demonstration.
+    rng = random.Random(seed)
     green_spaces = []
-    for i in range(15): # Generate 15 random small-to-medium parks
+    for i in range(n_parks):
         # Center the parks around Zurich's main area
         center_lat, center_lon = 47.37, 8.54
-        lat = center_lat + (random.uniform(-0.05, 0.05))
-        lon = center_lon + (random.uniform(-0.05, 0.05))
+        lat = center_lat + (rng.uniform(-0.05, 0.05))
+        lon = center_lon + (rng.uniform(-0.05, 0.05))
         
         # Create a small polygonal area for the park
-        size = random.uniform(0.0005, 0.002)
+        size = rng.uniform(0.0005, 0.002)
         poly = Polygon([
             (lon, lat),
             (lon + size, lat),
@@ -48,71 +55,113 @@ def analyze_green_space_equity():
             'name': f'Simulated Park #{i+1}',
             'geometry': poly
         })
+    return gpd.GeoDataFrame(green_spaces, geometry='geometry', crs="EPSG:4326")
 
-    gdf_parks = gpd.GeoDataFrame(green_spaces, geometry='geometry', crs="EPSG:4326")
+def load_green_spaces(path=GREEN_SPACES_GEOJSON):
+    """The park layer from `path`, or the seeded simulated parks when no layer file is configured."""
+    if path:
+        return gpd.read_file(path).to_crs(epsg=4326)
+    return simulate_green_spaces(seed=SIMULATED_PARKS_SEED)
 
-    # --- Analysis ---
-    analysis_results = []
+def green_space_area_per_zone(gdf_population, gdf_parks):
+    """Square metres of park area inside each zone, aligned with gdf_population's rows."""
+    zones_projected = gdf_population[['geometry']].to_crs(EQUITY_CRS).reset_index(drop=True)
+    parks_projected = gdf_parks[['geometry']].to_crs(EQUITY_CRS).reset_index(drop=True)
 
-    for index, zone in gdf_population.iterrows():
-        zone_geom = zone.geometry
-        
-        # Find parks that intersect with the current population zone
-        intersecting_parks = gdf_parks[gdf_parks.intersects(zone_geom)]
-        
-        # Calculate the area of intersection
-        green_space_area_in_zone = 0
-        if not intersecting_parks.empty:
-            # Project to a suitable CRS for area calculation (e.g., UTM zone 32N for Zurich)
-            intersection_projected = gpd.overlay(
-                intersecting_parks.to_crs(epsg=32632), 
-                gpd.GeoDataFrame(geometry=[zone_geom], crs="EPSG:4326").to_crs(epsg=32632), 
-                how='intersection'
-            )
-            green_space_area_in_zone = intersection_projected.area.sum() # Area in square meters
-
-        # --- Equity Score Calculation (Simplified) ---
-        # This is a conceptual metric. A real one would be more complex.
-        # We'll use population density (proxied by 'risk_level') and green space area.
-        
-        population_density_score = zone['risk_level'] # Using risk_level (1-5) as a proxy
-        
-        # Normalize green space area per capita (conceptual)
-        # Assume zone area is roughly constant for this simulation
-        # A higher score is better (more green space per 'person')
-        green_space_score = (green_space_area_in_zone / (population_density_score * 1000)) if population_density_score > 0 else 0
-
-        # Final Equity Score: Lower is worse (high population, low green space)
-        # We want to highlight areas where green_space_score is low and population is high.
-        equity_score = green_space_score * 10 - population_density_score
-        
-        if equity_score < 0:
-            equity_rating = "Very Low"
-            recommendation = "Urgent priority. This area is critically underserved with green space relative to its population density. Recommend immediate land acquisition for new parks, development of community gardens, and greening of public spaces."
-        elif equity_score < 5:
-            equity_rating = "Low"
-            recommendation = "High priority. Consider incentives for green roofs, converting vacant lots to 'pocket parks', and planting street trees to improve local green coverage."
-        elif equity_score < 15:
-            equity_rating = "Moderate"
-            recommendation = "Monitor. While not critical, opportunities to enhance existing parks or add small green installations should be explored in future planning cycles."
-        else:
-            equity_rating = "Good"
-            recommendation = "Well-served. This area has a healthy ratio of green space to population. Focus on maintenance and biodiversity enhancement of existing parks."
-
-        analysis_results.append({
-            "zone_id": zone['id'],
-            "population_density_proxy": population_density_score,
-            "green_space_area_sqm": round(green_space_area_in_zone),
-            "equity_rating": equity_rating,
-            "recommendation": recommendation,
-            "geometry": zone_geom.__geo_interface__
-        })
+    # Candidate (park, zone) pairs in one spatial join
+    pairs = gpd.sjoin(parks_projected, zones_projected, how='inner', predicate='intersects')
+    park_pos = pairs.index.to_numpy()
+    zone_pos = pairs['index_right'].to_numpy()
+
+    # Intersection area of every pair at once; parks overlapping each other count once per park, as before
+    areas = shapely.area(shapely.intersection(parks_projected.geometry.values[park_pos],
+                                              zones_projected.geometry.values[zone_pos]))
+    per_zone = pd.Series(areas).groupby(zone_pos).sum()
+    return per_zone.reindex(np.arange(len(zones_projected)), fill_value=0.0).to_numpy()
+
+def equity_frame(gdf_population, gdf_parks):
+    """Per-zone equity results as a GeoDataFrame (EPSG:4326), one row per zone of gdf_population."""
+    gdf_population = gdf_population.to_crs(epsg=4326) # Ensure standard CRS
+    green_space_area = green_space_area_per_zone(gdf_population, gdf_parks)
+
+    # --- Equity Score Calculation (Simplified) ---
+    # This is a conceptual metric. A real one would be more complex.
+    # We use population density (proxied by 'risk_level', 1-5) and green space area.
+    # A higher green_space_score is better (more green space per 'person').
+    density = gdf_population['risk_level'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        green_space_score = np.where(density > 0, green_space_area / (density * 1000), 0.0)
+
+    # Final Equity Score: Lower is worse (high population, low green space)
+    equity_score = green_space_score * 10 - density
+    ratings = np.select([equity_score < 0, equity_score < 5, equity_score < 15],
+                        ["Very Low", "Low", "Moderate"], default="Good")
 
+    return gpd.GeoDataFrame({
+        "zone_id": gdf_population['id'].to_numpy(),
+        "population_density_proxy": gdf_population['risk_level'].to_numpy(),
+        "green_space_area_sqm": np.round(green_space_area).astype(np.int64),
+        "equity_rating": ratings,
+        "recommendation": [EQUITY_RECOMMENDATIONS[rating] for rating in ratings],
+    }, geometry=gdf_population.geometry.to_numpy(), crs="EPSG:4326")
+
+def equity_payload(frame, gdf_parks):
+    """The API response for an equity_frame: {'zones': [...], 'parks': FeatureCollection}."""
+    zones = frame.drop(columns='geometry').to_dict('records')
+    for zone, geometry in zip(zones, frame.geometry):
+        zone['geometry'] = geometry.__geo_interface__
     return {
-        "zones": analysis_results,
+        "zones": zones,
         "parks": gdf_parks.__geo_interface__
     }
 
+def compute_green_space_equity(gdf_population, gdf_parks):
+    """Equity rating per zone from population density (`risk_level`) and park area inside the zone."""
+    return equity_payload(equity_frame(gdf_population, gdf_parks), gdf_parks)
+
+def synthetic_city(n_zones=10000, n_parks=5000, seed=0):
+    """(zones, parks) GeoDataFrames for benchmarks: a grid of ~square zones over Zurich and random parks."""
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(n_zones)))
+    minx, miny, maxx, maxy = 8.45, 47.32, 8.62, 47.44
+    dx, dy = (maxx - minx) / side, (maxy - miny) / side
+    cols, rows = np.arange(n_zones) % side, np.arange(n_zones) // side
+    zones = gpd.GeoDataFrame({
+        'id': [f"zone_{i}" for i in range(n_zones)],
+        'risk_level': rng.integers(1, 6, n_zones),
+        'geometry': shapely.box(minx + cols * dx, miny + rows * dy, minx + (cols + 1) * dx, miny + (rows + 1) * dy),
+    }, crs="EPSG:4326")
+    x, y = rng.uniform(minx, maxx, n_parks), rng.uniform(miny, maxy, n_parks)
+    size = rng.uniform(0.0005, 0.002, n_parks)
+    parks = gpd.GeoDataFrame({
+        'id': [f"park_{i}" for i in range(n_parks)],
+        'name': [f"Simulated Park #{i+1}" for i in range(n_parks)],
+        'geometry': shapely.box(x, y, x + size, y + size),
+    }, crs="EPSG:4326")
+    return zones, parks
+
+def analyze_green_space_equity():
+    """
+    Analyzes the distribution of green space relative to population density.
+    This is a simulation and uses the NASA heat risk data as a proxy for population density.
+    """
+    try:
+        # Load the GeoJSON which contains population density (proxied by heat risk)
+        gdf_population = gpd.read_file(ZURICH_POPULATION_DENSITY_GEOJSON)
+        gdf_population = gdf_population.to_crs(epsg=4326) # Ensure standard CRS
+    except Exception as e:
+        print(f"Error loading GeoJSON: {e}")
+        return {
+            "error": "Failed to load population data.",
+            "zones": []
+        }
+
+    # --- Green Spaces (configured layer or simulated) ---
+    gdf_parks = load_green_spaces()
+
+    # --- Analysis ---
+    return compute_green_space_equity(gdf_population, gdf_parks)
+
 # --- Previous Green Space Functions (for compatibility) ---
 
 ZURICH_GREEN_SPACES = [
@@ -133,6 +182,16 @@ def get_green_spaces():
     return ZURICH_GREEN_SPACES
 
 def calculate_service_areas(walking_distance_meters):
+    """
+    Walking isochrones for each green space on the walk graph (cached per distance bucket).
+    Falls back to circular buffers while the walk graph is still loading.
+    """
+    router = local_router.street_router('walking')
+    if router is not None:
+        return isochrones.service_areas(router, ZURICH_GREEN_SPACES, walking_distance_meters)
+    return calculate_buffer_service_areas(walking_distance_meters)
+
+def calculate_buffer_service_areas(walking_distance_meters):
     """
     Calculates the service area (as a circular buffer) for each green space.
     """
@@ -161,6 +220,7 @@ def calculate_service_areas(walking_distance_meters):
 
     return {
         "type": "FeatureCollection",
+        "method": "buffer",
         "features": features
     }
 
@@ -180,3 +240,28 @@ if __name__ == '__main__':
             print(f"  Population Density (Proxy): {zone['population_density_proxy']}/5")
             print(f"  Green Space Area: {zone['green_space_area_sqm']} m²")
             print(f"  Recommendation: {zone['recommendation']}")
+
+    # --- Benchmark: vectorized analysis vs. the former per-zone overlay loop ---
+    import time
+    zones, parks = synthetic_city(n_zones=10000, n_parks=5000)
+    start = time.perf_counter()
+    results = compute_green_space_equity(zones, parks)
+    vectorized_s = time.perf_counter() - start
+    print(f"\nVectorized: {len(zones)} zones x {len(parks)} parks in {vectorized_s:.2f} s")
+
+    # The old implementation (one intersects + overlay per zone) on a sample, extrapolated
+    sample = zones.iloc[:200]
+    start = time.perf_counter()
+    loop_areas = []
+    for _, zone in sample.iterrows():
+        parks_in_zone = parks[parks.intersects(zone.geometry)]
+        if parks_in_zone.empty:
+            loop_areas.append(0)
+            continue
+        zone_gdf = gpd.GeoDataFrame([zone], crs=zones.crs)
+        intersection = gpd.overlay(parks_in_zone, zone_gdf, how='intersection')
+        loop_areas.append(intersection.to_crs(epsg=32632).area.sum())
+    loop_s = (time.perf_counter() - start) / len(sample) * len(zones)
+    mismatches = sum(abs(round(a) - z['green_space_area_sqm']) > 1 for a, z in zip(loop_areas, results['zones']))
+    print(f"Per-zone loop: ~{loop_s:.1f} s (extrapolated from {len(sample)} zones), "
+          f"{loop_s / vectorized_s:.0f}x slower; {mismatches} area mismatches on the sample")
@@ -34,6 +34,7 @@ def get_current_weather(lat=47.3769, lon=8.5417):
         weather_info = {
             "location": data.get('name', 'Unknown'),
             "temperature": f"{data['main']['temp']:.1f}°C",
+            "temperature_c": data['main']['temp'], # Numeric, for logic such as winter routing
             "condition": data['weather'][0]['main'],
             "description": data['weather'][0]['description'].capitalize(),
             "icon": f"http://openweathermap.org/img/wn/{data['weather'][0]['icon']}@2x.png",
@@ -0,0 +1,64 @@
+import re
+import numpy as np
+import shapely
+
+from environmental_hazards import WINTER_HAZARD_ROADS
+
+# --- Configuration ---
+WINTER_SEVERITY = {'High': 1.0, 'Moderate': 0.5} # risk_level -> severity in [0, 1]
+WINTER_PENALTY_FACTOR = 4.0 # Cost multiplier at severity 1 is 1 + this factor
+FREEZING_POINT_C = 0.0
+MATCH_TOLERANCE_M = 15 # How far a street edge may lie from a hazard polyline
+MATCH_MIN_OVERLAP = 0.5 # Share of an edge's length that must run along the polyline
+
+# --- Winter Hazard Edge Penalties ---
+# The icy road polylines are map-matched onto each street graph once: an edge
+# belongs to a hazard road when most of its length lies within a few metres of
+# the polyline (so side streets that merely cross it are left alone). The
+# result is one float32 severity per edge, cached on the graph; winter routes
+# multiply a copy of the weight array by it and leave the base graph untouched.
+
+def projected_edge_lines(router):
+    """Edges of `router` as LineStrings in the graph's projected CRS, plus their STRtree (cached per graph)."""
+    if 'projected_edge_lines' not in router.cache:
+        coords = np.stack([np.column_stack([router.x[router.edge_u], router.y[router.edge_u]]),
+                           np.column_stack([router.x[router.edge_v], router.y[router.edge_v]])], axis=1)
+        lines = shapely.linestrings(coords)
+        router.cache['projected_edge_lines'] = (lines, shapely.STRtree(lines))
+    return router.cache['projected_edge_lines']
+
+def match_polyline(router, path_latlon, tolerance_m=MATCH_TOLERANCE_M, min_overlap=MATCH_MIN_OVERLAP):
+    """Indices of the edges running along a polyline given as [[lat, lon], ...]."""
+    lines, tree = projected_edge_lines(router)
+    lats, lons = zip(*path_latlon)
+    x, y = router.to_projected(lats, lons)
+    corridor = shapely.linestrings(np.column_stack([x, y])).buffer(tolerance_m)
+    candidates = tree.query(corridor, predicate='intersects')
+    if len(candidates) == 0:
+        return candidates
+    overlap = shapely.length(shapely.intersection(lines[candidates], corridor))
+    return candidates[overlap >= min_overlap * np.maximum(router.edge_length[candidates], 1e-9)]
+
+def hazard_edge_severity(router, roads=WINTER_HAZARD_ROADS):
+    """Per-edge winter hazard severity (float32, 0 = no hazard), map-matched once per graph."""
+    if 'winter_severity' not in router.cache:
+        severity = np.zeros(router.n_edges, dtype=np.float32)
+        for road in roads:
+            edges = match_polyline(router, road['path'])
+            severity[edges] = np.maximum(severity[edges], WINTER_SEVERITY.get(road['risk_level'], 0.5))
+        router.cache['winter_severity'] = severity
+    return router.cache['winter_severity']
+
+def winter_weights(router, base_weights):
+    """`base_weights` with hazard edges made more expensive; a new array, the inputs are not modified."""
+    return base_weights * (1.0 + WINTER_PENALTY_FACTOR * hazard_edge_severity(router))
+
+def is_freezing(weather):
+    """True if a get_current_weather() result reports a temperature below freezing; False if unknown."""
+    if not weather:
+        return False
+    temperature = weather.get('temperature_c', weather.get('temperature'))
+    if isinstance(temperature, str): # Formatted like "-2.0°C"
+        match = re.match(r"\s*(-?\d+(?:\.\d+)?)", temperature)
+        temperature = float(match.group(1)) if match else None
+    return temperature is not None and temperature < FREEZING_POINT_C